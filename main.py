@@ -1,6 +1,9 @@
-import flet as ft
+from service.startup_trace import startup_trace
+with startup_trace.span("import_flet"):
+    import flet as ft
 import logging
 import sys
+import threading
 
 # Configure logging
 logging.basicConfig(
@@ -13,78 +16,151 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-from service.auth import AuthService
-from ui.login_view import LoginView
-from ui.dashboard_view import DashboardView
+# Only flet is imported up front. Services and views (and with them requests,
+# paho-mqtt and cryptography) are imported inside main() once the first frame
+# is on screen, so startup isn't blocked on them.
 
 async def main(page: ft.Page):
+    # DNS + TLS to the Honda endpoints, in the background, while the loading
+    # ring is up and credentials are read
+    from service.prewarm import prewarmer
+    prewarmer.start()
+
+    def on_lifecycle_change(e):
+        # Pooled connections rarely survive time in the background
+        if str(getattr(e, "state", None) or e.data).lower().endswith("resume"):
+            prewarmer.start("resume")
+
+    page.on_app_lifecycle_state_change = on_lifecycle_change
     page.title = "Logue"
     page.theme_mode = ft.ThemeMode.DARK
     page.padding = 0
     page.bgcolor = ft.Colors.BLACK
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
+
+    # Create loading view
+    loading_ring = ft.ProgressRing()
+    loading_text = ft.Text("Checking login status...", size=16)
+    loading_view = ft.Column(
+        [loading_ring, loading_text],
+        horizontal_alignment="center",
+        alignment="center"
+    )
     
+    page.add(loading_view)
+    page.update()
+    startup_trace.mark("first_frame")
+
+    with startup_trace.span("import_services"):
+        from service.auth import AuthService
+        from service.snapshot_store import SnapshotStore
+
     # Initialize Secure Storage
     storage = page.shared_preferences
     
     auth_service = AuthService(page, storage)
-    
-    async def on_login_success():
-        page.clean()
-        page.add(ft.Text("Login Successful! Loading Dashboard...", size=20))
-        page.update()
-        
-        dashboard = DashboardView(page, auth_service, on_logout=on_logout)
+    snapshots = SnapshotStore(storage)
+    # MQTT session pool and outbox need the networking stack; built on first
+    # use, from whichever thread gets there first (see LoginPipeline)
+    services = {}
+    services_lock = threading.Lock()
+
+    def get_services():
+        with services_lock:
+            if not services:
+                from service.state_cache import VehicleStateCache
+                from service.session_pool import MqttSessionPool
+                from service.outbox import CommandOutbox
+                from service.telemetry_store import TelemetryStore
+                from service.charge_history import ChargeHistory
+                from service.segments import SegmentEngine
+                from service.alerts import AlertEngine
+                from service.config import Config
+                state_cache = VehicleStateCache()
+                # Every decoded update is kept in the local history
+                services["telemetry"] = TelemetryStore(Config.TELEMETRY_PATH, Config.TELEMETRY_RETENTION_DAYS)
+                services["telemetry"].attach(state_cache)
+                SegmentEngine(services["telemetry"]).attach(state_cache)
+                services["charge_history"] = ChargeHistory(services["telemetry"])
+                services["charge_history"].attach(state_cache)
+                services["alerts"] = AlertEngine()
+                services["alerts"].attach(state_cache)
+                services["session_pool"] = MqttSessionPool(auth_service, state_cache)
+                services["outbox"] = CommandOutbox(storage, auth_service, services["session_pool"].state_cache)
+            return services
+
+    def show_login():
+        from ui.login_view import LoginView
         page.clean()
         page.vertical_alignment = ft.MainAxisAlignment.START
         page.horizontal_alignment = ft.CrossAxisAlignment.START
-        page.add(dashboard)
+        login_view = LoginView(page, auth_service, on_login_success)
+        page.add(login_view)
         page.update()
+        startup_trace.finish("login_form")
+    
+    async def on_login_success():
+        with startup_trace.span("import_dashboard"):
+            from ui.dashboard_view import DashboardView
+        svc = get_services()
 
-    async def on_logout():
-        await auth_service.logout()
+        # DashboardView only builds its hero section up front, so it is cheap
+        # enough to construct directly instead of painting a placeholder first
+        # Make sure the selected vehicle's last snapshot is in memory so the
+        # first dashboard frame shows real (if stale) numbers
+        with startup_trace.span("snapshot_load"):
+            await snapshots.load(auth_service.selected_vin)
+        with startup_trace.span("dashboard_construct"):
+            dashboard = DashboardView(page, auth_service, on_logout=on_logout, snapshots=snapshots, session_pool=svc["session_pool"], outbox=svc["outbox"], charge_history=svc["charge_history"], alerts=svc["alerts"], telemetry=svc["telemetry"])
         page.clean()
         page.vertical_alignment = ft.MainAxisAlignment.START
         page.horizontal_alignment = ft.CrossAxisAlignment.START
-        login_view = LoginView(page, auth_service, on_login_success)
-        page.add(login_view)
+        page.add(dashboard)
         page.update()
+        startup_trace.mark("dashboard_frame")
 
-    # Create loading view
-    loading_ring = ft.ProgressRing()
-    loading_text = ft.Text("Checking login status...", size=16)
-    loading_view = ft.Column(
-        [loading_ring, loading_text],
-        horizontal_alignment="center",
-        alignment="center"
-    )
-    
-    page.add(loading_view)
-    page.update()
+    async def on_logout():
+        if services:
+            # Queued commands and the command workers belong to the account
+            from service.command_dispatcher import CommandDispatcher
+            services["outbox"].stop()
+            await services["outbox"].clear()
+            CommandDispatcher.forget(auth_service.hidas_ident)
+        await auth_service.logout()
+        show_login()
 
-    # Check for stored credentials
+    # Check for stored credentials (one storage read; crypto only loads if a
+    # record exists)
     username, password, vin, pin = await auth_service.load_credentials()
     
     if username and password:
         loading_text.value = f"Welcome back, {username}. Logging in..."
         page.update()
         
-        # Run login in thread to avoid blocking UI
+        # Run login in thread to avoid blocking UI. The pipeline starts the
+        # stored VIN's MQTT session and first data request as soon as the
+        # access token arrives, alongside vehicle discovery.
         import asyncio
+        from service.login_pipeline import LoginPipeline
         loop = asyncio.get_running_loop()
-        success, message = await loop.run_in_executor(None, lambda: auth_service.login(username, password, vin=vin))
+        pipeline = LoginPipeline(auth_service, lambda: get_services()["session_pool"])
+        login_future = loop.run_in_executor(None, pipeline.login, username, password, vin)
+        # Load the dashboard's modules (paho, views) while the login round trips run
+        import importlib
+        dashboard_import = loop.run_in_executor(None, importlib.import_module, "ui.dashboard_view")
+        # Read the cached dashboard snapshot while the login round trips run
+        with startup_trace.span("snapshot_load"):
+            await snapshots.load(vin)
+        success, message = await login_future
+        with startup_trace.span("wait_dashboard_import"):
+            await dashboard_import
         
         if success:
             await on_login_success()
             return
 
     # Fallback to LoginView
-    page.clean()
-    page.vertical_alignment = ft.MainAxisAlignment.START
-    page.horizontal_alignment = ft.CrossAxisAlignment.START
-    login_view = LoginView(page, auth_service, on_login_success)
-    page.add(login_view)
-    page.update()
+    show_login()
 if __name__ == "__main__":
     ft.run(main)
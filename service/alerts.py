@@ -0,0 +1,309 @@
+import heapq
+import threading
+import time
+import logging
+from service.vehicle_state import TIRE_POSITIONS, is_charging, is_plugged_in
+
+logger = logging.getLogger(__name__)
+
+KPA_PER_PSI = 6.89476
+
+# Built-in rules. Users override fields per rule id (e.g. disable one or
+# change a threshold); see rules_from_settings. Times are in seconds.
+DEFAULT_RULES = [
+    {"id": "tire_pressure", "type": "tire_pressure", "label": "Tire pressure", "enabled": True,
+     "min_psi": 30, "max_psi": 45, "hysteresis": 1, "debounce": 0},
+    {"id": "charge_target", "type": "charge_target", "label": "Charge target reached", "enabled": True,
+     "hysteresis": 2, "debounce": 0},
+    {"id": "not_charging", "type": "plugged_not_charging", "label": "Plugged in but not charging", "enabled": True,
+     "debounce": 15 * 60},
+    {"id": "soc_low", "type": "soc_below", "label": "Low battery", "enabled": True,
+     "threshold": 20, "hysteresis": 5, "debounce": 0},
+    {"id": "climate_on", "type": "climate_on", "label": "Climate left on", "enabled": True,
+     "debounce": 30 * 60},
+]
+
+class CompiledRule:
+    """
+    One condition to watch: the fields it reads, when it starts (`condition`)
+    and when it may stop again (`clear`, which gives hysteresis), and how long
+    the condition must hold before it fires (`debounce`).
+    """
+    __slots__ = ("id", "label", "fields", "condition", "clear", "debounce", "message")
+
+    def __init__(self, id, label, fields, condition, clear, debounce, message):
+        self.id = id
+        self.label = label
+        self.fields = fields
+        self.condition = condition
+        self.clear = clear
+        self.debounce = debounce
+        self.message = message
+
+def _number(state, field):
+    value = state.get(field)
+    return value if isinstance(value, (int, float)) else None
+
+def _compile_tire_pressure(rule):
+    low = rule["min_psi"] * KPA_PER_PSI
+    high = rule["max_psi"] * KPA_PER_PSI
+    margin = rule.get("hysteresis", 0) * KPA_PER_PSI
+    compiled = []
+    for pos in TIRE_POSITIONS:
+        field = f"tire_{pos}"
+
+        def condition(state, field=field):
+            kpa = _number(state, field)
+            return kpa is not None and (kpa < low or kpa > high)
+
+        def clear(state, field=field):
+            kpa = _number(state, field)
+            return kpa is None or low + margin <= kpa <= high - margin
+
+        def message(state, field=field, pos=pos):
+            psi = _number(state, field) / KPA_PER_PSI
+            side = " ".join(w.lower() for w in pos.replace("front", "front ").replace("rear", "rear ").split())
+            return f"{side.capitalize()} tire at {psi:.0f} PSI"
+
+        compiled.append(CompiledRule(f"{rule['id']}:{pos}", rule["label"], (field,), condition, clear, rule.get("debounce", 0), message))
+    return compiled
+
+def _compile_charge_target(rule):
+    margin = rule.get("hysteresis", 0)
+
+    def condition(state):
+        soc, target = _number(state, "soc"), _number(state, "target_level")
+        return soc is not None and target is not None and is_plugged_in(state) and soc >= target
+
+    def clear(state):
+        soc, target = _number(state, "soc"), _number(state, "target_level")
+        return not is_plugged_in(state) or soc is None or target is None or soc < target - margin
+
+    return [CompiledRule(rule["id"], rule["label"], ("soc", "target_level", "plug_status", "charge_status"),
+                         condition, clear, rule.get("debounce", 0),
+                         lambda state: f"Charged to {state.get('soc')}%")]
+
+def _compile_plugged_not_charging(rule):
+    def condition(state):
+        soc, target = _number(state, "soc"), _number(state, "target_level")
+        below_target = soc is None or target is None or soc < target - 1
+        return is_plugged_in(state) and not is_charging(state) and below_target
+
+    return [CompiledRule(rule["id"], rule["label"], ("soc", "target_level", "plug_status", "charge_status"),
+                         condition, lambda state: not condition(state), rule.get("debounce", 0),
+                         lambda state: f"Plugged in at {state.get('soc')}% but not charging")]
+
+def _compile_soc_below(rule):
+    threshold = rule["threshold"]
+    margin = rule.get("hysteresis", 0)
+
+    def condition(state):
+        soc = _number(state, "soc")
+        return soc is not None and soc < threshold
+
+    def clear(state):
+        soc = _number(state, "soc")
+        return soc is None or soc >= threshold + margin
+
+    return [CompiledRule(rule["id"], rule["label"], ("soc",), condition, clear, rule.get("debounce", 0),
+                         lambda state: f"Battery at {state.get('soc')}%")]
+
+def _compile_climate_on(rule):
+    def condition(state):
+        climate = state.get("climate")
+        return bool(climate) and climate.upper() not in ("OFF", "UNKNOWN")
+
+    return [CompiledRule(rule["id"], rule["label"], ("climate",), condition, lambda state: not condition(state),
+                         rule.get("debounce", 0), lambda state: "Climate control is still on")]
+
+RULE_TYPES = {
+    "tire_pressure": _compile_tire_pressure,
+    "charge_target": _compile_charge_target,
+    "plugged_not_charging": _compile_plugged_not_charging,
+    "soc_below": _compile_soc_below,
+    "climate_on": _compile_climate_on,
+}
+
+def rules_from_settings(overrides=None):
+    """DEFAULT_RULES with per-rule-id overrides (e.g. {"soc_low": {"threshold": 15}}) applied."""
+    overrides = overrides or {}
+    return [{**rule, **overrides.get(rule["id"], {})} for rule in DEFAULT_RULES]
+
+class AlertPlan:
+    """Rules compiled once into a field -> rules index."""
+    def __init__(self, rules):
+        self.rules = {}
+        self.by_field = {}
+        for rule in rules:
+            if not rule.get("enabled", True):
+                continue
+            compile_rule = RULE_TYPES.get(rule.get("type"))
+            if compile_rule is None:
+                logger.warning(f"Unknown alert rule type {rule.get('type')!r}")
+                continue
+            try:
+                for compiled in compile_rule(rule):
+                    self.rules[compiled.id] = compiled
+                    for field in compiled.fields:
+                        self.by_field.setdefault(field, []).append(compiled)
+            except KeyError as e:
+                logger.warning(f"Alert rule {rule.get('id')!r} is missing {e}")
+        self.by_field = {field: tuple(rules) for field, rules in self.by_field.items()}
+
+    def affected(self, changed):
+        """Rules reading any of the changed fields (all rules if changed is None)."""
+        if changed is None:
+            return list(self.rules.values())
+        if len(changed) == 1:
+            return self.by_field.get(next(iter(changed)), ())
+        return list({id(rule): rule for field in changed for rule in self.by_field.get(field, ())}.values())
+
+class AlertEngine:
+    """
+    Evaluates an AlertPlan against every decoded update, per VIN.
+
+    Only rules that read a changed field are re-evaluated. A rule whose
+    condition holds goes pending; it fires once it has held for its debounce
+    time (checked on later updates and by tick()), and is only cleared when
+    its clear condition holds, so values hovering at a threshold don't flap.
+    Listeners get (vin, alert, active) on every fire/clear, on the thread
+    that delivered the update.
+    """
+    def __init__(self, rules=None):
+        self.plan = AlertPlan(rules or DEFAULT_RULES)
+        self._status = {} # (vin, rule id) -> {"since", "active", "message"}
+        self._due = [] # Heap of (fire time, vin, rule id) for pending rules
+        self._seen = set() # VINs evaluated at least once
+        self._listeners = []
+        self._state_cache = None # Set by attach(), to re-check cached states on set_rules()
+        self._lock = threading.Lock()
+
+    def set_rules(self, rules):
+        """
+        Swap in a new rule set. Alerts whose rule is gone (or disabled) are
+        cleared, and every rule is re-checked: immediately against the
+        attached cache's states, otherwise on each VIN's next update.
+        """
+        plan = AlertPlan(rules)
+        with self._lock:
+            previous, self.plan = self.plan, plan
+            removed = [(key, s) for key, s in self._status.items() if key[1] not in plan.rules]
+            for key, _ in removed:
+                del self._status[key]
+            self._seen.clear()
+            state_cache = self._state_cache
+        self._notify([(vin, previous.rules[rule_id], s, False) for (vin, rule_id), s in removed if s["active"]])
+        if state_cache is not None:
+            for vin in state_cache.vins():
+                state, _ = state_cache.get(vin)
+                if state:
+                    self.evaluate(vin, state)
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def attach(self, state_cache):
+        """Evaluate every update of a VehicleStateCache; returns unsubscribe()."""
+        def on_update(vin, state, changed, timestamp):
+            self.evaluate(vin, state, changed)
+        unsubscribe = state_cache.subscribe(on_update)
+        self._state_cache = state_cache
+
+        def detach():
+            unsubscribe()
+            if self._state_cache is state_cache:
+                self._state_cache = None
+        return detach
+
+    def evaluate(self, vin, state, changed=None, now=None):
+        """Re-check the rules reading `changed` (all of them if None)."""
+        now = now or time.time()
+        events = []
+        with self._lock:
+            if vin not in self._seen:
+                self._seen.add(vin)
+                changed = None # First state for this VIN: check everything
+            for rule in self.plan.affected(changed):
+                key = (vin, rule.id)
+                status = self._status.get(key)
+                if status is None or not status["active"]:
+                    if not rule.condition(state):
+                        if status is not None:
+                            del self._status[key] # Pending, but didn't hold long enough
+                        continue
+                    if status is None:
+                        status = self._status[key] = {"since": now, "active": False, "message": None}
+                        if rule.debounce:
+                            heapq.heappush(self._due, (now + rule.debounce, vin, rule.id))
+                    status["message"] = rule.message(state)
+                    if now - status["since"] >= rule.debounce:
+                        status["active"] = True
+                        events.append((vin, rule, status, True))
+                elif rule.clear(state):
+                    del self._status[key]
+                    events.append((vin, rule, status, False))
+                else:
+                    status["message"] = rule.message(state)
+            events.extend(self._fire_due(now))
+        self._notify(events)
+
+    def tick(self, now=None):
+        """Fire pending rules whose debounce ran out without a new update."""
+        with self._lock:
+            events = self._fire_due(now or time.time())
+        self._notify(events)
+
+    def _fire_due(self, now):
+        events = []
+        while self._due and self._due[0][0] <= now:
+            _, vin, rule_id = heapq.heappop(self._due)
+            status = self._status.get((vin, rule_id))
+            rule = self.plan.rules.get(rule_id)
+            if status and rule and not status["active"] and now - status["since"] >= rule.debounce:
+                status["active"] = True
+                events.append((vin, rule, status, True))
+        return events
+
+    def _notify(self, events):
+        if not events:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for vin, rule, status, active in events:
+            alert = {"vin": vin, "rule": rule.id, "label": rule.label, "message": status["message"], "since": status["since"]}
+            for listener in listeners:
+                try:
+                    listener(vin, alert, active)
+                except Exception as e:
+                    logger.error(f"Alert listener failed: {e}")
+
+    def active(self, vin):
+        """Alerts currently firing for a VIN."""
+        with self._lock:
+            return [
+                {"vin": vin, "rule": rule_id, "label": self.plan.rules[rule_id].label, "message": s["message"], "since": s["since"]}
+                for (v, rule_id), s in self._status.items() if v == vin and s["active"]
+            ]
+
+    def is_alerting(self, vin, rule_id, state=None):
+        """
+        Whether a rule is firing for a VIN. For a VIN the engine hasn't seen
+        yet (e.g. a cached snapshot on screen), the rule's condition is
+        checked against `state` directly.
+        """
+        with self._lock:
+            status = self._status.get((vin, rule_id))
+            if status is not None:
+                return status["active"]
+            rule = self.plan.rules.get(rule_id)
+            seen = vin in self._seen
+        if rule is None or state is None or seen:
+            return False
+        return rule.condition(state)
@@ -1,5 +1,7 @@
 import requests
 import json
+import socket
+import threading
 import uuid
 import datetime
 from service.config import Config
@@ -7,7 +9,54 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def is_unauthorized(error):
+    """True if an API call failed because the access token was rejected (HTTP 401)."""
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code == 401
+
 class HondaApi:
+    _session = None
+    _session_lock = threading.Lock()
+
+    @staticmethod
+    def http():
+        """
+        Shared keep-alive requests.Session, so calls to the same host reuse one
+        pooled TLS connection instead of paying DNS + handshake every time.
+        """
+        if HondaApi._session is None:
+            with HondaApi._session_lock:
+                if HondaApi._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=Config.FLEET_REFRESH_CONCURRENCY)
+                    session.mount("https://", adapter)
+                    HondaApi._session = session
+        return HondaApi._session
+
+    @staticmethod
+    def is_reachable(timeout=3):
+        """Cheap connectivity check: can a TCP connection to the WSC host be opened?"""
+        host = Config.WSC_HOST.split("://", 1)[-1]
+        try:
+            socket.create_connection((host, 443), timeout=timeout).close()
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _command_result(resp, failure):
+        """
+        cigServiceRequestId of an accepted remote command. HTTP errors raise
+        requests.HTTPError so callers can tell an expired token (401) apart.
+        """
+        if not resp.ok:
+            logger.error(f"{failure} - Status: {resp.status_code}, Body: {resp.text}")
+            resp.raise_for_status()
+        data = resp.json()
+        if data.get("status") in ["IN_PROGRESS", "success"]:
+            return data.get("responseBody", {}).get("cigServiceRequestId")
+        raise Exception(f"{failure}: {data}")
+
     @staticmethod
     def _get_headers(extra_headers=None):
         headers = Config.COMMON_HEADERS.copy()
@@ -22,7 +71,7 @@ class HondaApi:
             "client_id": Config.CLIENT_ID,
             "client_secret": Config.CLIENT_SECRET
         }
-        resp = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
+        resp = HondaApi.http().post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
         resp.raise_for_status()
         
         try:
@@ -40,7 +89,7 @@ class HondaApi:
             "username": username,
             "password": password
         }
-        resp = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
+        resp = HondaApi.http().post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
         resp.raise_for_status()
 
         resp_json = resp.json()
@@ -69,7 +118,7 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.get(url, headers=headers)
+        resp = HondaApi.http().get(url, headers=headers)
         resp.raise_for_status()
         
         data = resp.json()
@@ -95,7 +144,7 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.post(url, headers=headers, json={"device": vin})
+        resp = HondaApi.http().post(url, headers=headers, json={"device": vin})
         resp.raise_for_status()
         
         data = resp.json()
@@ -122,7 +171,7 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.post(url, headers=headers, json={
+        resp = HondaApi.http().post(url, headers=headers, json={
             "device": vin,
             "filters": Config.DASHBOARD_FILTERS
         })
@@ -150,7 +199,7 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.post(url, headers=headers, json={
+        resp = HondaApi.http().post(url, headers=headers, json={
             "device": vin,
             "extend": False,
             "pin": pin,
@@ -161,12 +210,7 @@ class HondaApi:
                 }
             }
         })
-        
-        data = resp.json()
-        if resp.ok and data.get("status") in ["IN_PROGRESS", "success"]:
-            return data["responseBody"]["cigServiceRequestId"]
-        else:
-            raise Exception(f"Climate start failed: {data}")
+        return HondaApi._command_result(resp, "Climate start failed")
 
     @staticmethod
     def request_stop_climate(access_token, vin, pin, temperature):
@@ -183,7 +227,7 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.post(url, headers=headers, json={
+        resp = HondaApi.http().post(url, headers=headers, json={
             "device": vin,
             "extend": False,
             "pin": pin,
@@ -194,13 +238,7 @@ class HondaApi:
                 }
             }
         })
-        
-        data = resp.json()
-        if resp.ok and data.get("status") in ["IN_PROGRESS", "success"]:
-            return data["responseBody"]["cigServiceRequestId"]
-        else:
-            logger.error(f"Stop Climate Failed - Status: {resp.status_code}, Body: {resp.text}")
-            raise Exception(f"Climate stop failed: {data}")
+        return HondaApi._command_result(resp, "Climate stop failed")
 
 
     
@@ -219,17 +257,11 @@ class HondaApi:
             "hondaHeaderType.collectedTimeStamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         })
         
-        resp = requests.post(url, headers=headers, json={
+        resp = HondaApi.http().post(url, headers=headers, json={
             "device": vin,
             "targetChargeLevel": int(level)
         })
-        
-        data = resp.json()
-        if resp.ok and data.get("status") in ["IN_PROGRESS", "success"]:
-            return data.get("responseBody", {}).get("cigServiceRequestId")
-        else:
-            logger.error(f"Set Charge Target Failed - Status: {resp.status_code}, Body: {resp.text}")
-            raise Exception(f"Set charge target failed: {data}")
+        return HondaApi._command_result(resp, "Set charge target failed")
 
 
     
@@ -256,14 +288,9 @@ class HondaApi:
          }
          
          logger.debug(f"Remote Command Request - URL: {url}, Payload: [REDACTED]")
-         resp = requests.post(url, headers=headers, json=payload)
+         resp = HondaApi.http().post(url, headers=headers, json=payload)
          logger.debug(f"Remote Command Response - Status: {resp.status_code}, Body: {resp.text}")
-         data = resp.json()
-         
-         if resp.ok and data.get("status") in ["IN_PROGRESS", "success"]:
-             return data.get("responseBody", {}).get("cigServiceRequestId")
-         else:
-             raise Exception(f"{command_name} failed: {data}")
+         return HondaApi._command_result(resp, f"{command_name} failed")
 
     @staticmethod
     def request_light_horn(access_token, vin, pin, action):
@@ -295,7 +322,7 @@ class HondaApi:
         })
         
         logger.debug(f"Requesting Climate Status: {url}")
-        resp = requests.get(url, headers=headers)
+        resp = HondaApi.http().get(url, headers=headers)
         logger.debug(f"Climate Status Response - Status: {resp.status_code}, Body: {resp.text}")
         
         resp.raise_for_status()
@@ -1,8 +1,7 @@
-from service.api import HondaApi
-import json
-import os
-from cryptography.fernet import Fernet
 import logging
+from service.config import Config
+from service.startup_trace import startup_trace
+from service.settings_store import SettingsStore
 
 logger = logging.getLogger(__name__)
 
@@ -10,47 +9,50 @@ class AuthService:
     def __init__(self, page, storage):
         self.page = page
         self.storage = storage # SharedPreferences control
+        # Credentials + settings, loaded once and cached decrypted
+        self.settings = SettingsStore(storage, self)
         self.access_token = None
         self.hidas_ident = None
         self.user_info = None
         self.vehicles = []
         self.selected_vin = None
-        
-        # Initialize encryption
-        encryption_key = os.getenv("ENCRYPTION_KEY")
-        if encryption_key:
-            self.fernet = Fernet(encryption_key.encode())
-        else:
-            self.fernet = None
-            logger.warning("No ENCRYPTION_KEY found. Credentials will be stored in plain text.")
+        # Encryption (and the cryptography import) is set up on first use
+        self._fernet = None
+        self._fernet_ready = False
+
+    @property
+    def fernet(self):
+        if not self._fernet_ready:
+            encryption_key = Config.ENCRYPTION_KEY
+            if encryption_key:
+                from cryptography.fernet import Fernet
+                self._fernet = Fernet(encryption_key.encode())
+            else:
+                logger.warning("No ENCRYPTION_KEY found. Credentials will be stored in plain text.")
+            self._fernet_ready = True
+        return self._fernet
         
     async def load_credentials(self):
         """Load credentials and decrypt sensitive fields"""
-        username = await self.storage.get("honda_username")
-        password_enc = await self.storage.get("honda_password")
-        vin = await self.storage.get("honda_vin")
-        pin_enc = await self.storage.get("honda_pin")
-        
-        password = self._decrypt(password_enc)
-        pin = self._decrypt(pin_enc)
-        
-        return username, password, vin, pin
+        with startup_trace.span("load_credentials"):
+            await self.settings.load()
+        s = self.settings
+        return s.get("username"), s.get("password"), s.get("vin"), s.get("pin")
 
     async def save_credentials(self, username, password, vin, pin=None):
-        """Save credentials and encrypt sensitive fields"""
-        if username: await self.storage.set("honda_username", username)
-        if password: 
-            await self.storage.set("honda_password", self._encrypt(password))
-        if vin: await self.storage.set("honda_vin", vin)
-        if pin is not None: 
-            await self.storage.set("honda_pin", self._encrypt(pin))
+        """Save credentials (written behind, as one encrypted record)"""
+        await self.settings.load()
+        self.settings.update(
+            username=username or None,
+            password=password or None,
+            vin=vin or None,
+            pin=pin,
+        )
 
     async def logout(self):
         """Clear all stored credentials"""
-        await self.storage.remove("honda_username")
-        await self.storage.remove("honda_password")
-        await self.storage.remove("honda_vin")
-        await self.storage.remove("honda_pin")
+        await self.settings.load()
+        await self.settings.clear(keep=("use_metric", "alert_rules"))
         self.access_token = None
         self.hidas_ident = None
         self.user_info = None
@@ -71,20 +73,33 @@ class AuthService:
             logger.error(f"Decryption failed: {e}")
             return None
 
-    def login(self, username, password, vin=None):
-        """Perform full login flow"""
+    def login(self, username, password, vin=None, on_token=None):
+        """
+        Perform full login flow. on_token(), if given, is called as soon as the
+        access token is known, before vehicle discovery.
+        """
+        with startup_trace.span("import_api"):
+            from service.api import HondaApi
         try:
             # 1. Register Client (gets reg key)
-            client_reg_key = HondaApi.register_client()
+            with startup_trace.span("register_client"):
+                client_reg_key = HondaApi.register_client()
             
             # 2. Generate Token
-            auth_data = HondaApi.generate_token(client_reg_key, username, password)
+            with startup_trace.span("generate_token"):
+                auth_data = HondaApi.generate_token(client_reg_key, username, password)
             self.access_token = auth_data["access_token"]
             self.hidas_ident = auth_data["hidas_ident"]
             self.user_info = auth_data["user"]
+            if on_token:
+                try:
+                    on_token()
+                except Exception as e:
+                    logger.error(f"on_token callback failed: {e}")
             
             # 3. Get Vehicles
-            self.vehicles = HondaApi.get_vehicles(self.access_token, self.hidas_ident)
+            with startup_trace.span("get_vehicles"):
+                self.vehicles = HondaApi.get_vehicles(self.access_token, self.hidas_ident)
             
             if not self.vehicles:
                 raise Exception("No vehicles found on this account")
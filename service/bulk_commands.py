@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from service.commands import get_command
+from service.command_dispatcher import CommandDispatcher
+from service.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Per-VIN states of a bulk command
+QUEUED = "queued"
+SENDING = "sending"
+SUCCEEDED = "succeeded" # Accepted by Honda (request id returned)
+FAILED = "failed"
+
+class BulkCommandJob:
+    """
+    One command type sent to a set of VINs, with per-VIN completion tracking.
+
+    Each VIN moves queued -> sending -> succeeded/failed. A job can be run
+    again to retry; only VINs that failed are re-sent, so a vehicle that
+    already accepted the command never receives it twice.
+    """
+    def __init__(self, command, vins, params=None, pins=None, default_pin=None):
+        self.id = str(uuid.uuid4())
+        self.command = get_command(command)
+        self.params = params or {}
+        self.pins = pins or {}
+        self.default_pin = default_pin
+        self.created_at = time.time()
+        self.vins = list(dict.fromkeys(v for v in vins if v))
+        self.status = {vin: QUEUED for vin in self.vins}
+        self.request_ids = {}
+        self.errors = {}
+        self.attempts = {vin: 0 for vin in self.vins}
+        self._lock = threading.Lock()
+
+    def pin_for(self, vin):
+        return self.pins.get(vin, self.default_pin)
+
+    def _claim_retryable(self):
+        """Mark every VIN that still needs sending as in-flight and return them."""
+        with self._lock:
+            vins = [vin for vin, s in self.status.items() if s in (QUEUED, FAILED)]
+            for vin in vins:
+                self.status[vin] = SENDING
+                self.errors.pop(vin, None)
+            return vins
+
+    def _finish(self, vin, request_id=None, error=None):
+        with self._lock:
+            self.attempts[vin] += 1
+            if error is None:
+                self.status[vin] = SUCCEEDED
+                self.request_ids[vin] = request_id
+            else:
+                self.status[vin] = FAILED
+                self.errors[vin] = error
+
+    def is_done(self):
+        with self._lock:
+            return all(s in (SUCCEEDED, FAILED) for s in self.status.values())
+
+    def report(self):
+        """Aggregated view: succeeded / pending (not finished yet) / failed VINs."""
+        with self._lock:
+            return {
+                "command": self.command.key,
+                "succeeded": [v for v, s in self.status.items() if s == SUCCEEDED],
+                "pending": [v for v, s in self.status.items() if s in (QUEUED, SENDING)],
+                "failed": {v: self.errors.get(v) for v, s in self.status.items() if s == FAILED},
+            }
+
+class BulkCommandDispatcher:
+    """
+    Sends a BulkCommandJob with bounded concurrency, through the account's
+    CommandDispatcher (and so its rate limit and in-flight dedup). Per-VIN
+    PINs come from the job (falling back to its default PIN); VINs without a
+    PIN fail without being sent.
+    """
+    def __init__(self, auth_service, max_concurrency=None, command_dispatcher=None, state_cache=None):
+        self.auth_service = auth_service
+        self.state_cache = state_cache
+        self.max_concurrency = max(1, max_concurrency or Config.FLEET_REFRESH_CONCURRENCY)
+        self.commands = command_dispatcher or CommandDispatcher.for_account(auth_service)
+
+    def create_job(self, command, vins, params=None, pins=None, default_pin=None):
+        return BulkCommandJob(command, vins, params, pins, default_pin)
+
+    def run(self, job, on_progress=None):
+        """
+        Send the job to every VIN that hasn't accepted it yet. Blocking.
+        on_progress(vin, status, error) is called as each VIN completes.
+        Returns job.report().
+        """
+        vins = job._claim_retryable()
+        if vins:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(vins)), thread_name_prefix="logue-bulk") as executor:
+                futures = {executor.submit(self._send_one, job, vin): vin for vin in vins}
+                for future in as_completed(futures):
+                    vin = futures[future]
+                    if on_progress:
+                        try:
+                            on_progress(vin, job.status[vin], job.errors.get(vin))
+                        except Exception as e:
+                            logger.error(f"Bulk progress callback failed: {e}")
+        return job.report()
+
+    async def run_async(self, job, on_progress=None):
+        """Run on a worker thread; on_progress is delivered on the calling loop."""
+        loop = asyncio.get_running_loop()
+        callback = None
+        if on_progress:
+            def callback(vin, status, error):
+                loop.call_soon_threadsafe(on_progress, vin, status, error)
+        return await loop.run_in_executor(None, self.run, job, callback)
+
+    def _send_one(self, job, vin):
+        pin = job.pin_for(vin)
+        if job.command.requires_pin and not pin:
+            job._finish(vin, error="No PIN for this vehicle")
+            return
+        try:
+            future, _ = self.commands.submit(vin, job.command.key, pin, job.params)
+            request_id = future.result()
+            job._finish(vin, request_id=request_id)
+            if self.state_cache and job.command.lock_state:
+                self.state_cache.patch(vin, {"lock_state": job.command.lock_state})
+        except Exception as e:
+            logger.error(f"{job.command.label} failed for {vin}: {e}")
+            job._finish(vin, error=str(e))
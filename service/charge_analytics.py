@@ -0,0 +1,149 @@
+import time
+import logging
+from itertools import chain
+from service.charge_history import SESSION_GAP
+from service.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Recent charging samples the current rate is fitted over (seconds)
+RATE_WINDOW = 90 * 60
+# SoC rise (%) needed within the window before the fitted rate is trusted
+MIN_RISE = 1
+# Share of the AC power that reaches the battery when the session can't tell us
+DEFAULT_EFFICIENCY = 0.9
+
+# NumPy is imported on first use (slow on a phone): the module once loaded,
+# False if it isn't installed
+_numpy = None
+
+def load_numpy():
+    """Import NumPy, once. Call off the UI loop. Returns False if unavailable."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            logger.warning("NumPy is not installed; charging analytics disabled")
+            _numpy = False
+    return _numpy is not False
+
+def ready():
+    """True once NumPy is loaded, i.e. analytics won't block on an import."""
+    return bool(_numpy)
+
+def _np():
+    if not load_numpy():
+        raise ImportError("NumPy is required for charging analytics")
+    return _numpy
+
+def to_arrays(samples):
+    """ChargeHistory samples -> (ts, soc, power_kw, plugged) arrays."""
+    np = _np()
+    data = np.fromiter(chain.from_iterable(samples), dtype=float, count=len(samples) * 4).reshape(-1, 4)
+    return data[:, 0], data[:, 1], data[:, 2], data[:, 3] > 0
+
+def split_sessions(ts, plugged, gap=SESSION_GAP):
+    """(start, end) index pairs, end exclusive, of plugged-in runs."""
+    np = _np()
+    if not len(ts):
+        return np.empty((0, 2), dtype=int)
+    broken = np.diff(ts) > gap
+    starts = plugged & np.concatenate(([True], ~plugged[:-1] | broken))
+    ends = plugged & np.concatenate((~plugged[1:] | broken, [True]))
+    return np.column_stack((np.flatnonzero(starts), np.flatnonzero(ends) + 1))
+
+def session_summaries(ts, soc, power, plugged, capacity=None):
+    """
+    One dict per charging session: start/end, SoC gained, kWh added to the
+    battery (SoC gained x capacity), kWh drawn (reported AC power integrated
+    over time) and the average rate in %/h. Vectorized over all sessions at
+    once, so a year of samples takes milliseconds.
+    """
+    np = _np()
+    capacity = capacity or Config.BATTERY_CAPACITY_KWH
+    bounds = split_sessions(ts, plugged)
+    if not len(bounds):
+        return []
+    first, last = bounds[:, 0], bounds[:, 1] - 1
+
+    # Cumulative energy (trapezoids between consecutive samples); the
+    # difference between two indices is what was drawn between them
+    hours = np.diff(ts) / 3600
+    energy = np.concatenate(([0.0], np.cumsum((power[1:] + power[:-1]) / 2 * hours)))
+
+    duration = ts[last] - ts[first]
+    gained = soc[last] - soc[first]
+    drawn = energy[last] - energy[first]
+    rate = np.divide(gained * 3600, duration, out=np.zeros_like(gained), where=duration > 0)
+    # Mask out samples between sessions before taking each session's peak
+    marks = np.zeros(len(ts) + 1)
+    np.add.at(marks, first, 1)
+    np.add.at(marks, last + 1, -1)
+    peak = np.maximum.reduceat(np.where(np.cumsum(marks)[:-1] > 0, power, 0.0), first)
+
+    return [
+        {
+            "start": int(ts[i]), "end": int(ts[j]),
+            "soc_start": float(soc[i]), "soc_end": float(soc[j]),
+            "kwh_added": round(max(float(g), 0.0) / 100 * capacity, 2),
+            "kwh_drawn": round(float(d), 2),
+            "rate": round(float(r), 2),
+            "peak_kw": float(p),
+        }
+        for i, j, g, d, r, p in zip(first, last, gained, drawn, rate, peak)
+    ]
+
+def estimate(samples, target=None, now=None, capacity=None):
+    """
+    Live view of the session in progress, or None if the last sample isn't
+    plugged in: current rate (%/h), kWh added so far, SoC extrapolated to
+    `now` and a predicted time (unix) at which `target` % is reached.
+
+    The rate is a least-squares fit over the last RATE_WINDOW of the
+    session; before the SoC has moved enough it falls back to the reported
+    AC power. Both only change when the car reports, so the ETA stays valid
+    between updates without asking the car for more.
+    """
+    np = _np()
+    capacity = capacity or Config.BATTERY_CAPACITY_KWH
+    ts, soc, power, plugged = to_arrays(samples)
+    if not len(ts) or not plugged[-1]:
+        return None
+    start = split_sessions(ts, plugged)[-1][0]
+    ts, soc, power = ts[start:], soc[start:], power[start:]
+    now = now or time.time()
+
+    rate = None
+    recent = ts >= ts[-1] - RATE_WINDOW
+    if recent.sum() >= 3 and np.ptp(soc[recent]) >= MIN_RISE:
+        slope = np.polyfit(ts[recent] - ts[-1], soc[recent], 1)[0] * 3600
+        if slope > 0:
+            rate = float(slope)
+    if rate is None and power[-1] > 0:
+        summary = session_summaries(ts, soc, power, np.ones(len(ts), dtype=bool), capacity)[0]
+        efficiency = DEFAULT_EFFICIENCY
+        if summary["kwh_drawn"] >= 1 and summary["kwh_added"] > 0:
+            efficiency = min(1.0, summary["kwh_added"] / summary["kwh_drawn"])
+        rate = float(power[-1]) * efficiency / capacity * 100
+
+    # Rising SoC means charging even with no AC power reported (DC fast
+    # charging only shows up in the SoC)
+    charging = rate is not None
+    soc_now = float(soc[-1])
+    eta = None
+    if charging:
+        # The car stops at its target
+        soc_now = min(target if target is not None and soc[-1] < target else 100.0, soc_now + rate * max(0, now - float(ts[-1])) / 3600)
+        if target is not None and soc[-1] < target:
+            eta = int(ts[-1] + (target - soc[-1]) / rate * 3600)
+
+    return {
+        "rate": rate if charging else 0.0,
+        "power_kw": float(power[-1]),
+        "kwh_added": round(max(0.0, soc_now - float(soc[0])) / 100 * capacity, 2),
+        "soc_now": float(soc_now),
+        "eta": eta,
+        "since": int(ts[0]),
+    }
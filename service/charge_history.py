@@ -0,0 +1,107 @@
+import threading
+import time
+import logging
+from collections import deque
+from service.rollups import rollup_values
+from service.vehicle_state import is_plugged_in
+
+logger = logging.getLogger(__name__)
+
+# Samples kept in memory per VIN (a week of 5 minute updates is ~2000)
+CAPACITY = 4096
+# Days of persisted history loaded when a VIN is first shown
+HISTORY_DAYS = 7
+# A plugged-in run with a longer silence than this is split into two sessions
+SESSION_GAP = 3 * 3600
+
+# Telemetry fields needed to rebuild samples from the store
+_FIELDS = ("soc", "charge_status", "plug_status", "ac_voltage", "ac_amperage")
+
+def compact_sample(timestamp, state):
+    """(timestamp, soc, charge power kW, plugged in) from a decoded state, or None without SoC."""
+    soc = state.get("soc")
+    if soc is None:
+        return None
+    return (int(timestamp), soc, rollup_values(state).get("charge_power", 0.0), is_plugged_in(state))
+
+class ChargeHistory:
+    """
+    Recent SoC / charging power per VIN for the charging chart.
+
+    A bounded ring buffer of compact samples per VIN, appended to from the
+    state cache as updates arrive and back-filled once per VIN from the
+    telemetry store (load() does SQLite reads; call it off the UI loop).
+    """
+    def __init__(self, telemetry=None, capacity=CAPACITY):
+        self.telemetry = telemetry
+        self.capacity = capacity
+        self._buffers = {}
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    def attach(self, state_cache):
+        """Follow a VehicleStateCache; returns unsubscribe()."""
+        def on_update(vin, state, changed, timestamp):
+            self.add(vin, state, timestamp)
+        return state_cache.subscribe(on_update)
+
+    def _buffer(self, vin):
+        buffer = self._buffers.get(vin)
+        if buffer is None:
+            buffer = self._buffers[vin] = deque(maxlen=self.capacity)
+        return buffer
+
+    def add(self, vin, state, timestamp=None):
+        sample = compact_sample(timestamp or time.time(), state)
+        if sample is None:
+            return
+        with self._lock:
+            buffer = self._buffer(vin)
+            if buffer and sample[0] < buffer[-1][0]:
+                return
+            if buffer and buffer[-1][0] == sample[0]:
+                buffer[-1] = sample # Same update re-delivered (e.g. a patch)
+            else:
+                buffer.append(sample)
+
+    def load(self, vin, days=HISTORY_DAYS):
+        """Back-fill a VIN's buffer from persisted telemetry, once. Blocking."""
+        if not self.telemetry or vin in self._loaded:
+            return
+        try:
+            history = self.telemetry.history(vin, time.time() - days * 86400, fields=_FIELDS)
+        except Exception as e:
+            logger.error(f"Failed to load charge history for {vin}: {e}")
+            return
+        persisted = [s for s in (compact_sample(ts, state) for ts, state in history) if s]
+        with self._lock:
+            self._loaded.add(vin)
+            buffer = self._buffer(vin)
+            first_live = buffer[0][0] if buffer else None
+            older = [s for s in persisted if first_live is None or s[0] < first_live]
+            room = self.capacity - len(buffer)
+            if older and room > 0:
+                buffer.extendleft(reversed(older[-room:]))
+
+    def samples(self, vin, start=None):
+        with self._lock:
+            return [s for s in self._buffers.get(vin, ()) if start is None or s[0] >= start]
+
+    def sessions(self, vin):
+        """Plugged-in runs, oldest first, each a list of samples."""
+        sessions, current = [], []
+        for sample in self.samples(vin):
+            if sample[3] and current and sample[0] - current[-1][0] <= SESSION_GAP:
+                current.append(sample)
+                continue
+            if current:
+                sessions.append(current)
+            current = [sample] if sample[3] else []
+        if current:
+            sessions.append(current)
+        return sessions
+
+    def discard(self, vin):
+        with self._lock:
+            self._buffers.pop(vin, None)
+            self._loaded.discard(vin)
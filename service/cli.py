@@ -0,0 +1,360 @@
+"""
+`logue` command line: vehicle status and remote commands for scripts and cron.
+
+    logue status [--json] [--fresh]
+    logue lock | unlock
+    logue climate start [--temp 72] | climate stop
+    logue charge-limit 80
+    logue trips [--week] [--days 14]
+    logue export --out history.csv [--format parquet] [--from 2024-01-01] [--to 2024-02-01] [--fields soc,range] [--all-vins]
+
+Shares the daemon's file store (LOGUE_STORE_PATH), so credentials saved with
+`python -m service.daemon --login` work here too. The access token and CIG
+credentials are cached between runs, and `status` answers from the last
+snapshot without touching the network unless --fresh is given. Heavy modules
+(requests, paho) are only imported by the subcommands that need them.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+# Reuse a cached access token / CIG credentials for this long (seconds)
+SESSION_TTL = 50 * 60
+CIG_TTL = 50 * 60
+# Seconds to wait for the vehicle to answer a --fresh status request
+FRESH_TIMEOUT = 45
+
+class CliSession:
+    """
+    Logged-in AuthService restored from the store when possible, so a command
+    costs one API call instead of register + token + vehicles + the call.
+    """
+    KEY = "logue_cli_session"
+    CIG_PREFIX = "logue_cli_cig_"
+
+    def __init__(self, store):
+        from service.auth import AuthService
+
+        self.store = store
+        # Stored credentials/settings are available without logging in
+        self.auth_service = AuthService(None, store)
+        self._auth = None
+
+    async def settings(self):
+        await self.auth_service.settings.load()
+        return self.auth_service.settings
+
+    async def auth(self, force_login=False):
+        if self._auth and not force_login:
+            return self._auth
+        auth_service = self.auth_service
+        auth_service.access_token = None
+        cached = None if force_login else await self._load_json(self.KEY)
+        if cached and time.time() - cached.get("t", 0) < SESSION_TTL:
+            auth_service.access_token = auth_service._decrypt(cached["access_token"])
+            auth_service.hidas_ident = cached["hidas_ident"]
+            auth_service.vehicles = cached["vehicles"]
+            auth_service.selected_vin = cached["selected_vin"]
+        if not auth_service.access_token:
+            username, password, vin, _ = await auth_service.load_credentials()
+            if not (username and password):
+                raise SystemExit("No stored credentials; run `python -m service.daemon --login` first")
+            loop = asyncio.get_running_loop()
+            success, message = await loop.run_in_executor(None, auth_service.login, username, password, vin)
+            if not success:
+                raise SystemExit(f"Login failed: {message}")
+            await self.store.set(self.KEY, json.dumps({
+                "t": int(time.time()),
+                "access_token": auth_service._encrypt(auth_service.access_token),
+                "hidas_ident": auth_service.hidas_ident,
+                "vehicles": auth_service.vehicles,
+                "selected_vin": auth_service.selected_vin,
+            }))
+        self._auth = auth_service
+        return auth_service
+
+    async def cig_credentials(self, vin, force=False):
+        from service.api import HondaApi
+
+        auth_service = await self.auth()
+        cached = None if force else await self._load_json(f"{self.CIG_PREFIX}{vin}")
+        if cached and time.time() - cached.get("t", 0) < CIG_TTL:
+            return {"cig_token": auth_service._decrypt(cached["token"]), "cig_signature": cached["signature"]}
+        loop = asyncio.get_running_loop()
+        creds = await loop.run_in_executor(None, HondaApi.get_cig_token, auth_service.access_token, auth_service.hidas_ident, vin)
+        await self.store.set(f"{self.CIG_PREFIX}{vin}", json.dumps({
+            "t": int(time.time()),
+            "token": auth_service._encrypt(creds["cig_token"]),
+            "signature": creds["cig_signature"],
+        }))
+        return creds
+
+    async def call(self, fn, *args):
+        """Run a blocking HondaApi call with the access token; re-login once on 401."""
+        from service.api import is_unauthorized
+
+        loop = asyncio.get_running_loop()
+        auth_service = await self.auth()
+        try:
+            return await loop.run_in_executor(None, fn, auth_service.access_token, *args)
+        except Exception as e:
+            # Only a rejected token is retried: anything else may have reached the car
+            if not is_unauthorized(e):
+                raise
+        auth_service = await self.auth(force_login=True)
+        return await loop.run_in_executor(None, fn, auth_service.access_token, *args)
+
+    async def clear(self):
+        await self.store.remove(self.KEY)
+
+    async def _load_json(self, key):
+        raw = await self.store.get(key)
+        try:
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+
+async def _default_vin(session, args):
+    if args.vin:
+        return args.vin
+    vin = (await session.settings()).get("vin")
+    if not vin:
+        raise SystemExit("No vehicle selected; pass --vin")
+    return vin
+
+def _format_status(vin, state, timestamp):
+    from service.snapshot_store import describe_age
+
+    parts = [vin]
+    if state.get("soc") is not None:
+        parts.append(f"{state['soc']:.0f}%")
+    if state.get("range") is not None:
+        parts.append(f"{state['range']:.0f} mi")
+    if state.get("charge_status"):
+        parts.append(state["charge_status"].lower())
+    if state.get("lock_state"):
+        parts.append(state["lock_state"])
+    if state.get("climate"):
+        parts.append(f"climate {state['climate'].lower()}")
+    parts.append(f"updated {describe_age(timestamp)}")
+    return ", ".join(parts)
+
+async def _fresh_status(session, vin):
+    """Ask the car for a dashboard update and wait for it on MQTT."""
+    import threading
+    from service.api import HondaApi
+    from service.mqtt_client import AwsMqttClient
+    from service.session_pool import shadow_topic
+    from service.vehicle_state import decode_dashboard
+
+    arrived = threading.Event()
+    result = {}
+
+    def on_message(topic, payload):
+        try:
+            result["state"] = decode_dashboard(json.loads(payload))
+            arrived.set()
+        except Exception:
+            pass
+
+    loop = asyncio.get_running_loop()
+    creds = await session.cig_credentials(vin)
+    client = AwsMqttClient(vin, creds["cig_token"], creds["cig_signature"], on_message)
+    try:
+        try:
+            await loop.run_in_executor(None, client.connect)
+        except Exception:
+            # Cached CIG credentials may have been revoked early
+            creds = await session.cig_credentials(vin, force=True)
+            client = AwsMqttClient(vin, creds["cig_token"], creds["cig_signature"], on_message)
+            await loop.run_in_executor(None, client.connect)
+        client.subscribe(shadow_topic(vin, "DASHBOARD_ASYNC"))
+        await session.call(HondaApi.request_dashboard, vin)
+        if not await loop.run_in_executor(None, arrived.wait, FRESH_TIMEOUT):
+            raise SystemExit("Timed out waiting for the vehicle")
+    finally:
+        client.disconnect()
+    return result["state"]
+
+async def cmd_status(store, session, args):
+    from service.snapshot_store import SnapshotStore
+
+    vin = await _default_vin(session, args)
+    snapshots = SnapshotStore(store)
+    state, timestamp = await snapshots.load(vin)
+    if args.fresh or not state:
+        from service.vehicle_state import LOCAL_FIELDS
+        previous = state or {}
+        state = await _fresh_status(session, vin)
+        state.update({k: previous[k] for k in LOCAL_FIELDS if k in previous})
+        if args.climate:
+            from service.api import HondaApi
+            climate = await session.call(HondaApi.get_climate_status, vin)
+            if climate and climate.get("climateStatus"):
+                state["climate"] = climate["climateStatus"]
+        timestamp = time.time()
+        await snapshots.save(vin, state, timestamp)
+
+    if args.json:
+        print(json.dumps({"vin": vin, "timestamp": int(timestamp), "age": int(time.time() - timestamp), "state": state}, indent=2 if sys.stdout.isatty() else None))
+    else:
+        print(_format_status(vin, state, timestamp))
+    return 0
+
+async def cmd_remote(store, session, args):
+    from service.commands import get_command
+
+    vin = await _default_vin(session, args)
+    command = get_command(args.command_key)
+    params = {}
+    if command.key == "climate_start":
+        params["temperature"] = args.temp
+    elif command.key == "charge_limit":
+        params["level"] = args.level
+
+    pin = args.pin
+    if command.requires_pin and not pin:
+        pin = (await session.settings()).get("pin")
+        if not pin:
+            raise SystemExit("No stored PIN; pass --pin")
+
+    def send(access_token, vin):
+        return command.send(access_token, vin, pin, params)
+
+    request_id = await session.call(send, vin)
+    if command.lock_state:
+        # The shadow has no lock status; track it like the app does
+        from service.snapshot_store import SnapshotStore
+        snapshots = SnapshotStore(store)
+        state, timestamp = await snapshots.load(vin)
+        if state:
+            await snapshots.save(vin, {**state, "lock_state": command.lock_state}, timestamp)
+    print(f"{command.label}: accepted ({request_id})")
+    return 0
+
+async def cmd_trips(store, session, args):
+    from service.config import Config
+    from service.telemetry_store import TelemetryStore
+
+    vin = await _default_vin(session, args)
+    telemetry = TelemetryStore(Config.TELEMETRY_PATH)
+    period = "week" if args.week else "day"
+    totals = telemetry.segment_totals(vin, time.time() - args.days * 86400, period=period)
+    if args.json:
+        print(json.dumps({"vin": vin, "period": period, "totals": totals}, indent=2 if sys.stdout.isatty() else None))
+        return 0
+    if not totals:
+        print(f"No trips or charging sessions recorded for {vin} in the last {args.days} days")
+        return 0
+    print(f"{'week of' if args.week else 'day':<12}{'trips':>6}{'distance':>10}{'kWh used':>10}{'per kWh':>9}{'charges':>9}{'kWh added':>11}")
+    for t in totals:
+        efficiency = f"{t['efficiency']:.2f}" if t["efficiency"] else "--"
+        print(f"{time.strftime('%a %m-%d', time.localtime(t['t'])):<12}{t['trips']:>6}{t['distance']:>10.1f}"
+              f"{t['energy_used']:>10.1f}{efficiency:>9}{t['charges']:>9}{t['energy_added']:>11.1f}")
+    return 0
+
+def _parse_date(value):
+    try:
+        return time.mktime(time.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a date as YYYY-MM-DD, got {value!r}")
+
+async def cmd_export(store, session, args):
+    from service.config import Config
+    from service.export import EXPORT_FIELDS, export_history
+    from service.telemetry_store import TelemetryStore
+
+    telemetry = TelemetryStore(Config.TELEMETRY_PATH)
+    vins = telemetry.vins() if args.all_vins else [await _default_vin(session, args)]
+    if not vins:
+        raise SystemExit("No telemetry recorded yet")
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "csv")
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+    if fields and not set(fields) <= set(EXPORT_FIELDS):
+        raise SystemExit(f"Unknown field(s); choose from: {', '.join(EXPORT_FIELDS)}")
+    # --to is inclusive of the whole day
+    end = args.to + 86400 - 1 if args.to is not None else None
+    loop = asyncio.get_running_loop()
+    count = await loop.run_in_executor(None, lambda: export_history(telemetry, vins, args.out, fmt, args.start, end, fields))
+    print(f"Exported {count} sample(s) from {len(vins)} vehicle(s) to {args.out}")
+    return 0
+
+def parse_args(argv=None):
+    from service.config import Config
+
+    parser = argparse.ArgumentParser(prog="logue", description="Query and control your vehicle from the command line")
+    parser.add_argument("--vin", help="Vehicle (default: the one selected in the app / daemon login)")
+    parser.add_argument("--store", default=Config.STORE_PATH, help="Path of the JSON store (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    status = sub.add_parser("status", help="Show the latest vehicle state")
+    status.add_argument("--json", action="store_true", help="Machine readable output")
+    status.add_argument("--fresh", action="store_true", help="Poll the vehicle instead of answering from cache")
+    status.add_argument("--climate", action="store_true", help="With --fresh, also fetch climate status")
+    status.set_defaults(handler=cmd_status)
+
+    for key, name in [("lock", "lock"), ("unlock", "unlock")]:
+        p = sub.add_parser(name, help=f"{name.capitalize()} the doors")
+        p.add_argument("--pin")
+        p.set_defaults(handler=cmd_remote, command_key=key)
+
+    climate = sub.add_parser("climate", help="Start or stop climate control")
+    climate_sub = climate.add_subparsers(dest="action", required=True)
+    start = climate_sub.add_parser("start")
+    start.add_argument("--temp", type=int, default=72, help="Target temperature in °F (default: %(default)s)")
+    start.add_argument("--pin")
+    start.set_defaults(handler=cmd_remote, command_key="climate_start")
+    stop = climate_sub.add_parser("stop")
+    stop.add_argument("--pin")
+    stop.set_defaults(handler=cmd_remote, command_key="climate_stop")
+
+    charge = sub.add_parser("charge-limit", help="Set the charge target (%%)")
+    charge.add_argument("level", type=int)
+    charge.set_defaults(handler=cmd_remote, command_key="charge_limit", pin=None)
+
+    trips = sub.add_parser("trips", help="Driving and charging totals per day or week")
+    trips.add_argument("--week", action="store_true", help="Group by week instead of day")
+    trips.add_argument("--days", type=int, default=14, help="How far back to look (default: %(default)s)")
+    trips.add_argument("--json", action="store_true", help="Machine readable output")
+    trips.set_defaults(handler=cmd_trips)
+
+    export = sub.add_parser("export", help="Export recorded telemetry history to CSV or Parquet")
+    export.add_argument("--out", required=True, help="File to write")
+    export.add_argument("--format", choices=["csv", "parquet"], help="Output format (default: from --out, else csv)")
+    export.add_argument("--from", dest="start", type=_parse_date, help="First day to include (YYYY-MM-DD)")
+    export.add_argument("--to", type=_parse_date, help="Last day to include (YYYY-MM-DD)")
+    export.add_argument("--fields", help="Comma-separated fields (default: all)")
+    export.add_argument("--all-vins", action="store_true", help="Every vehicle with recorded history")
+    export.set_defaults(handler=cmd_export)
+
+    return parser.parse_args(argv)
+
+async def _run(args):
+    from service.file_store import FileStore
+
+    store = FileStore(args.store)
+    session = CliSession(store)
+    try:
+        return await args.handler(store, session, args)
+    finally:
+        await session.auth_service.settings.flush()
+        await store.flush()
+
+def main(argv=None):
+    import logging
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    args = parse_args(argv)
+    try:
+        return asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        return 130
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
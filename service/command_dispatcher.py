@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from service.commands import get_command
+from service.config import Config
+from service.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Commands that undo each other
+CONFLICTS = {
+    "lock": "unlock",
+    "unlock": "lock",
+    "climate_start": "climate_stop",
+    "climate_stop": "climate_start",
+}
+
+class CommandRejected(Exception):
+    """A command was refused locally and never sent to the vehicle."""
+    pass
+
+def command_key(vin, command, params=None):
+    """Identity of a command for dedup: (VIN, command, parameters). The PIN is not part of it."""
+    return (vin, command, tuple(sorted((params or {}).items())))
+
+class CommandDispatcher:
+    """
+    Sends remote commands so that each distinct (VIN, command, params) is only
+    in flight once.
+
+    - A duplicate of an in-flight command (double tap, second LOCK press while
+      the first is still sending) joins the first one and gets its result.
+    - A contradictory command while the other is still in flight waits for it:
+      it is sent if that one fails, and rejected like below if it is accepted.
+    - A contradictory command within COMMAND_CONFLICT_WINDOW seconds of the
+      other being accepted is rejected with CommandRejected.
+
+    One dispatcher is shared per account so the dashboard and bulk commands
+    see each other's in-flight work.
+    """
+    _accounts = {}
+    _accounts_lock = threading.Lock()
+
+    @classmethod
+    def for_account(cls, auth_service):
+        with cls._accounts_lock:
+            dispatcher = cls._accounts.get(auth_service.hidas_ident)
+            if dispatcher is None:
+                dispatcher = cls(auth_service)
+                cls._accounts[auth_service.hidas_ident] = dispatcher
+            return dispatcher
+
+    @classmethod
+    def forget(cls, account):
+        """Drop an account's dispatcher (on logout) and release its worker threads."""
+        with cls._accounts_lock:
+            dispatcher = cls._accounts.pop(account, None)
+        if dispatcher is not None:
+            # Commands already submitted still finish (or fail unauthenticated)
+            dispatcher._executor.shutdown(wait=False)
+
+    def __init__(self, auth_service, conflict_window=None, rate_limiter=None, max_workers=None):
+        self.auth_service = auth_service
+        self.conflict_window = Config.COMMAND_CONFLICT_WINDOW if conflict_window is None else conflict_window
+        self.rate_limiter = rate_limiter or RateLimiter.for_account(auth_service.hidas_ident)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or Config.FLEET_REFRESH_CONCURRENCY, thread_name_prefix="logue-cmd")
+        self._in_flight = {} # command_key -> Future
+        self._accepted = {} # (vin, command) -> time accepted
+        self._lock = threading.Lock()
+
+    def submit(self, vin, command, pin=None, params=None):
+        """
+        Start (or join) a command. Returns (future, joined) where the future
+        resolves to the cigServiceRequestId and `joined` is True if an identical
+        command was already in flight. Raises CommandRejected for conflicts.
+        """
+        cmd = get_command(command)
+        key = command_key(vin, cmd.key, params)
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                logger.info(f"{cmd.label} for {vin} already in flight, joining it")
+                return existing, True
+
+            opposite = CONFLICTS.get(cmd.key)
+            blocker = None
+            if opposite:
+                accepted_at = self._accepted.get((vin, opposite))
+                if accepted_at and time.monotonic() - accepted_at < self.conflict_window:
+                    raise CommandRejected(f"{get_command(opposite).label} was just sent; try again in a few seconds")
+                blocker = next((f for k, f in self._in_flight.items() if k[0] == vin and k[1] == opposite), None)
+
+            future = Future()
+            self._in_flight[key] = future
+
+        try:
+            self._executor.submit(self._run, key, cmd, vin, pin, params or {}, future, blocker)
+        except RuntimeError:
+            # Forgotten (logged out) while a view still held on to it
+            with self._lock:
+                del self._in_flight[key]
+            raise CommandRejected("Logged out")
+        return future, False
+
+    async def dispatch(self, vin, command, pin=None, params=None):
+        """Async submit(); returns (request_id, joined)."""
+        future, joined = self.submit(vin, command, pin, params)
+        return await asyncio.wrap_future(future), joined
+
+    def _run(self, key, cmd, vin, pin, params, future, blocker):
+        try:
+            if blocker is not None:
+                # Queued behind its opposite; if that one went through, this
+                # is the same contradiction submit() rejects
+                logger.info(f"{cmd.label} for {vin} queued behind in-flight opposite")
+                try:
+                    blocker.result()
+                except Exception:
+                    pass
+                else:
+                    opposite = CONFLICTS[cmd.key]
+                    with self._lock:
+                        accepted_at = self._accepted.get((vin, opposite))
+                    if accepted_at and time.monotonic() - accepted_at < self.conflict_window:
+                        raise CommandRejected(f"{get_command(opposite).label} was just sent; try again in a few seconds")
+            if not self.auth_service.access_token:
+                raise Exception("Not authenticated")
+            self.rate_limiter.acquire()
+            request_id = cmd.send(self.auth_service.access_token, vin, pin, params)
+            with self._lock:
+                self._accepted[(vin, cmd.key)] = time.monotonic()
+                self._accepted.pop((vin, CONFLICTS.get(cmd.key)), None)
+            future.set_result(request_id)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
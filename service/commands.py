@@ -0,0 +1,42 @@
+from service.api import HondaApi
+
+class RemoteCommand:
+    """A remote command the app can send to a vehicle."""
+    def __init__(self, key, label, send, requires_pin=True, lock_state=None):
+        self.key = key
+        self.label = label
+        self._send = send
+        self.requires_pin = requires_pin
+        # Lock state implied once the command has been accepted
+        self.lock_state = lock_state
+
+    def send(self, access_token, vin, pin, params=None):
+        """Send the command; returns the cigServiceRequestId. Blocking."""
+        return self._send(access_token, vin, pin, params or {})
+
+COMMANDS = {c.key: c for c in [
+    RemoteCommand("lock", "Lock Doors",
+                  lambda token, vin, pin, p: HondaApi.request_door_lock(token, vin, pin, "alk"),
+                  lock_state="locked"),
+    RemoteCommand("unlock", "Unlock Doors",
+                  lambda token, vin, pin, p: HondaApi.request_door_lock(token, vin, pin, "dulk"),
+                  lock_state="unlocked"),
+    RemoteCommand("lights", "Flash Lights",
+                  lambda token, vin, pin, p: HondaApi.request_light_horn(token, vin, pin, "lgt")),
+    RemoteCommand("horn", "Sound Horn",
+                  lambda token, vin, pin, p: HondaApi.request_light_horn(token, vin, pin, "hrn")),
+    # Temperatures are always sent in °F
+    RemoteCommand("climate_start", "Start Climate",
+                  lambda token, vin, pin, p: HondaApi.request_start_climate(token, vin, pin, int(p.get("temperature", 72)))),
+    RemoteCommand("climate_stop", "Stop Climate",
+                  lambda token, vin, pin, p: HondaApi.request_stop_climate(token, vin, pin, 72)), # Dummy temp
+    RemoteCommand("charge_limit", "Set Charge Limit",
+                  lambda token, vin, pin, p: HondaApi.request_set_charge_target(token, vin, pin, int(p["level"])),
+                  requires_pin=False),
+]}
+
+def get_command(key):
+    command = COMMANDS.get(key)
+    if command is None:
+        raise Exception(f"Unknown command: {key}")
+    return command
@@ -1,16 +1,113 @@
 import os
-from dotenv import load_dotenv
-from service.secret_manager import ensure_secrets
+import threading
 
-# Ensure secrets exist before loading
-ensure_secrets()
-load_dotenv()
+# .env is read (and secrets created on first run) only when a setting that
+# comes from the environment is first used, not at import time
+_env_lock = threading.RLock()
+_env_loaded = False
+_secrets_loaded = False
 
-class Config:
+def load_env():
+    """Load .env into the process environment, once."""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+def load_secrets():
+    """Create missing secrets in .env (first run only), then load it, once."""
+    global _secrets_loaded
+    with _env_lock:
+        if not _secrets_loaded:
+            from service.startup_trace import startup_trace
+            with startup_trace.span("ensure_secrets"):
+                from service.secret_manager import ensure_secrets
+                ensure_secrets()
+            _secrets_loaded = True
+        load_env()
+
+def _flag(value):
+    return value == "1"
+
+# Settings resolved from the environment on first access:
+# name -> (env var, default, type, needs secrets bootstrapped)
+_ENV_SETTINGS = {
+    # Honda Identity Service (HIDAS) client credentials
+    "CLIENT_ID": ("HONDA_CLIENT_ID", "AcuraEVAndroidAppPrOd0083", str, True),
+    "CLIENT_SECRET": ("HONDA_CLIENT_SECRET", "", str, True),
+    # Fernet key for credentials at rest
+    "ENCRYPTION_KEY": ("ENCRYPTION_KEY", None, str, True),
+
+    # Open connections to the Honda endpoints while the app starts (0 = off)
+    "PREWARM": ("LOGUE_PREWARM", "1", _flag, False),
+
+    # Number of vehicles whose MQTT sessions are kept warm for fast switching
+    "SESSION_POOL_SIZE": ("LOGUE_SESSION_POOL_SIZE", "3", int, False),
+    # Drive all MQTT sessions from one shared network thread (0 = thread per client)
+    "MQTT_MULTIPLEX": ("LOGUE_MQTT_MULTIPLEX", "1", _flag, False),
+
+    # Bulk operations across vehicles: worker count and per-account API budget
+    "FLEET_REFRESH_CONCURRENCY": ("LOGUE_FLEET_CONCURRENCY", "8", int, False),
+    "API_RATE_LIMIT_PER_SEC": ("LOGUE_API_RATE_LIMIT", "5", float, False),
+    "API_RATE_BURST": ("LOGUE_API_RATE_BURST", "5", int, False),
+
+    # Seconds after an accepted command during which its opposite (lock vs unlock,
+    # climate start vs stop) is rejected
+    "COMMAND_CONFLICT_WINDOW": ("LOGUE_COMMAND_CONFLICT_WINDOW", "20", float, False),
+
+    # Offline command outbox: seconds between drain attempts and sends per command
+    "OUTBOX_RETRY_INTERVAL": ("LOGUE_OUTBOX_RETRY_INTERVAL", "15", float, False),
+    "OUTBOX_MAX_ATTEMPTS": ("LOGUE_OUTBOX_MAX_ATTEMPTS", "5", int, False),
+
+    # Headless daemon (python -m service.daemon): file-backed store and refresh cadence.
+    # Active = charging or recently driven; idle vehicles are left asleep longer.
+    "STORE_PATH": ("LOGUE_STORE_PATH", os.path.join(os.path.expanduser("~"), ".logue", "store.json"), str, False),
+    "DAEMON_ACTIVE_INTERVAL": ("LOGUE_DAEMON_ACTIVE_INTERVAL", "300", int, False),
+    "DAEMON_IDLE_INTERVAL": ("LOGUE_DAEMON_IDLE_INTERVAL", "1800", int, False),
+    "DAEMON_MAX_BACKOFF": ("LOGUE_DAEMON_MAX_BACKOFF", "3600", int, False),
+    # Local read-only HTTP/SSE state endpoint (service/state_server.py); port 0
+    # leaves it off. Set a token before binding to anything but localhost.
+    "STATE_SERVER_HOST": ("LOGUE_STATE_SERVER_HOST", "127.0.0.1", str, False),
+    "STATE_SERVER_PORT": ("LOGUE_STATE_SERVER_PORT", "0", int, False),
+    "STATE_SERVER_TOKEN": ("LOGUE_STATE_SERVER_TOKEN", None, str, False),
+    # Web origin (e.g. http://homeassistant.local:8123) allowed to read it from a browser
+    "STATE_SERVER_ORIGIN": ("LOGUE_STATE_SERVER_ORIGIN", None, str, False),
+
+    # Telemetry history (SQLite). Flet sets FLET_APP_STORAGE_DATA to the app's
+    # private data directory on mobile.
+    "TELEMETRY_PATH": ("LOGUE_TELEMETRY_PATH", os.path.join(
+        os.getenv("FLET_APP_STORAGE_DATA") or os.path.join(os.path.expanduser("~"), ".logue"), "telemetry.db"
+    ), str, False),
+    "TELEMETRY_RETENTION_DAYS": ("LOGUE_TELEMETRY_RETENTION_DAYS", "365", int, False),
+    # Where CSV / Parquet exports started from the app are written
+    "EXPORT_DIR": ("LOGUE_EXPORT_DIR", os.path.join(
+        os.getenv("FLET_APP_STORAGE_DATA") or os.path.join(os.path.expanduser("~"), ".logue"), "exports"
+    ), str, False),
+    # Battery capacity used for kWh and ETA estimates (Prologue: 85 kWh)
+    "BATTERY_CAPACITY_KWH": ("LOGUE_BATTERY_KWH", "85", float, False),
+}
+
+class _LazyConfig(type):
+    def __getattr__(cls, name):
+        # Only called for attributes not set yet, i.e. unresolved env settings
+        setting = _ENV_SETTINGS.get(name)
+        if setting is None:
+            raise AttributeError(f"Config has no setting {name}")
+        env_var, default, cast, secret = setting
+        if secret:
+            load_secrets()
+        else:
+            load_env()
+        value = os.getenv(env_var, default)
+        value = cast(value) if value is not None else None
+        setattr(cls, name, value)
+        return value
+
+class Config(metaclass=_LazyConfig):
     # Honda Identity Service (HIDAS)
     IDENTITY_HOST = "https://identity.services.honda.com"
-    CLIENT_ID = os.getenv("HONDA_CLIENT_ID", "AcuraEVAndroidAppPrOd0083")
-    CLIENT_SECRET = os.getenv("HONDA_CLIENT_SECRET", "")
 
     # Honda Web Services
     WSC_HOST = "https://wsc.hondaweb.com"
@@ -19,6 +116,9 @@ class Config:
     MQTT_HOST = "am7ptks1rwalc-ats.iot.us-east-2.amazonaws.com"
     MQTT_AUTHORIZER_NAME = "CPSD-IOT-CustAuthorizer-prod"
 
+    # Accounts with more vehicles than this get the fleet overview instead of a dropdown
+    FLEET_DROPDOWN_LIMIT = 10
+
     # Common headers
     COMMON_HEADERS = {
         "hondaHeaderType.country_code": "US",
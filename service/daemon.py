@@ -0,0 +1,257 @@
+"""
+Headless telemetry daemon: keeps MQTT sessions open for one or more vehicles,
+refreshes them on an adaptive schedule and stores decoded state locally.
+No Flet import, so it runs on a small always-on Linux box.
+
+    python -m service.daemon --login          # store credentials once
+    python -m service.daemon [--vin VIN ...]  # run until SIGINT/SIGTERM
+    python -m service.daemon --serve 8765     # also serve state on http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import getpass
+import logging
+import os
+import signal
+import sys
+import time
+
+from service.auth import AuthService
+from service.config import Config
+from service.file_store import FileStore
+from service.fleet_refresh import FleetRefresher
+from service.session_pool import MqttSessionPool
+from service.snapshot_store import SnapshotStore
+from service.state_cache import VehicleStateCache
+from service.telemetry_store import TelemetryStore
+from service.segments import SegmentEngine
+from service.alerts import AlertEngine, rules_from_settings
+from service.state_server import StateServer
+from service.vehicle_state import is_charging
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a vehicle's DASHBOARD_ASYNC answer per refresh
+REFRESH_WAIT = 45
+
+class RefreshSchedule:
+    """
+    When to next ask each vehicle for a dashboard update.
+
+    Charging or recently driven vehicles (odometer moved) are polled every
+    DAEMON_ACTIVE_INTERVAL; parked ones every DAEMON_IDLE_INTERVAL so the car
+    isn't kept awake. Failures back off exponentially up to DAEMON_MAX_BACKOFF.
+    Unsolicited MQTT updates that show activity pull the next refresh forward.
+    """
+    def __init__(self, vins, active=None, idle=None, max_backoff=None):
+        self.active = active or Config.DAEMON_ACTIVE_INTERVAL
+        self.idle = idle or Config.DAEMON_IDLE_INTERVAL
+        self.max_backoff = max_backoff or Config.DAEMON_MAX_BACKOFF
+        now = time.monotonic()
+        self.next_due = {vin: now for vin in vins}
+        self.failures = {vin: 0 for vin in vins}
+        self._odometer = {}
+        self._last_activity = {}
+
+    def due(self, now=None):
+        now = now or time.monotonic()
+        return [vin for vin, t in self.next_due.items() if t <= now]
+
+    def seconds_until_next(self, now=None):
+        now = now or time.monotonic()
+        return max(0.0, min(self.next_due.values()) - now) if self.next_due else self.idle
+
+    def _note(self, vin, state):
+        """Track odometer movement; returns True if the vehicle looks active."""
+        if not state:
+            return False
+        now = time.monotonic()
+        odometer = state.get("odometer")
+        if odometer is not None:
+            if self._odometer.get(vin) not in (None, odometer):
+                self._last_activity[vin] = now
+            self._odometer[vin] = odometer
+        if is_charging(state):
+            self._last_activity[vin] = now
+        # Stay on the active cadence for a while after the last movement
+        return now - self._last_activity.get(vin, float("-inf")) < self.idle
+
+    def record(self, vin, ok, state=None):
+        """Schedule the next refresh after one completed."""
+        if not ok:
+            self.failures[vin] += 1
+            delay = min(self.active * (2 ** self.failures[vin]), self.max_backoff)
+        else:
+            self.failures[vin] = 0
+            delay = self.active if self._note(vin, state) else self.idle
+        self.next_due[vin] = time.monotonic() + delay
+        return delay
+
+    def observe(self, vin, state):
+        """A state update arrived on its own (e.g. the car woke up)."""
+        if vin in self.next_due and self._note(vin, state):
+            self.next_due[vin] = min(self.next_due[vin], time.monotonic() + self.active)
+
+class TelemetryDaemon:
+    def __init__(self, store, vins=None, serve_port=None):
+        self.store = store
+        self.requested_vins = vins or []
+        self.auth_service = AuthService(None, store)
+        self.state_cache = VehicleStateCache()
+        self.snapshots = SnapshotStore(store)
+        self.telemetry = TelemetryStore(Config.TELEMETRY_PATH, Config.TELEMETRY_RETENTION_DAYS)
+        self.segments = SegmentEngine(self.telemetry)
+        self.alerts = AlertEngine()
+        # Local consumers (dashboards, scripts) read state from here instead of the API
+        self.serve_port = Config.STATE_SERVER_PORT if serve_port is None else serve_port
+        self.state_server = None
+        self.session_pool = None
+        self.schedule = None
+        self.stopping = asyncio.Event()
+        self.credentials = None
+
+    async def login(self):
+        loop = asyncio.get_running_loop()
+        username, password, vin, _ = self.credentials
+        success, message = await loop.run_in_executor(None, self.auth_service.login, username, password, vin)
+        if not success:
+            raise Exception(f"Login failed: {message}")
+        logger.info(f"Logged in, {len(self.auth_service.vehicles)} vehicle(s) on account")
+
+    def on_state_update(self, vin, state, changed, timestamp):
+        # Called on the MQTT network thread
+        if self.schedule:
+            self.loop.call_soon_threadsafe(self.schedule.observe, vin, state)
+        asyncio.run_coroutine_threadsafe(self.snapshots.save(vin, state, timestamp), self.loop)
+
+    def on_alert(self, vin, alert, active):
+        if active:
+            logger.warning(f"{vin} alert: {alert['message']}")
+        else:
+            logger.info(f"{vin} alert cleared: {alert['label']}")
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.credentials = await self.auth_service.load_credentials()
+        if not (self.credentials[0] and self.credentials[1]):
+            raise Exception("No stored credentials; run with --login first")
+        await self.login()
+
+        account_vins = [v.get("VIN") for v in self.auth_service.vehicles]
+        vins = [v for v in self.requested_vins if v in account_vins] if self.requested_vins else account_vins
+        if not vins:
+            raise Exception("None of the requested VINs are on this account")
+
+        self.session_pool = MqttSessionPool(self.auth_service, self.state_cache, max_size=len(vins))
+        self.schedule = RefreshSchedule(vins)
+        refresher = FleetRefresher(self.auth_service, self.session_pool)
+        unsubscribe = self.state_cache.subscribe(self.on_state_update)
+        detach_telemetry = self.telemetry.attach(self.state_cache)
+        detach_segments = self.segments.attach(self.state_cache)
+        self.alerts.set_rules(rules_from_settings(self.auth_service.settings.get("alert_rules")))
+        detach_alerts = self.alerts.attach(self.state_cache)
+        unsubscribe_alerts = self.alerts.subscribe(self.on_alert)
+        if self.serve_port:
+            self.state_server = StateServer(
+                self.state_cache, Config.STATE_SERVER_HOST, self.serve_port,
+                Config.STATE_SERVER_TOKEN, Config.STATE_SERVER_ORIGIN
+            )
+            await self.state_server.start()
+        logger.info(f"Daemon watching {len(vins)} vehicle(s)")
+
+        try:
+            while not self.stopping.is_set():
+                due = self.schedule.due()
+                if due:
+                    unauthorized = False
+                    async for result in refresher.refresh_async(due, include_climate=True, wait_timeout=REFRESH_WAIT):
+                        delay = self.schedule.record(result.vin, result.ok, result.state)
+                        if result.ok:
+                            logger.info(f"{result.vin} refreshed in {result.elapsed:.1f}s, next in {delay}s")
+                        else:
+                            logger.warning(f"{result.vin} refresh failed ({result.error}), retry in {delay}s")
+                            unauthorized = unauthorized or result.status == 401
+                    if unauthorized:
+                        # Access token expired; sessions hold stale CIG tokens too
+                        try:
+                            await self.login()
+                            self.session_pool.close_all()
+                        except Exception as e:
+                            logger.error(f"Re-login failed: {e}")
+                self.alerts.tick()
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=min(self.schedule.seconds_until_next(), 60))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            unsubscribe()
+            detach_telemetry()
+            detach_segments()
+            detach_alerts()
+            unsubscribe_alerts()
+            if self.state_server:
+                await self.state_server.stop()
+            self.segments.flush()
+            await self.loop.run_in_executor(None, self.session_pool.close_all)
+            await self.loop.run_in_executor(None, self.telemetry.close)
+            await self.store.flush()
+            logger.info("Daemon stopped")
+
+    def stop(self):
+        self.stopping.set()
+
+async def store_credentials(store):
+    """Interactive --login: verify credentials and save them (encrypted) to the store."""
+    auth_service = AuthService(None, store)
+    username = input("HondaLink username: ").strip()
+    password = getpass.getpass("Password: ")
+    pin = getpass.getpass("Vehicle PIN (optional): ") or None
+    loop = asyncio.get_running_loop()
+    success, message = await loop.run_in_executor(None, auth_service.login, username, password, None)
+    if not success:
+        print(f"Login failed: {message}")
+        return 1
+    await auth_service.save_credentials(username, password, auth_service.selected_vin, pin)
+    await auth_service.settings.flush()
+    await store.flush()
+    for v in auth_service.vehicles:
+        print(f"  {v.get('VIN')}  {v.get('ModelYear')} {v.get('DivisionName')} {v.get('ModelCode')}")
+    print(f"Credentials saved to {store.path}")
+    return 0
+
+async def main(args):
+    store = FileStore(args.store)
+    if args.login:
+        return await store_credentials(store)
+
+    daemon = TelemetryDaemon(store, args.vin, args.serve)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except NotImplementedError:
+            pass # Windows
+    try:
+        await daemon.run()
+    except Exception as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m service.daemon", description="Headless Logue telemetry daemon")
+    parser.add_argument("--vin", action="append", help="Vehicle to watch (repeatable, default: all on the account)")
+    parser.add_argument("--store", default=Config.STORE_PATH, help="Path of the JSON store (default: %(default)s)")
+    parser.add_argument("--login", action="store_true", help="Prompt for HondaLink credentials and save them")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve vehicle state over local HTTP/SSE on this port (default: LOGUE_STATE_SERVER_PORT, 0 = off)")
+    parser.add_argument("--log-level", default=os.getenv("LOGUE_LOG_LEVEL", "INFO"))
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    sys.exit(asyncio.run(main(args)))
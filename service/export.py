@@ -0,0 +1,126 @@
+"""
+Streaming export of telemetry history to CSV or (with pyarrow installed)
+Parquet. Samples are read from the telemetry store and written CHUNK_SIZE
+rows at a time, so memory stays flat however much history there is.
+"""
+import csv
+import os
+import time
+import logging
+from service.vehicle_state import TIRE_POSITIONS
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered between writes (one Parquet row group each)
+CHUNK_SIZE = 5000
+
+# Exported columns in order, and which of them are numeric
+EXPORT_FIELDS = [
+    "soc", "range", "charge_status", "plug_status", "charge_mode", "charger_power_level",
+    "charge_mode_type", "target_level", "ac_voltage", "ac_amperage",
+    "eta_day", "eta_hour", "eta_minute", "odometer", "odometer_unit", "climate", "lock_state",
+] + [f"tire_{pos}" for pos in TIRE_POSITIONS]
+NUMERIC_FIELDS = {"soc", "range", "target_level", "ac_voltage", "ac_amperage", "odometer"} | {f"tire_{pos}" for pos in TIRE_POSITIONS}
+
+FORMATS = ("csv", "parquet")
+
+def parquet_available():
+    try:
+        import pyarrow # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _rows(telemetry, vins, start, end, fields):
+    for vin in vins:
+        for ts, state in telemetry.iter_history(vin, start, end, fields):
+            yield vin, ts, state
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _write_csv(path, chunks, fields):
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["vin", "timestamp", "time"] + fields)
+        for chunk in chunks:
+            writer.writerows(
+                [vin, ts, time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(ts))] + [state.get(field, "") for field in fields]
+                for vin, ts, state in chunk
+            )
+            count += len(chunk)
+    return count
+
+def _write_parquet(path, chunks, fields):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def column_type(field):
+        return pa.float64() if field in NUMERIC_FIELDS else pa.string()
+
+    def cell(field, value):
+        if value is None:
+            return None
+        if field in NUMERIC_FIELDS:
+            return float(value) if isinstance(value, (int, float)) else None
+        return str(value)
+
+    schema = pa.schema(
+        [("vin", pa.string()), ("timestamp", pa.timestamp("s", tz="UTC"))]
+        + [(field, column_type(field)) for field in fields]
+    )
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            columns = {"vin": [row[0] for row in chunk], "timestamp": [row[1] for row in chunk]}
+            for field in fields:
+                columns[field] = [cell(field, row[2].get(field)) for row in chunk]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            count += len(chunk)
+    return count
+
+def export_history(telemetry, vins, path, fmt="csv", start=None, end=None, fields=None, chunk_size=CHUNK_SIZE):
+    """
+    Write the decoded history of `vins` between start and end (unix
+    seconds) to `path`, one row per sample and one column per field.
+    Blocking; returns the number of rows written. The file is written
+    under a temporary name and only moved into place when complete.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    if fmt == "parquet" and not parquet_available():
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    fields = list(fields or EXPORT_FIELDS)
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    telemetry.flush(timeout=10) # Include samples still queued for writing
+    chunks = _chunks(_rows(telemetry, vins, start, end, fields), chunk_size)
+    try:
+        write = _write_parquet if fmt == "parquet" else _write_csv
+        count = write(tmp_path, chunks, fields)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Exported {count} sample(s) to {path}")
+    return count
+
+def default_export_path(export_dir, vins, fmt):
+    name = vins[0] if len(vins) == 1 else "fleet"
+    return os.path.join(export_dir, f"logue-{name}-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}")
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FileStore:
+    """
+    JSON file with the same async get/set/remove interface as Flet's
+    page.shared_preferences, for running without a UI.
+
+    Values live in memory; writes are coalesced and flushed to disk
+    `flush_delay` seconds after the last change (atomically, via a temp
+    file), so frequent snapshot saves don't rewrite the file every time.
+    Call flush() before exiting.
+    """
+    def __init__(self, path, flush_delay=2.0):
+        self.path = os.path.expanduser(path)
+        self.flush_delay = flush_delay
+        self._data = {}
+        self._loaded = False
+        self._flush_handle = None
+
+    def load(self):
+        if self._loaded:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            self._data = {}
+        except Exception as e:
+            logger.error(f"Failed to read {self.path}: {e}")
+            self._data = {}
+        self._loaded = True
+
+    async def get(self, key):
+        self.load()
+        return self._data.get(key)
+
+    async def contains_key(self, key):
+        self.load()
+        return key in self._data
+
+    async def set(self, key, value):
+        self.load()
+        self._data[key] = value
+        self._schedule_flush()
+        return True
+
+    async def remove(self, key):
+        self.load()
+        if self._data.pop(key, None) is not None:
+            self._schedule_flush()
+        return True
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._write)
+
+    async def flush(self):
+        self._write()
+
+    def _write(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._loaded:
+            return
+        directory = os.path.dirname(self.path)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Holds (encrypted) credentials, so keep it private
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Failed to write {self.path}: {e}")
@@ -0,0 +1,62 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shortest VIN fragment that is indexed for substring search
+MIN_VIN_FRAGMENT = 3
+
+def vehicle_display_name(v):
+    return f"{v.get('ModelYear')} {v.get('DivisionName')} {v.get('ModelCode')}"
+
+def vehicle_nickname(v):
+    return v.get("NickName") or v.get("VehicleNickName") or ""
+
+def _tokens(text):
+    return [t for t in re.split(r"[^0-9a-z]+", text.lower()) if t]
+
+class FleetIndex:
+    """
+    In-memory search index over an account's vehicles.
+
+    Model/nickname words are indexed by prefix and VINs by substring (so the
+    last few digits of a VIN find it), giving set-intersection lookups that
+    stay fast for fleets with hundreds of vehicles.
+    """
+    def __init__(self, vehicles):
+        self.vehicles = list(vehicles)
+        self.vins = [v.get("VIN") for v in self.vehicles]
+        self._by_vin = {v.get("VIN"): v for v in self.vehicles}
+        self._postings = {}
+
+        for pos, v in enumerate(self.vehicles):
+            keys = set()
+            for token in _tokens(f"{vehicle_display_name(v)} {vehicle_nickname(v)}"):
+                for i in range(1, len(token) + 1):
+                    keys.add(token[:i])
+            vin = (v.get("VIN") or "").lower()
+            for start in range(len(vin)):
+                for end in range(start + MIN_VIN_FRAGMENT, len(vin) + 1):
+                    keys.add(vin[start:end])
+            for key in keys:
+                self._postings.setdefault(key, set()).add(pos)
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def get(self, vin):
+        return self._by_vin.get(vin)
+
+    def search(self, query):
+        """Return VINs matching every term of the query, in account order."""
+        terms = _tokens(query or "")
+        if not terms:
+            return list(self.vins)
+
+        matches = None
+        for term in terms:
+            hits = self._postings.get(term, set())
+            matches = hits if matches is None else matches & hits
+            if not matches:
+                return []
+        return [self.vins[pos] for pos in sorted(matches)]
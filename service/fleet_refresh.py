@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from service.api import HondaApi
+from service.config import Config
+from service.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+class RefreshResult:
+    """Outcome of refreshing one vehicle."""
+    def __init__(self, vin, ok, error=None, climate=None, state=None, elapsed=0.0, status=None):
+        self.vin = vin
+        self.ok = ok
+        self.error = error
+        self.status = status # HTTP status of the failed API call, if it got a response
+        self.climate = climate # getClimateStatus response
+        self.state = state # Decoded dashboard state, if it arrived in time
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"RefreshResult({self.vin}, ok={self.ok}, error={self.error!r}, elapsed={self.elapsed:.1f}s)"
+
+class FleetRefresher:
+    """
+    Fans request_dashboard + get_climate_status out across many VINs.
+
+    Work runs on a bounded thread pool, every API call goes through the
+    account's shared RateLimiter, and results are yielded as each vehicle
+    finishes, so refreshing a fleet takes about as long as the slowest
+    vehicle rather than the sum of all of them.
+
+    If a session pool is given, each VIN gets a subscribed MQTT session
+    first so the DASHBOARD_ASYNC answer lands in the pool's state cache;
+    with wait_timeout > 0 a vehicle only completes once that answer arrives.
+    With release_sessions, each VIN's session is closed again as soon as it
+    is done, so at most max_concurrency sessions are open at once.
+    """
+    def __init__(self, auth_service, session_pool=None, max_concurrency=None, rate_limiter=None, release_sessions=False):
+        self.auth_service = auth_service
+        self.session_pool = session_pool
+        self.release_sessions = release_sessions
+        self.max_concurrency = max(1, max_concurrency or Config.FLEET_REFRESH_CONCURRENCY)
+        self.rate_limiter = rate_limiter or RateLimiter.for_account(auth_service.hidas_ident)
+
+    def refresh(self, vins, include_climate=True, wait_timeout=0):
+        """Blocking generator of RefreshResult, in completion order."""
+        vins = list(dict.fromkeys(v for v in vins if v))
+        if not vins:
+            return
+
+        waiters = {vin: threading.Event() for vin in vins}
+        unsubscribe = None
+        if self.session_pool and wait_timeout > 0:
+            def on_state(vin, state, changed, timestamp):
+                event = waiters.get(vin)
+                if event:
+                    event.set()
+            unsubscribe = self.session_pool.state_cache.subscribe(on_state)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(vins)), thread_name_prefix="logue-refresh") as executor:
+                futures = [
+                    executor.submit(self._refresh_one, vin, include_climate, waiters[vin], wait_timeout)
+                    for vin in vins
+                ]
+                for future in as_completed(futures):
+                    yield future.result()
+        finally:
+            if unsubscribe:
+                unsubscribe()
+
+    async def refresh_async(self, vins, include_climate=True, wait_timeout=0):
+        """Async generator wrapper around refresh() for use on the UI loop."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for result in self.refresh(vins, include_climate, wait_timeout):
+                    loop.call_soon_threadsafe(queue.put_nowait, result)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await producer
+
+    def _refresh_one(self, vin, include_climate, arrived, wait_timeout):
+        started = time.monotonic()
+        climate = None
+        try:
+            if self.session_pool:
+                if not self.session_pool.is_warm(vin):
+                    self.rate_limiter.acquire() # CIG token fetch
+                self.session_pool.acquire(vin)
+
+            arrived.clear()
+            self.rate_limiter.acquire()
+            HondaApi.request_dashboard(self.auth_service.access_token, vin)
+
+            if include_climate:
+                self.rate_limiter.acquire()
+                try:
+                    climate = HondaApi.get_climate_status(self.auth_service.access_token, vin)
+                except Exception as e:
+                    logger.warning(f"Climate status failed for {vin}: {e}")
+
+            state = None
+            if self.session_pool and wait_timeout > 0:
+                remaining = wait_timeout - (time.monotonic() - started)
+                if not arrived.wait(timeout=max(0, remaining)):
+                    return RefreshResult(vin, False, "Timed out waiting for vehicle", climate, elapsed=time.monotonic() - started)
+            if self.session_pool and climate and climate.get("climateStatus"):
+                self.session_pool.state_cache.patch(vin, {"climate": climate["climateStatus"]})
+            if self.session_pool:
+                state, _ = self.session_pool.state_cache.get(vin)
+
+            return RefreshResult(vin, True, climate=climate, state=state, elapsed=time.monotonic() - started)
+        except Exception as e:
+            logger.error(f"Refresh failed for {vin}: {e}")
+            response = getattr(e, "response", None)
+            return RefreshResult(vin, False, str(e), climate, elapsed=time.monotonic() - started,
+                                 status=getattr(response, "status_code", None))
+        finally:
+            if self.session_pool and self.release_sessions:
+                self.session_pool.discard(vin)
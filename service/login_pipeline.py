@@ -0,0 +1,48 @@
+import threading
+import time
+import logging
+from service.startup_trace import startup_trace
+
+logger = logging.getLogger(__name__)
+
+class LoginPipeline:
+    """
+    Login that overlaps the slow steps instead of running them back to back.
+
+    As soon as the access token is known, the stored VIN's MQTT session
+    (CIG token, TLS/websocket connect, subscribe) and its first dashboard
+    request start on a side thread, while the login thread carries on with
+    vehicle discovery and the UI builds the dashboard. The dashboard then
+    finds the session warm (or joins the in-progress connect in the pool)
+    and sees that data has already been requested.
+    """
+    def __init__(self, auth_service, get_session_pool):
+        self.auth_service = auth_service
+        # Called on the side thread, so building the pool (paho import)
+        # stays off the UI loop as well
+        self.get_session_pool = get_session_pool
+        self.vin = None
+        self._thread = None
+
+    def login(self, username, password, vin=None):
+        """Blocking; same result as AuthService.login."""
+        self.vin = vin
+        return self.auth_service.login(username, password, vin=vin, on_token=self._on_token)
+
+    def _on_token(self):
+        if not self.vin:
+            return # No stored VIN to guess with; the dashboard connects as usual
+        self._thread = threading.Thread(target=self._warm, args=(self.vin,), name="logue-login-pipeline", daemon=True)
+        self._thread.start()
+
+    def _warm(self, vin):
+        from service.api import HondaApi
+        try:
+            with startup_trace.span("early_session"):
+                session = self.get_session_pool().acquire(vin)
+            with startup_trace.span("early_dashboard_request"):
+                HondaApi.request_dashboard(self.auth_service.access_token, vin)
+            session.dashboard_requested_at = time.time()
+        except Exception as e:
+            # Not fatal: the dashboard retries on its own
+            logger.warning(f"Early MQTT setup for {vin} failed: {e}")
@@ -9,8 +9,11 @@ from service.config import Config
 logger = logging.getLogger(__name__)
 
 class AwsMqttClient:
-    def __init__(self, vin, cig_token, cig_signature, on_message_callback):
+    def __init__(self, vin, cig_token, cig_signature, on_message_callback, engine=None):
         self.vin = vin
+        # Optional MqttEngine: when set, network I/O runs on the engine's
+        # shared thread instead of a per-client loop_start() thread
+        self.engine = engine
         self.cig_token = cig_token
         self.cig_signature = cig_signature
         self.on_message_callback = on_message_callback
@@ -47,15 +50,20 @@ class AwsMqttClient:
             # Config.MQTT_HOST is the endpoint
             logger.info(f"Connecting to {Config.MQTT_HOST}...")
             self.client.connect(Config.MQTT_HOST, 443, 60)
-            self.client.loop_start()
+            if self.engine:
+                self.engine.register(self.client)
+            else:
+                self.client.loop_start()
             
             # Wait for connection
             if not self.connected_event.wait(timeout=15):
-                self.client.loop_stop()
+                # disconnect() closes paho's socket too, so retries don't leak descriptors
+                self.disconnect()
                 raise Exception("AWS IoT MQTT connection timed out")
                 
             if self.connection_error:
-                 raise Exception(self.connection_error)
+                self.disconnect()
+                raise Exception(self.connection_error)
                  
             return True
         except Exception as e:
@@ -63,8 +71,13 @@ class AwsMqttClient:
             raise e
 
     def disconnect(self):
-        self.client.loop_stop()
-        self.client.disconnect()
+        if self.engine:
+            # Queue DISCONNECT first so the engine flushes it before dropping us
+            self.client.disconnect()
+            self.engine.unregister(self.client)
+        else:
+            self.client.loop_stop()
+            self.client.disconnect()
 
     def subscribe(self, topic):
         logger.debug(f"Subscribing to {topic}")
@@ -0,0 +1,181 @@
+import selectors
+import socket
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MqttEngine:
+    """
+    Drives many paho MQTT clients from a single network thread.
+
+    Instead of every AwsMqttClient calling loop_start() (one thread per
+    vehicle), clients are registered here after connect() and the engine
+    multiplexes their sockets with a selector, calling paho's external-loop
+    API (loop_read / loop_write / loop_misc). Each client keeps its own CIG
+    authorizer headers and callbacks; only the I/O thread is shared.
+    """
+    # How often keepalive/timeout housekeeping (loop_misc) runs
+    MISC_INTERVAL = 1.0
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Process-wide engine used by the session pool and the daemon."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._clients = set()
+        self._registered = {} # paho client -> socket currently registered
+        self._closing = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        # Self-pipe so other threads can interrupt select()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="logue-mqtt-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def register(self, client):
+        """Start driving a connected (or connecting) paho client."""
+        # Queued packets (e.g. subscribe() from the UI thread) wake the loop
+        client.on_socket_register_write = lambda c, userdata, sock: self.wake()
+        with self._lock:
+            self._clients.add(client)
+            self._closing.discard(client)
+        self.start()
+        self.wake()
+
+    def unregister(self, client):
+        """Stop driving a client after flushing anything it has queued (e.g. DISCONNECT)."""
+        with self._lock:
+            if client in self._clients:
+                self._closing.add(client)
+        self.wake()
+
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass # Buffer full means a wake-up is already pending
+
+    def _forget(self, client):
+        sock = self._registered.pop(client, None)
+        if sock is not None:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+        with self._lock:
+            self._clients.discard(client)
+
+    def _sync_registrations(self):
+        with self._lock:
+            clients = list(self._clients)
+            closing = list(self._closing)
+            self._closing.clear()
+
+        for client in closing:
+            try:
+                client.loop_write()
+            except Exception:
+                pass
+            self._forget(client)
+
+        for client in clients:
+            if client in closing:
+                continue
+            sock = client.socket()
+            registered = self._registered.get(client)
+            mask = selectors.EVENT_READ
+            if sock is not None and client.want_write():
+                mask |= selectors.EVENT_WRITE
+            try:
+                if sock is not registered:
+                    # Socket replaced or closed by paho (reconnect/disconnect)
+                    if registered is not None:
+                        self._selector.unregister(registered)
+                        del self._registered[client]
+                    if sock is not None:
+                        self._selector.register(sock, mask, client)
+                        self._registered[client] = sock
+                elif sock is not None and self._selector.get_key(sock).events != mask:
+                    self._selector.modify(sock, mask, client)
+            except (KeyError, ValueError, OSError) as e:
+                logger.debug(f"Selector registration failed: {e}")
+                self._registered.pop(client, None)
+
+    def _run(self):
+        logger.info("MQTT engine started")
+        last_misc = 0.0
+        while self._running:
+            self._sync_registrations()
+            try:
+                events = self._selector.select(timeout=self.MISC_INTERVAL)
+            except (OSError, ValueError) as e:
+                logger.error(f"MQTT engine select failed: {e}")
+                time.sleep(0.1)
+                continue
+
+            for key, mask in events:
+                client = key.data
+                if client is None:
+                    try:
+                        while self._wake_r.recv(512):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    if mask & selectors.EVENT_READ:
+                        client.loop_read()
+                    if mask & selectors.EVENT_WRITE:
+                        client.loop_write()
+                except Exception as e:
+                    logger.error(f"MQTT engine I/O error: {e}")
+
+            # TLS can hold already-decrypted bytes the selector won't report
+            for client, sock in list(self._registered.items()):
+                pending = getattr(sock, "pending", None)
+                try:
+                    if pending and pending():
+                        client.loop_read()
+                except Exception as e:
+                    logger.error(f"MQTT engine I/O error: {e}")
+
+            now = time.monotonic()
+            if now - last_misc >= self.MISC_INTERVAL:
+                last_misc = now
+                for client in list(self._registered):
+                    try:
+                        client.loop_misc()
+                    except Exception as e:
+                        logger.error(f"MQTT engine keepalive error: {e}")
+        logger.info("MQTT engine stopped")
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import time
+import uuid
+import logging
+import requests
+from service.api import HondaApi
+from service.commands import get_command
+from service.command_dispatcher import CommandDispatcher, CONFLICTS, command_key
+from service.config import Config
+
+logger = logging.getLogger(__name__)
+
+# How long a queued command stays meaningful (seconds after it becomes due).
+# Flashing the lights an hour late is pointless; locking still makes sense.
+COMMAND_TTL = {
+    "lock": 6 * 3600,
+    "unlock": 10 * 60,
+    "lights": 2 * 60,
+    "horn": 2 * 60,
+    "climate_start": 20 * 60,
+    "climate_stop": 20 * 60,
+    "charge_limit": 24 * 3600,
+}
+
+def is_connectivity_error(error):
+    """True for failures where the request never got an answer (worth replaying)."""
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+class CommandOutbox:
+    """
+    Durable queue of remote commands that couldn't be sent (no connectivity)
+    or are scheduled for later (not_before, e.g. "start climate at 7:00").
+
+    Entries are persisted as one JSON list in storage, PINs encrypted with the
+    auth service key. drain() drops expired entries, checks HondaApi is
+    reachable, then sends everything due concurrently through the account's
+    CommandDispatcher. Connectivity failures are retried up to
+    OUTBOX_MAX_ATTEMPTS; any other error drops the entry.
+
+    Queueing a command replaces an identical queued one and drops a queued
+    opposite (lock vs unlock), so only the latest intent is replayed.
+
+    Listeners are called as callback(entries, results) on the event loop,
+    where results is a list of (entry, error) from the last drain.
+    """
+    KEY = "logue_outbox"
+
+    def __init__(self, storage, auth_service, state_cache=None):
+        self.storage = storage
+        self.auth_service = auth_service
+        self.state_cache = state_cache
+        self.entries = []
+        self.running = False
+        self._generation = 0 # Bumped by run(), so a loop stop() ended exits
+        self._loaded = False
+        self._listeners = []
+        self._drain_lock = asyncio.Lock()
+
+    async def load(self):
+        if self._loaded:
+            return self.entries
+        try:
+            raw = await self.storage.get(self.KEY)
+            if self._loaded:
+                return self.entries # Cleared while reading
+            self.entries = json.loads(raw) if raw else []
+        except Exception as e:
+            logger.error(f"Failed to load command outbox: {e}")
+            self.entries = []
+        self._loaded = True
+        return self.entries
+
+    async def _save(self, results=None):
+        try:
+            if self.entries:
+                await self.storage.set(self.KEY, json.dumps(self.entries, separators=(",", ":")))
+            else:
+                await self.storage.remove(self.KEY)
+        except Exception as e:
+            logger.error(f"Failed to save command outbox: {e}")
+        for listener in list(self._listeners):
+            try:
+                listener(list(self.entries), results or [])
+            except Exception as e:
+                logger.error(f"Outbox listener failed: {e}")
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+        def unsubscribe():
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+        return unsubscribe
+
+    def pending(self, vin=None):
+        return [e for e in self.entries if vin is None or e["vin"] == vin]
+
+    async def enqueue(self, vin, command, pin=None, params=None, not_before=None, ttl=None):
+        await self.load()
+        cmd = get_command(command)
+        now = time.time()
+        due = not_before or now
+        key = json.loads(json.dumps(command_key(vin, cmd.key, params))) # As stored
+        opposite = CONFLICTS.get(cmd.key)
+        # Latest intent wins
+        self.entries = [
+            e for e in self.entries
+            if not (e["vin"] == vin and (e["key"] == key or e["command"] == opposite))
+        ]
+        entry = {
+            "id": str(uuid.uuid4()),
+            "vin": vin,
+            "command": cmd.key,
+            "key": key,
+            "params": params or {},
+            "pin": self.auth_service._encrypt(pin) if pin else None,
+            "created": now,
+            "not_before": due,
+            "expires": due + (ttl or COMMAND_TTL.get(cmd.key, 600)),
+            "attempts": 0,
+            "error": None,
+        }
+        self.entries.append(entry)
+        logger.info(f"Queued {cmd.label} for {vin} in outbox")
+        await self._save()
+        return entry
+
+    async def cancel(self, entry_id):
+        self.entries = [e for e in self.entries if e["id"] != entry_id]
+        await self._save()
+
+    async def clear(self):
+        """Drop every queued command, in memory and in storage (on logout)."""
+        self.entries = []
+        self._loaded = True
+        await self._save()
+
+    async def drain(self):
+        """Send everything that is due. Returns a list of (entry, error)."""
+        await self.load()
+        async with self._drain_lock:
+            now = time.time()
+            expired = [e for e in self.entries if e["expires"] <= now]
+            if expired:
+                logger.info(f"Dropping {len(expired)} expired outbox command(s)")
+                self.entries = [e for e in self.entries if e["expires"] > now]
+
+            due = [e for e in self.entries if e["not_before"] <= now]
+            if not due or not self.auth_service.access_token:
+                if expired:
+                    await self._save()
+                return []
+
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, HondaApi.is_reachable):
+                if expired:
+                    await self._save()
+                return []
+
+            dispatcher = CommandDispatcher.for_account(self.auth_service)
+            semaphore = asyncio.Semaphore(Config.FLEET_REFRESH_CONCURRENCY)
+
+            async def send(entry):
+                async with semaphore:
+                    try:
+                        pin = self.auth_service._decrypt(entry["pin"]) if entry["pin"] else None
+                        await dispatcher.dispatch(entry["vin"], entry["command"], pin, entry["params"])
+                        return entry, None
+                    except Exception as e:
+                        return entry, e
+
+            results = await asyncio.gather(*(send(e) for e in due))
+
+            finished = set()
+            for entry, error in results:
+                label = get_command(entry["command"]).label
+                if error is None:
+                    logger.info(f"Outbox sent {label} for {entry['vin']}")
+                    finished.add(entry["id"])
+                    lock_state = get_command(entry["command"]).lock_state
+                    if self.state_cache and lock_state:
+                        self.state_cache.patch(entry["vin"], {"lock_state": lock_state})
+                    continue
+                entry["attempts"] += 1
+                entry["error"] = str(error)
+                if not is_connectivity_error(error) or entry["attempts"] >= Config.OUTBOX_MAX_ATTEMPTS:
+                    logger.warning(f"Outbox giving up on {label} for {entry['vin']}: {error}")
+                    finished.add(entry["id"])
+
+            self.entries = [e for e in self.entries if e["id"] not in finished]
+            await self._save(results)
+            return results
+
+    async def run(self, interval=None):
+        """Drain periodically until stop() is called."""
+        if self.running:
+            return
+        self.running = True
+        self._generation += 1
+        generation = self._generation
+        interval = interval or Config.OUTBOX_RETRY_INTERVAL
+        # A loop still asleep when stop() and run() are called again (logout
+        # and login within one interval) sees a newer generation and exits
+        while self.running and generation == self._generation:
+            if self.entries:
+                try:
+                    await self.drain()
+                except Exception as e:
+                    logger.error(f"Outbox drain failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,60 @@
+import socket
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from service.startup_trace import startup_trace
+
+logger = logging.getLogger(__name__)
+
+class ConnectionPrewarmer:
+    """
+    Opens connections to the Honda endpoints ahead of the first real request.
+
+    Identity and WSC get a real TLS connection through HondaApi's pooled
+    session (a HEAD request; the status doesn't matter), which the login and
+    API calls then reuse. paho opens its own sockets, so for the IoT endpoint
+    only DNS is resolved ahead of time. All hosts are warmed in parallel on
+    background threads; start() never blocks.
+    """
+    def __init__(self, min_interval=30):
+        self.min_interval = min_interval # Ignore repeated triggers (e.g. quick resumes)
+        self._last_started = 0
+        self._lock = threading.Lock()
+
+    def start(self, reason="startup"):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_started < self.min_interval:
+                return False
+            self._last_started = now
+        threading.Thread(target=self._run, args=(reason,), name="logue-prewarm", daemon=True).start()
+        return True
+
+    def _run(self, reason):
+        from service.config import Config
+        if not Config.PREWARM:
+            return
+        with startup_trace.span("prewarm"):
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix="logue-prewarm") as executor:
+                executor.submit(self._warm_http, Config.IDENTITY_HOST)
+                executor.submit(self._warm_http, Config.WSC_HOST)
+                executor.submit(self._warm_dns, Config.MQTT_HOST, 443)
+        logger.info(f"Connection pre-warm ({reason}) done")
+
+    def _warm_http(self, url):
+        from service.api import HondaApi
+        started = time.perf_counter()
+        try:
+            HondaApi.http().head(url, timeout=5, allow_redirects=False)
+            logger.debug(f"Pre-warmed {url} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logger.debug(f"Pre-warm of {url} failed: {e}")
+
+    def _warm_dns(self, host, port):
+        try:
+            socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except Exception as e:
+            logger.debug(f"DNS pre-warm of {host} failed: {e}")
+
+prewarmer = ConnectionPrewarmer()
@@ -0,0 +1,43 @@
+import threading
+import time
+import logging
+from service.config import Config
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Thread-safe token bucket. acquire() blocks until a request may be sent,
+    so any number of worker threads can share one per-account budget.
+    """
+    _accounts = {}
+    _accounts_lock = threading.Lock()
+
+    @classmethod
+    def for_account(cls, account_id):
+        """Shared limiter for everything sent on behalf of one Honda account."""
+        with cls._accounts_lock:
+            limiter = cls._accounts.get(account_id)
+            if limiter is None:
+                limiter = cls(Config.API_RATE_LIMIT_PER_SEC, Config.API_RATE_BURST)
+                cls._accounts[account_id] = limiter
+            return limiter
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
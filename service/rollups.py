@@ -0,0 +1,121 @@
+import time
+from service.vehicle_state import TIRE_POSITIONS, is_charging
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+RESOLUTION_NAMES = {MINUTE: "minute", HOUR: "hour", DAY: "day"}
+
+# How long each resolution is kept (None = forever; a few hundred rows a year)
+RETENTION = {MINUTE: 14 * DAY, HOUR: 400 * DAY, DAY: None}
+
+# Numeric fields aggregated per bucket. charge_power (kW) is derived: the AC
+# voltage x amperage the car reports while charging, 0 otherwise.
+ROLLUP_FIELDS = ["soc", "range", "odometer", "charge_power"] + [f"tire_{pos}" for pos in TIRE_POSITIONS]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    vin TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    total REAL NOT NULL,
+    lo REAL NOT NULL,
+    hi REAL NOT NULL,
+    first REAL NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (vin, resolution, field, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO rollups (vin, resolution, field, bucket, n, total, lo, hi, first, last)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (vin, resolution, field, bucket) DO UPDATE SET
+    n = n + excluded.n,
+    total = total + excluded.total,
+    lo = MIN(lo, excluded.lo),
+    hi = MAX(hi, excluded.hi),
+    last = excluded.last
+"""
+
+def rollup_values(state):
+    """The numeric values a state contributes to the rollups."""
+    values = {}
+    for field in ROLLUP_FIELDS:
+        value = state.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[field] = float(value)
+    voltage, amperage = state.get("ac_voltage"), state.get("ac_amperage")
+    if is_charging(state) and voltage and amperage:
+        values["charge_power"] = voltage * amperage / 1000
+    elif state.get("charge_status"):
+        values["charge_power"] = 0.0
+    return values
+
+def bucket_start(ts, resolution):
+    """Start of the bucket holding `ts`. Days follow local midnight."""
+    if resolution == DAY:
+        offset = time.localtime(ts).tm_gmtoff
+        return ts - (ts + offset) % DAY
+    return ts - ts % resolution
+
+def pick_resolution(start, end, points=60):
+    """
+    Coarsest resolution that still gives about `points` buckets over the
+    window: days for a quarter or more, hours for a week, minutes below that.
+    """
+    window = max(0, end - start)
+    for resolution in reversed(RESOLUTIONS):
+        if window / resolution >= points:
+            return resolution
+    return MINUTE
+
+class RollupBatch:
+    """Aggregates a batch of samples in memory, then upserts one row per bucket."""
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, vin, ts, state):
+        for field, value in rollup_values(state).items():
+            for resolution in RESOLUTIONS:
+                key = (vin, resolution, field, bucket_start(ts, resolution))
+                agg = self.buckets.get(key)
+                if agg is None:
+                    self.buckets[key] = [1, value, value, value, value, value]
+                else:
+                    agg[0] += 1
+                    agg[1] += value
+                    agg[2] = min(agg[2], value)
+                    agg[3] = max(agg[3], value)
+                    agg[5] = value
+
+    def write(self, conn):
+        if self.buckets:
+            conn.executemany(UPSERT, [key + tuple(agg) for key, agg in self.buckets.items()])
+        self.buckets = {}
+
+def query(conn, vin, field, start, end, resolution):
+    """Buckets overlapping [start, end] as dicts with t, n, mean, min, max, first, last."""
+    rows = conn.execute(
+        "SELECT bucket, n, total, lo, hi, first, last FROM rollups "
+        "WHERE vin = ? AND resolution = ? AND field = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+        (vin, resolution, field, bucket_start(start, resolution), end),
+    )
+    return [
+        {"t": bucket, "n": n, "mean": total / n, "min": lo, "max": hi, "first": first, "last": last}
+        for bucket, n, total, lo, hi, first, last in rows
+    ]
+
+def prune(conn, now=None):
+    """Apply RETENTION; returns the number of rows removed."""
+    now = now or time.time()
+    removed = 0
+    for resolution, keep in RETENTION.items():
+        if keep:
+            removed += conn.execute(
+                "DELETE FROM rollups WHERE resolution = ? AND bucket < ?", (resolution, now - keep)
+            ).rowcount
+    return removed
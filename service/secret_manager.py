@@ -1,6 +1,5 @@
 import os
 import logging
-from cryptography.fernet import Fernet
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,6 +28,7 @@ def ensure_secrets():
     
     if "ENCRYPTION_KEY=" not in existing_content:
         logger.info("Generating new ENCRYPTION_KEY...")
+        from cryptography.fernet import Fernet # Only needed on first run
         key = Fernet.generate_key().decode()
         updates.append(f"ENCRYPTION_KEY={key}")
         # Set in current process for immediate use
@@ -0,0 +1,243 @@
+import heapq
+import json
+import threading
+import time
+import logging
+from service.config import Config
+from service.rollups import DAY, bucket_start
+from service.vehicle_state import is_charging, is_plugged_in
+
+logger = logging.getLogger(__name__)
+
+# Samples are held this long (seconds of vehicle time) so late arrivals can
+# be put back in order before they are segmented; older ones are dropped
+REORDER_WINDOW = 10 * 60
+# Bound on held samples per VIN, whatever their timestamps
+MAX_PENDING = 32
+# A trip ends after this long without the odometer moving; a longer silence
+# between two samples marks the segment spanning it as partial
+TRIP_GAP = 20 * 60
+
+TRIP = "trip"
+CHARGE = "charge"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    vin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    distance REAL NOT NULL,
+    energy REAL NOT NULL,
+    soc_start REAL,
+    soc_end REAL,
+    unit TEXT,
+    partial INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_vin_day ON segments (vin, day);
+CREATE TABLE IF NOT EXISTS segment_checkpoints (
+    vin TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+def _sample(timestamp, state):
+    """Compact [ts, odometer, soc, plugged, charging, unit] from a decoded state."""
+    return [
+        int(timestamp), state.get("odometer"), state.get("soc"),
+        is_plugged_in(state), is_charging(state), state.get("odometer_unit"),
+    ]
+
+def efficiency(segment):
+    """Distance per kWh of a trip, or None if too little energy was used to tell."""
+    if segment["kind"] != TRIP or segment["energy"] < 0.1:
+        return None
+    return segment["distance"] / segment["energy"]
+
+class SegmentEngine:
+    """
+    Splits each VIN's stream of decoded states into trips (odometer moving)
+    and charging sessions (SoC rising while plugged in or charging), with
+    distance, energy and efficiency accumulated as samples arrive.
+
+    Per VIN it keeps only the last sample, the open segment and a small
+    reorder buffer, so memory is constant and history is never rescanned.
+    Samples arriving up to REORDER_WINDOW late are slotted back in order;
+    a gap in the data is bridged (the segment is marked partial) rather
+    than guessed at. Closed segments and a checkpoint of the per-VIN state
+    go to the telemetry store, so an app restart resumes mid-trip.
+    """
+    def __init__(self, store, capacity=None):
+        self.store = store
+        self.capacity = capacity or Config.BATTERY_CAPACITY_KWH
+        self._vins = {}
+        self._lock = threading.Lock()
+
+    def attach(self, state_cache):
+        """Segment every update of a VehicleStateCache; returns unsubscribe()."""
+        def on_update(vin, state, changed, timestamp):
+            self.feed(vin, state, timestamp)
+        return state_cache.subscribe(on_update)
+
+    def _state(self, vin):
+        vs = self._vins.get(vin)
+        if vs is None:
+            vs = {"last": None, "open": None, "pending": [], "newest": 0}
+            try:
+                checkpoint = self.store.segment_checkpoint(vin)
+                if checkpoint:
+                    vs.update(checkpoint)
+                    heapq.heapify(vs["pending"])
+            except Exception as e:
+                logger.error(f"Failed to restore segment state for {vin}: {e}")
+            self._vins[vin] = vs
+        return vs
+
+    def feed(self, vin, state, timestamp=None):
+        if not vin or not state:
+            return
+        sample = _sample(timestamp or time.time(), state)
+        with self._lock:
+            vs = self._state(vin)
+            last = vs["last"]
+            if last and sample[0] <= last[0]:
+                return # Older than what was already segmented (or a re-delivery)
+            if any(p[0] == sample[0] for p in vs["pending"]):
+                return
+            heapq.heappush(vs["pending"], sample)
+            vs["newest"] = max(vs["newest"], sample[0])
+            self._release(vin, vs, vs["newest"] - REORDER_WINDOW)
+
+    def flush(self, vin=None):
+        """Segment everything held for reordering (e.g. the car went to sleep)."""
+        with self._lock:
+            for v in ([vin] if vin else list(self._vins)):
+                if v in self._vins:
+                    self._release(v, self._vins[v], float("inf"))
+
+    def _release(self, vin, vs, until):
+        closed = []
+        pending = vs["pending"]
+        while pending and (pending[0][0] <= until or len(pending) > MAX_PENDING):
+            segment = self._advance(vs, heapq.heappop(pending))
+            if segment:
+                closed.append(segment)
+        self.store.record_segments(vin, closed, {k: vs[k] for k in ("last", "open", "pending", "newest")})
+
+    def _advance(self, vs, sample):
+        """Apply one in-order sample; returns a segment it closed, if any."""
+        prev, vs["last"] = vs["last"], sample
+        if prev is None:
+            return None
+        ts, odometer, soc, plugged, charging, _ = sample
+        gap = ts - prev[0] > TRIP_GAP
+        moved = odometer is not None and prev[1] is not None and odometer > prev[1]
+        gained = soc is not None and prev[2] is not None and soc > prev[2]
+        segment = vs["open"]
+
+        if moved:
+            kind = TRIP
+        elif gained and (plugged or charging or gap):
+            kind = CHARGE # A gap with SoC up and no driving was a charge we missed
+        else:
+            # Nothing happening: close a trip after TRIP_GAP, a charge once unplugged
+            if segment and ((segment["kind"] == TRIP and ts - segment["end"] > TRIP_GAP) or
+                            (segment["kind"] == CHARGE and not plugged)):
+                vs["open"] = None
+                return segment
+            return None
+
+        finished = None
+        if not segment or segment["kind"] != kind or gap:
+            finished, segment = segment, {
+                "kind": kind, "start": prev[0], "end": prev[0],
+                "distance": 0.0, "energy": 0.0,
+                "soc_start": prev[2], "soc_end": prev[2],
+                "unit": sample[5] or prev[5], "partial": gap,
+            }
+            vs["open"] = segment
+        self._extend(segment, prev, sample)
+        return finished
+
+    def _extend(self, segment, prev, sample):
+        segment["end"] = sample[0]
+        if segment["kind"] == TRIP and sample[1] is not None and prev[1] is not None:
+            segment["distance"] += sample[1] - prev[1]
+        if sample[2] is not None and prev[2] is not None:
+            used = (prev[2] - sample[2]) / 100 * self.capacity
+            # Trips count net energy (regen gives some back); charges what went in
+            segment["energy"] += used if segment["kind"] == TRIP else max(0.0, -used)
+            segment["soc_end"] = sample[2]
+
+# -- Storage (run by TelemetryStore) --
+
+def write(conn, vin, closed, checkpoint):
+    if closed:
+        conn.executemany(
+            "INSERT INTO segments (vin, kind, start, end, day, distance, energy, soc_start, soc_end, unit, partial) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (vin, s["kind"], s["start"], s["end"], bucket_start(s["start"], DAY), s["distance"], s["energy"],
+                 s["soc_start"], s["soc_end"], s["unit"], int(s["partial"]))
+                for s in closed
+            ],
+        )
+    conn.execute(
+        "INSERT INTO segment_checkpoints (vin, data) VALUES (?, ?) ON CONFLICT (vin) DO UPDATE SET data = excluded.data",
+        (vin, json.dumps(checkpoint, separators=(",", ":"))),
+    )
+
+def load_checkpoint(conn, vin):
+    row = conn.execute("SELECT data FROM segment_checkpoints WHERE vin = ?", (vin,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def query(conn, vin, start, end, kind=None):
+    sql = ("SELECT kind, start, end, distance, energy, soc_start, soc_end, unit, partial FROM segments "
+           "WHERE vin = ? AND day >= ? AND start <= ?")
+    params = [vin, bucket_start(start, DAY), end]
+    if kind:
+        sql += " AND kind = ?"
+        params.append(kind)
+    segments = []
+    for kind, s, e, distance, energy, soc_start, soc_end, unit, partial in conn.execute(sql + " ORDER BY start", params):
+        if s < start:
+            continue
+        segment = {
+            "kind": kind, "start": s, "end": e, "distance": distance, "energy": energy,
+            "soc_start": soc_start, "soc_end": soc_end, "unit": unit, "partial": bool(partial),
+        }
+        segment["efficiency"] = efficiency(segment)
+        segments.append(segment)
+    return segments
+
+def week_start(day):
+    """Local midnight of the Monday on or before a day bucket."""
+    return bucket_start(day - time.localtime(day).tm_wday * DAY + DAY // 2, DAY)
+
+def totals(conn, vin, start, end, period="day"):
+    """
+    Per day (or week, starting Monday) between start and end: trips, distance,
+    energy used, efficiency (distance per kWh), charges and energy added.
+    Served from the (vin, day) index, one row per day and kind.
+    """
+    periods = {}
+    for day, kind, count, distance, energy in conn.execute(
+        "SELECT day, kind, COUNT(*), SUM(distance), SUM(energy) FROM segments "
+        "WHERE vin = ? AND day >= ? AND day <= ? GROUP BY day, kind ORDER BY day",
+        (vin, bucket_start(start, DAY), end),
+    ):
+        key = week_start(day) if period == "week" else day
+        total = periods.setdefault(key, {
+            "t": key, "trips": 0, "distance": 0.0, "energy_used": 0.0, "charges": 0, "energy_added": 0.0,
+        })
+        if kind == TRIP:
+            total["trips"] += count
+            total["distance"] += distance
+            total["energy_used"] += energy
+        else:
+            total["charges"] += count
+            total["energy_added"] += energy
+    for total in periods.values():
+        total["efficiency"] = total["distance"] / total["energy_used"] if total["energy_used"] >= 0.1 else None
+    return list(periods.values())
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from service.api import HondaApi
+from service.config import Config
+from service.mqtt_client import AwsMqttClient
+from service.mqtt_engine import MqttEngine
+from service.startup_trace import startup_trace
+from service.vehicle_state import decode_dashboard, vin_from_topic
+
+logger = logging.getLogger(__name__)
+
+# Shadows every vehicle session subscribes to
+SESSION_SHADOWS = [
+    "DASHBOARD_ASYNC",
+    "ENGINE_START_STOP_ASYNC", # For immediate command feedback
+]
+
+def shadow_topic(vin, shadow):
+    return f"$aws/things/thing_{vin}/shadow/name/{shadow}/update"
+
+class VehicleSession:
+    """A connected, subscribed MQTT session for one VIN."""
+    def __init__(self, vin, client):
+        self.vin = vin
+        self.client = client
+        self.connected_at = time.time()
+        self.last_used = self.connected_at
+        # Set by whoever last asked the car for DASHBOARD_ASYNC on this session
+        self.dashboard_requested_at = None
+
+    def is_alive(self):
+        return self.client.client.is_connected()
+
+    def close(self):
+        try:
+            self.client.disconnect()
+        except Exception as e:
+            logger.error(f"Error closing session for {self.vin}: {e}")
+
+class MqttSessionPool:
+    """
+    Keeps MQTT sessions for the most recently used vehicles connected so that
+    switching vehicles does not pay the CIG token fetch, TLS/websocket connect
+    and re-subscription again. Least recently used sessions are evicted once
+    more than `max_size` are open.
+
+    Dashboard documents from every pooled session are decoded into the shared
+    VehicleStateCache, so a warm vehicle always has its latest state ready.
+    With multiplexing enabled all sessions share one MqttEngine thread.
+    """
+    def __init__(self, auth_service, state_cache, max_size=None, engine=None):
+        self.auth_service = auth_service
+        self.state_cache = state_cache
+        self.max_size = max(1, max_size or Config.SESSION_POOL_SIZE)
+        if engine is None and Config.MQTT_MULTIPLEX:
+            engine = MqttEngine.shared()
+        self.engine = engine
+        self._sessions = OrderedDict()
+        self._connecting = {} # VIN -> Future of an in-progress connect
+        self._lock = threading.RLock()
+        self._message_listeners = []
+
+    def is_warm(self, vin):
+        with self._lock:
+            session = self._sessions.get(vin)
+            return bool(session and session.is_alive())
+
+    def get(self, vin):
+        """Return the pooled session for a VIN without connecting."""
+        with self._lock:
+            return self._sessions.get(vin)
+
+    def acquire(self, vin):
+        """
+        Return a live session for the VIN, connecting if needed.
+        Blocking (network I/O) - run it in an executor from UI code.
+        Concurrent callers for the same VIN share one connect.
+        """
+        with self._lock:
+            session = self._sessions.get(vin)
+            if session and session.is_alive():
+                self._sessions.move_to_end(vin)
+                session.last_used = time.time()
+                logger.info(f"Reusing warm MQTT session for {vin}")
+                return session
+            if session:
+                # Dropped connection (e.g. expired CIG token) - start over
+                self._sessions.pop(vin)
+                session.close()
+            pending = self._connecting.get(vin)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._connecting[vin] = pending
+
+        if not owner:
+            logger.info(f"Joining in-progress MQTT connect for {vin}")
+            return pending.result()
+
+        try:
+            session = self._register(vin, self._connect(vin))
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._connecting.pop(vin, None)
+        pending.set_result(session)
+        return session
+
+    def _register(self, vin, session):
+        with self._lock:
+            existing = self._sessions.get(vin)
+            if existing and existing.is_alive():
+                # Another caller connected this VIN while we were connecting
+                session.close()
+                session = existing
+            self._sessions[vin] = session
+            self._sessions.move_to_end(vin)
+            evicted = []
+            while len(self._sessions) > self.max_size:
+                _, old = self._sessions.popitem(last=False)
+                evicted.append(old)
+
+        for old in evicted:
+            logger.info(f"Evicting MQTT session for {old.vin}")
+            old.close()
+        return session
+
+    def _connect(self, vin):
+        with startup_trace.span("get_cig_token"):
+            creds = HondaApi.get_cig_token(
+                self.auth_service.access_token,
+                self.auth_service.hidas_ident,
+                vin
+            )
+        client = AwsMqttClient(vin, creds["cig_token"], creds["cig_signature"], self._on_message, engine=self.engine)
+        with startup_trace.span("mqtt_connect"):
+            client.connect()
+        for shadow in SESSION_SHADOWS:
+            client.subscribe(shadow_topic(vin, shadow))
+        return VehicleSession(vin, client)
+
+    def add_message_listener(self, callback):
+        """callback(vin, topic, data) for every message from any pooled session."""
+        self._message_listeners.append(callback)
+
+    def remove_message_listener(self, callback):
+        if callback in self._message_listeners:
+            self._message_listeners.remove(callback)
+
+    def _on_message(self, topic, payload):
+        try:
+            data = json.loads(payload)
+        except Exception as e:
+            logger.error(f"Error parsing MQTT message: {e}")
+            return
+
+        vin = vin_from_topic(topic)
+        if "DASHBOARD_ASYNC" in topic:
+            self.state_cache.update(vin, decode_dashboard(data))
+
+        for listener in list(self._message_listeners):
+            try:
+                listener(vin, topic, data)
+            except Exception as e:
+                logger.error(f"MQTT listener failed: {e}")
+
+    def discard(self, vin):
+        with self._lock:
+            session = self._sessions.pop(vin, None)
+        if session:
+            session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
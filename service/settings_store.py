@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys written by earlier versions, one storage entry each
+LEGACY_KEYS = {
+    "username": "honda_username",
+    "password": "honda_password", # Encrypted
+    "vin": "honda_vin",
+    "pin": "honda_pin", # Encrypted
+    "use_metric": "use_metric", # "True" / "False"
+}
+LEGACY_ENCRYPTED = {"password", "pin"}
+
+class SettingsStore:
+    """
+    Credentials and user settings as one encrypted storage record.
+
+    load() reads the record once (a single bridge round trip) and keeps the
+    decrypted values in memory, so get() afterwards is free. update() and
+    remove() change the cache immediately and write the whole record back a
+    moment later, coalescing bursts of changes into one write. Values from
+    the old one-key-per-field layout are migrated on first load.
+    """
+    KEY = "logue_settings"
+
+    def __init__(self, storage, auth_service, flush_delay=0.5):
+        self.storage = storage
+        self.auth_service = auth_service # For its Fernet encrypt/decrypt
+        self.flush_delay = flush_delay
+        self._values = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._flush_handle = None
+
+    async def load(self):
+        if self._loaded:
+            return self._values
+        async with self._load_lock:
+            if self._loaded:
+                return self._values
+            raw = await self.storage.get(self.KEY)
+            if raw:
+                decrypted = self.auth_service._decrypt(raw)
+                try:
+                    self._values = json.loads(decrypted) if decrypted else {}
+                except ValueError:
+                    logger.error("Settings record is unreadable; starting empty")
+                    self._values = {}
+            elif await self.storage.get(LEGACY_KEYS["username"]) or await self.storage.get(LEGACY_KEYS["use_metric"]):
+                await self._migrate()
+            self._loaded = True
+            return self._values
+
+    async def _migrate(self):
+        fields = list(LEGACY_KEYS)
+        raws = await asyncio.gather(*(self.storage.get(LEGACY_KEYS[f]) for f in fields))
+        for field, raw in zip(fields, raws):
+            if raw is None:
+                continue
+            if field in LEGACY_ENCRYPTED:
+                raw = self.auth_service._decrypt(raw)
+            elif field == "use_metric":
+                raw = raw == "True"
+            if raw is not None:
+                self._values[field] = raw
+        await self._write()
+        await asyncio.gather(*(self.storage.remove(key) for key in LEGACY_KEYS.values()))
+        logger.info("Migrated stored credentials/settings to a single record")
+
+    def get(self, field, default=None):
+        """Cached value; call (and await) load() once first."""
+        return self._values.get(field, default)
+
+    def update(self, **fields):
+        changed = False
+        for field, value in fields.items():
+            if value is None:
+                continue
+            if self._values.get(field) != value:
+                self._values[field] = value
+                changed = True
+        if changed:
+            self._schedule_flush()
+
+    def remove(self, *fields):
+        present = [f for f in fields if f in self._values]
+        for field in present:
+            del self._values[field]
+        if present:
+            self._schedule_flush()
+
+    async def clear(self, keep=()):
+        """Forget everything but `keep` now (logout), without waiting for write-behind."""
+        self._cancel_flush()
+        self._values = {f: self._values[f] for f in keep if f in self._values}
+        await self._write()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # No loop (shutdown); flush() must be called explicitly
+        self._flush_handle = loop.call_later(self.flush_delay, lambda: asyncio.ensure_future(self.flush()))
+
+    def _cancel_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    async def flush(self):
+        """Write pending changes now (e.g. before exiting)."""
+        if self._flush_handle is None:
+            return
+        self._cancel_flush()
+        await self._write()
+
+    async def _write(self):
+        try:
+            if self._values:
+                raw = json.dumps(self._values, separators=(",", ":"))
+                await self.storage.set(self.KEY, self.auth_service._encrypt(raw))
+            else:
+                await self.storage.remove(self.KEY)
+        except Exception as e:
+            logger.error(f"Failed to save settings: {e}")
@@ -0,0 +1,68 @@
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SnapshotStore:
+    """
+    Persists the last decoded dashboard state per VIN so the dashboard can be
+    drawn immediately on launch (and on vehicle switch) while the live MQTT
+    connection revalidates in the background.
+
+    Snapshots are stored as one compact JSON record per VIN:
+    {"t": <unix timestamp>, "s": <decoded state>}
+    """
+    KEY_PREFIX = "logue_snapshot_"
+
+    def __init__(self, storage):
+        self.storage = storage # Async get/set store (e.g. SharedPreferences)
+        self._cache = {}
+
+    def peek(self, vin):
+        """Return a snapshot already held in memory, without touching storage."""
+        return self._cache.get(vin, (None, None))
+
+    async def load(self, vin):
+        """Return (state, timestamp) for a VIN, or (None, None) if never seen."""
+        if not vin:
+            return None, None
+        if vin in self._cache:
+            return self._cache[vin]
+
+        try:
+            raw = await self.storage.get(f"{self.KEY_PREFIX}{vin}")
+            record = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.error(f"Failed to load snapshot for {vin}: {e}")
+            record = None
+
+        snapshot = (record["s"], record["t"]) if record else (None, None)
+        self._cache[vin] = snapshot
+        return snapshot
+
+    async def save(self, vin, state, timestamp=None):
+        if not vin or not state:
+            return
+        timestamp = timestamp or time.time()
+        self._cache[vin] = (state, timestamp)
+        try:
+            raw = json.dumps({"t": int(timestamp), "s": state}, separators=(",", ":"))
+            await self.storage.set(f"{self.KEY_PREFIX}{vin}", raw)
+        except Exception as e:
+            logger.error(f"Failed to save snapshot for {vin}: {e}")
+
+    async def remove(self, vin):
+        self._cache.pop(vin, None)
+        await self.storage.remove(f"{self.KEY_PREFIX}{vin}")
+
+def describe_age(timestamp, now=None):
+    """Human readable age of a snapshot, e.g. '5 min ago'."""
+    seconds = max(0, int((now or time.time()) - timestamp))
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{seconds // 60} min ago"
+    if seconds < 86400:
+        return f"{seconds // 3600} h ago"
+    return f"{seconds // 86400} d ago"
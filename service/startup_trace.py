@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Runs kept in the rolling history file
+HISTORY_SIZE = 50
+
+def _app_version():
+    try:
+        from importlib.metadata import version
+        return version("logue")
+    except Exception:
+        return "dev"
+
+class StartupTrace:
+    """
+    Cold-start timeline. Phases are recorded as spans (start/end, possibly
+    overlapping and on any thread) or instant marks, relative to when this
+    module was first imported. finish() logs the timeline as JSON plus a
+    human readable table, and appends it to a rolling history file so runs
+    can be compared across releases.
+
+    Enabled with LOGUE_TRACE_STARTUP=1 or --trace-startup; otherwise every
+    call is a cheap no-op.
+    """
+    def __init__(self, enabled, history_path=None):
+        self.enabled = enabled
+        self.history_path = history_path
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self.events = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def _now_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def _record(self, phase, start_ms, end_ms):
+        with self._lock:
+            if self.finished:
+                return
+            self.events.append({
+                "phase": phase,
+                "start_ms": round(start_ms, 1),
+                "end_ms": round(end_ms, 1),
+                "duration_ms": round(end_ms - start_ms, 1),
+                "thread": threading.current_thread().name,
+            })
+
+    def mark(self, phase):
+        """Instant event (e.g. 'first_frame')."""
+        if self.enabled:
+            now = self._now_ms()
+            self._record(phase, now, now)
+
+    @contextmanager
+    def span(self, phase):
+        """Time a phase: `with startup_trace.span('login'): ...`"""
+        if not self.enabled or self.finished:
+            yield
+            return
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            self._record(phase, start, self._now_ms())
+
+    def finish(self, reason):
+        """Close the timeline at `reason` (e.g. 'first_data') and report it, once."""
+        if not self.enabled:
+            return None
+        self.mark(reason)
+        with self._lock:
+            if self.finished:
+                return None
+            self.finished = True
+            report = {
+                "version": _app_version(),
+                "started_at": int(self.started_wall),
+                "reason": reason,
+                "total_ms": round(self._now_ms(), 1),
+                "phases": sorted(self.events, key=lambda e: e["start_ms"]),
+            }
+
+        history = self._load_history()
+        logger.info(f"Startup timeline: {json.dumps(report, separators=(',', ':'))}")
+        logger.info("Startup summary:\n" + self.summary(report, history))
+        self._append_history(report, history)
+        return report
+
+    def summary(self, report, history=None):
+        """Table of phases with the median of previous runs for comparison."""
+        baselines = {}
+        for run in (history or [])[-10:]:
+            baselines.setdefault("total", []).append(run.get("total_ms", 0))
+            for event in run.get("phases", []):
+                baselines.setdefault(event["phase"], []).append(event["duration_ms"])
+
+        def compare(name, value):
+            previous = sorted(baselines.get(name, []))
+            if not previous:
+                return ""
+            median = previous[len(previous) // 2]
+            return f"  ({value - median:+.0f} ms vs median of {len(previous)})"
+
+        lines = [f"  {'phase':<28}{'start':>9}{'duration':>11}"]
+        for event in report["phases"]:
+            lines.append(
+                f"  {event['phase']:<28}{event['start_ms']:>7.0f}ms{event['duration_ms']:>9.0f}ms"
+                + compare(event["phase"], event["duration_ms"])
+            )
+        lines.append(f"  {'total (' + report['reason'] + ')':<28}{report['total_ms']:>18.0f}ms" + compare("total", report["total_ms"]))
+        return "\n".join(lines)
+
+    def _load_history(self):
+        if not self.history_path:
+            return []
+        try:
+            with open(self.history_path, "r") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Failed to read startup history: {e}")
+            return []
+
+    def _append_history(self, report, history):
+        if not self.history_path:
+            return
+        try:
+            directory = os.path.dirname(self.history_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            runs = (history + [report])[-HISTORY_SIZE:]
+            with open(self.history_path, "w") as f:
+                for run in runs:
+                    f.write(json.dumps(run, separators=(",", ":")) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to write startup history: {e}")
+
+startup_trace = StartupTrace(
+    enabled=os.getenv("LOGUE_TRACE_STARTUP") == "1" or "--trace-startup" in sys.argv,
+    history_path=os.getenv(
+        "LOGUE_TRACE_HISTORY",
+        os.path.join(os.path.expanduser("~"), ".logue", "startup_history.jsonl")
+    ),
+)
@@ -0,0 +1,80 @@
+import threading
+import time
+import logging
+from service.vehicle_state import LOCAL_FIELDS
+
+logger = logging.getLogger(__name__)
+
+class VehicleStateCache:
+    """
+    Latest decoded state per VIN, shared by every consumer in the process
+    (dashboard, session pool, background refreshers).
+
+    Listeners are called as callback(vin, state, changed, timestamp) where
+    `changed` holds only the fields that differ from the previous state.
+    They run on whichever thread delivered the update (usually the MQTT
+    network thread), so UI listeners must marshal back to their own loop.
+    """
+    def __init__(self):
+        self._states = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def get(self, vin):
+        """Return (state, timestamp) for a VIN, or (None, None)."""
+        with self._lock:
+            return self._states.get(vin, (None, None))
+
+    def vins(self):
+        with self._lock:
+            return list(self._states.keys())
+
+    def update(self, vin, state, timestamp=None):
+        """Store a new state and notify listeners. Returns the changed fields."""
+        if not vin or state is None:
+            return {}
+        timestamp = timestamp or time.time()
+        with self._lock:
+            previous, _ = self._states.get(vin, (None, None))
+            for field in LOCAL_FIELDS:
+                if previous and field in previous and field not in state:
+                    state = {**state, field: previous[field]}
+            self._states[vin] = (state, timestamp)
+            listeners = list(self._listeners)
+
+        previous = previous or {}
+        changed = {k: v for k, v in state.items() if previous.get(k) != v}
+        for k in previous:
+            if k not in state:
+                changed[k] = None
+
+        for listener in listeners:
+            try:
+                listener(vin, state, changed, timestamp)
+            except Exception as e:
+                logger.error(f"State listener failed for {vin}: {e}")
+        return changed
+
+    def patch(self, vin, fields):
+        """Merge a few fields into a VIN's state (e.g. lock state after a command)."""
+        state, timestamp = self.get(vin)
+        return self.update(vin, {**(state or {}), **fields}, timestamp)
+
+    def subscribe(self, callback):
+        """Register a listener; returns a function that unregisters it."""
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def discard(self, vin):
+        with self._lock:
+            self._states.pop(vin, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
@@ -0,0 +1,279 @@
+"""
+Local read-only HTTP + Server-Sent Events endpoint for decoded vehicle state,
+so dashboards and scripts share the app's MQTT session instead of each
+logging in and polling the Honda API.
+
+    GET /vehicles                  [{"vin", "timestamp"}, ...]
+    GET /vehicles/<vin>            {"vin", "timestamp", "state"}
+    GET /events[?vin=A&vin=B]      text/event-stream: one `snapshot` event per
+                                   VIN with its full state, then a `delta`
+                                   event ({"vin", "timestamp", "changed"}) per
+                                   update, with removed fields set to null
+
+Everything is answered from the VehicleStateCache; nothing here talks to the
+vehicle. Each update is serialized once and queued to every subscriber, so
+hundreds of local clients cost one json.dumps per update. A client that
+falls MAX_BACKLOG events behind is disconnected; reconnecting gets it a
+fresh snapshot.
+"""
+import asyncio
+import hmac
+import json
+import time
+import logging
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Events queued for a subscriber before it is considered stuck and dropped
+MAX_BACKLOG = 256
+# Concurrent event-stream clients
+MAX_SUBSCRIBERS = 1000
+# Seconds between keep-alive comments on idle event streams (stops proxies
+# and clients from timing the connection out)
+KEEPALIVE = 15
+# Seconds a client gets to send its request headers
+REQUEST_TIMEOUT = 10
+# Bytes of request line + headers accepted
+MAX_REQUEST = 8192
+# Milliseconds clients wait before reconnecting a dropped stream
+RETRY_MS = 3000
+# Host headers accepted without a token. Anything else is a browser being
+# pointed at us through a DNS name the attacker controls (DNS rebinding).
+LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 431: "Request Header Fields Too Large", 503: "Service Unavailable"}
+
+def _json(data):
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+def _event(name, event_id, data):
+    return f"event: {name}\nid: {event_id}\ndata: {_json(data)}\n\n".encode()
+
+class _Subscriber:
+    __slots__ = ("vins", "queue", "dropped")
+
+    def __init__(self, vins):
+        self.vins = vins # None for every VIN
+        self.queue = asyncio.Queue(MAX_BACKLOG)
+        self.dropped = False
+
+    def wants(self, vin):
+        return self.vins is None or vin in self.vins
+
+    def send(self, data):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.close() # Too slow to keep up
+
+    def close(self):
+        """Discard anything queued and wake the writer so it hangs up."""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class StateServer:
+    """
+    Serves a VehicleStateCache over HTTP/SSE on the running event loop.
+    start() and stop() are coroutines; state updates may arrive on any
+    thread. If `token` is set, clients must send it as a Bearer token or a
+    `token` query parameter.
+
+    Browsers may read responses (CORS) only from `allowed_origin`, or from
+    any origin once a token is required; otherwise a web page open in the
+    user's browser could read the vehicle's state. Without a token, requests
+    must also name a loopback Host.
+    """
+    def __init__(self, state_cache, host="127.0.0.1", port=0, token=None, allowed_origin=None):
+        self.state_cache = state_cache
+        self.host = host
+        self.port = port
+        self.token = token
+        self.cors_origin = allowed_origin or ("*" if token else None)
+        self.loop = None
+        self._server = None
+        self._unsubscribe = None
+        self._subscribers = set()
+        self._snapshots = {} # vin -> serialized snapshot event, until the next update
+        self._seq = 0
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_REQUEST)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._unsubscribe = self.state_cache.subscribe(self._on_update)
+        logger.info(f"State server listening on http://{self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._server is None:
+            return
+        self._server.close()
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+        await self._server.wait_closed()
+        self._server = None
+        logger.info("State server stopped")
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    # -- Fan-out --
+
+    def _on_update(self, vin, state, changed, timestamp):
+        # Called on the thread that updated the cache (usually MQTT's)
+        if changed:
+            self.loop.call_soon_threadsafe(self._publish, vin, changed, timestamp)
+
+    def _publish(self, vin, changed, timestamp):
+        self._seq += 1
+        self._snapshots.pop(vin, None)
+        subscribers = [s for s in self._subscribers if s.wants(vin)]
+        if not subscribers:
+            return
+        data = _event("delta", self._seq, {"vin": vin, "timestamp": timestamp, "changed": changed})
+        for subscriber in subscribers:
+            subscriber.send(data)
+
+    def _snapshot(self, vin):
+        data = self._snapshots.get(vin)
+        if data is None:
+            state, timestamp = self.state_cache.get(vin)
+            if state is None:
+                return None
+            data = self._snapshots[vin] = _event("snapshot", self._seq, {"vin": vin, "timestamp": timestamp, "state": state})
+        return data
+
+    # -- HTTP --
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            except (asyncio.LimitOverrunError, ValueError):
+                await self._respond(writer, 431, {"error": "Request too large"})
+                return
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            parts = lines[0].split(" ")
+            if len(parts) != 3:
+                await self._respond(writer, 400, {"error": "Malformed request"})
+                return
+            method, target, _ = parts
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+
+            if not self._host_allowed(headers):
+                await self._respond(writer, 403, {"error": "Host not allowed"})
+            elif method not in ("GET", "HEAD"):
+                await self._respond(writer, 405, {"error": "Read-only"}, {"Allow": "GET, HEAD"})
+            elif not self._authorized(headers, query):
+                await self._respond(writer, 401, {"error": "Missing or wrong token"})
+            elif url.path == "/events":
+                await self._stream(writer, query.get("vin"))
+            else:
+                status, body = self._route(url.path.rstrip("/"))
+                await self._respond(writer, status, body, head_only=method == "HEAD")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"State server request failed: {e}")
+        finally:
+            writer.close()
+
+    def _host_allowed(self, headers):
+        if self.token:
+            return True # A rebinding page can't know the token
+        try:
+            hostname = urlsplit("//" + headers.get("host", "")).hostname
+        except ValueError:
+            return False
+        return hostname in LOOPBACK_HOSTS
+
+    def _cors_headers(self):
+        return [f"Access-Control-Allow-Origin: {self.cors_origin}"] if self.cors_origin else []
+
+    def _authorized(self, headers, query):
+        if not self.token:
+            return True
+        supplied = query.get("token", [""])[0]
+        authorization = headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            supplied = authorization[7:].strip()
+        return hmac.compare_digest(supplied.encode(), self.token.encode())
+
+    def _route(self, path):
+        if path == "/vehicles":
+            return 200, [{"vin": vin, "timestamp": self.state_cache.get(vin)[1]} for vin in self.state_cache.vins()]
+        if path.startswith("/vehicles/"):
+            vin = path[len("/vehicles/"):]
+            state, timestamp = self.state_cache.get(vin)
+            if state is None:
+                return 404, {"error": f"No state for {vin}"}
+            return 200, {"vin": vin, "timestamp": timestamp, "state": state}
+        return 404, {"error": "Not found"}
+
+    async def _respond(self, writer, status, body, headers=None, head_only=False):
+        payload = _json(body).encode()
+        lines = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+            "Cache-Control: no-store",
+            "Connection: close",
+        ] + self._cors_headers() + [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (b"" if head_only else payload))
+        await writer.drain()
+
+    async def _stream(self, writer, vins):
+        if len(self._subscribers) >= MAX_SUBSCRIBERS:
+            await self._respond(writer, 503, {"error": "Too many subscribers"})
+            return
+        subscriber = _Subscriber(set(vins) if vins else None)
+        # Register and snapshot in the same loop step: any update after this
+        # point is queued as a delta, and deltas only carry absolute values,
+        # so one already reflected in the snapshot is harmless
+        self._subscribers.add(subscriber)
+        try:
+            lines = [
+                "HTTP/1.1 200 OK",
+                "Content-Type: text/event-stream",
+                "Cache-Control: no-store",
+                "Connection: keep-alive",
+            ] + self._cors_headers()
+            writer.write(("\r\n".join(lines) + f"\r\n\r\nretry: {RETRY_MS}\n\n").encode())
+            for vin in (vins or self.state_cache.vins()):
+                snapshot = self._snapshot(vin)
+                if snapshot:
+                    writer.write(snapshot)
+            await writer.drain()
+            started = time.monotonic()
+            logger.debug(f"Event stream opened ({len(self._subscribers)} subscriber(s))")
+            while True:
+                try:
+                    data = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    data = b": keepalive\n\n"
+                if data is None:
+                    break
+                writer.write(data)
+                await writer.drain()
+            if subscriber.dropped and self._server is not None:
+                logger.info(f"Dropped slow event stream after {time.monotonic() - started:.0f}s")
+        finally:
+            self._subscribers.discard(subscriber)
@@ -0,0 +1,365 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from service import rollups
+from service import segments as segment_store
+
+logger = logging.getLogger(__name__)
+
+# A full state is written every KEYFRAME_EVERY samples (or KEYFRAME_MAX_AGE
+# seconds), so a range query never replays more than that many deltas
+KEYFRAME_EVERY = 100
+KEYFRAME_MAX_AGE = 6 * 3600
+# Writer: samples per transaction and seconds to wait for more
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 2.0
+PRUNE_INTERVAL = 24 * 3600
+
+_STOP = object()
+
+class _SegmentUpdate:
+    """Queued output of the SegmentEngine: closed segments plus its checkpoint."""
+    __slots__ = ("vin", "closed", "checkpoint")
+
+    def __init__(self, vin, closed, checkpoint):
+        self.vin = vin
+        self.closed = closed
+        self.checkpoint = checkpoint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    vin TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    keyframe INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_vin_ts ON samples (vin, ts);
+CREATE INDEX IF NOT EXISTS idx_samples_keyframes ON samples (vin, ts) WHERE keyframe = 1;
+"""
+
+def _apply(state, row_keyframe, data):
+    """Replay one stored row onto `state` (in place)."""
+    if row_keyframe:
+        state.clear()
+    for field, value in json.loads(data).items():
+        if value is None:
+            state.pop(field, None)
+        else:
+            state[field] = value
+
+def _replay(conn, vin, start, end):
+    """Yield (timestamp, state) for samples in [start, end]; `state` is reused between yields."""
+    origin = conn.execute(
+        "SELECT MAX(ts) FROM samples WHERE vin = ? AND keyframe = 1 AND ts <= ?", (vin, start)
+    ).fetchone()[0]
+    state = {}
+    for ts, keyframe, data in conn.execute(
+        "SELECT ts, keyframe, data FROM samples WHERE vin = ? AND ts >= ? AND ts <= ? ORDER BY ts, rowid",
+        (vin, origin if origin is not None else start, end),
+    ):
+        _apply(state, keyframe, data)
+        if ts >= start:
+            yield ts, state
+
+class TelemetryStore:
+    """
+    Append-only history of decoded vehicle state, per VIN, in SQLite (WAL).
+
+    Each sample stores only the fields that changed since the previous one
+    (a removed field is stored as null), with a full keyframe every
+    KEYFRAME_EVERY samples. Range queries seek to the last keyframe before
+    the range through the (vin, ts) index and replay forward from there.
+    Minute/hour/day aggregates of the numeric fields (see service.rollups)
+    are updated in the same transaction, so long-range charts and stats
+    never touch raw samples. Trips and charging sessions found by the
+    SegmentEngine are stored alongside (see service.segments).
+
+    record() only queues the sample; a background thread writes queued
+    samples in batches, one transaction each, and applies the retention
+    policy once a day. Queries open their own connection per thread and run
+    alongside the writer (WAL), so call them from a worker thread, not the
+    UI loop.
+    """
+    def __init__(self, path, retention_days=None):
+        self.path = os.path.expanduser(path)
+        self.retention_days = retention_days
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        # vin -> (state, samples since keyframe, keyframe ts, last ts); writer thread only
+        self._last = {}
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        # Only takes effect on a new database, and only before WAL is enabled
+        # (existing ones are converted once by the writer, see _run)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.executescript(SCHEMA + rollups.SCHEMA + segment_store.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # -- Writing --
+
+    def record(self, vin, state, timestamp=None):
+        """Queue a sample. Never blocks; safe from any thread."""
+        if not vin or not state:
+            return
+        self._ensure_writer()
+        self._queue.put((vin, dict(state), int(timestamp or time.time())))
+
+    def record_segments(self, vin, closed, checkpoint):
+        """Queue segments closed by a SegmentEngine and its latest state for the VIN."""
+        self._ensure_writer()
+        self._queue.put(_SegmentUpdate(vin, list(closed), checkpoint))
+
+    def attach(self, state_cache):
+        """Record every update of a VehicleStateCache; returns unsubscribe()."""
+        def on_update(vin, state, changed, timestamp):
+            self.record(vin, state, timestamp)
+        return state_cache.subscribe(on_update)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is on disk."""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join(timeout)
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="logue-telemetry", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            conn.executescript(SCHEMA + rollups.SCHEMA + segment_store.SCHEMA)
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Created without incremental vacuum, so pruning never gave
+                # space back; a full VACUUM applies the setting (once)
+                logger.info("Converting telemetry store to incremental vacuum")
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            self._backfill_rollups(conn)
+        except Exception as e:
+            logger.error(f"Telemetry store unavailable ({self.path}): {e}")
+            return
+        next_prune = 0
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch, barriers = [], []
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} telemetry item(s): {e}")
+                    self._last.clear() # Resync delta state from disk
+            if time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+                try:
+                    self._prune(conn)
+                except Exception as e:
+                    logger.error(f"Telemetry retention failed: {e}")
+            for barrier in barriers:
+                barrier.set()
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        rows = []
+        aggregates = rollups.RollupBatch()
+        closed, checkpoints = [], {}
+        for item in batch:
+            if isinstance(item, _SegmentUpdate):
+                closed.extend((item.vin, s) for s in item.closed)
+                checkpoints[item.vin] = item.checkpoint # Only the latest matters
+                continue
+            vin, state, ts = item
+            last = self._last.get(vin) or self._load_last(conn, vin)
+            previous, since_keyframe, keyframe_ts, last_ts = last
+            if last_ts is not None and ts < last_ts:
+                # Deltas are replayed in time order; an older sample can't be slotted in
+                logger.debug(f"Dropping out-of-order telemetry for {vin} ({ts} < {last_ts})")
+                continue
+            if ts == last_ts and previous == state:
+                continue # Same update delivered twice (e.g. a cache patch that changed nothing)
+            if previous is None or since_keyframe + 1 >= KEYFRAME_EVERY or ts - keyframe_ts >= KEYFRAME_MAX_AGE:
+                keyframe, data = 1, state
+                since_keyframe, keyframe_ts = 0, ts
+            else:
+                keyframe = 0
+                data = {k: v for k, v in state.items() if previous.get(k) != v}
+                for k in previous:
+                    if k not in state:
+                        data[k] = None
+                since_keyframe += 1
+            rows.append((vin, ts, keyframe, json.dumps(data, separators=(",", ":"))))
+            self._last[vin] = (state, since_keyframe, keyframe_ts, ts)
+            if ts != last_ts:
+                # A cache patch keeps the reading's timestamp: the row records
+                # the change, but it is not another sample to aggregate
+                aggregates.add(vin, ts, state)
+        with conn:
+            conn.executemany("INSERT INTO samples (vin, ts, keyframe, data) VALUES (?, ?, ?, ?)", rows)
+            aggregates.write(conn)
+            for vin, checkpoint in checkpoints.items():
+                segment_store.write(conn, vin, [s for v, s in closed if v == vin], checkpoint)
+
+    def _backfill_rollups(self, conn):
+        """Build rollups for history recorded before they existed."""
+        if conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone():
+            return
+        vins = [row[0] for row in conn.execute("SELECT DISTINCT vin FROM samples").fetchall()]
+        for vin in vins:
+            aggregates = rollups.RollupBatch()
+            last_ts = None
+            for ts, state in _replay(conn, vin, 0, 2 ** 62):
+                if ts != last_ts: # Same as _write_batch: patches aren't samples
+                    aggregates.add(vin, ts, state)
+                last_ts = ts
+            with conn:
+                aggregates.write(conn)
+        if vins:
+            logger.info(f"Built telemetry rollups for {len(vins)} vehicle(s)")
+
+    def _load_last(self, conn, vin):
+        """Rebuild a VIN's latest state from disk (first sample after a restart)."""
+        row = conn.execute(
+            "SELECT MAX(ts) FROM samples WHERE vin = ? AND keyframe = 1", (vin,)
+        ).fetchone()
+        if row[0] is None:
+            return None, 0, 0, None
+        keyframe_ts = row[0]
+        state, count, last_ts = {}, -1, keyframe_ts
+        for ts, keyframe, data in conn.execute(
+            "SELECT ts, keyframe, data FROM samples WHERE vin = ? AND ts >= ? ORDER BY ts, rowid",
+            (vin, keyframe_ts),
+        ):
+            _apply(state, keyframe, data)
+            count = 0 if keyframe else count + 1
+            last_ts = ts
+        return state, max(count, 0), keyframe_ts, last_ts
+
+    def _prune(self, conn):
+        """
+        Drop samples older than the retention period (keeping the keyframe the
+        rest replays from) and rollups past rollups.RETENTION.
+        """
+        removed = 0
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        with conn:
+            removed += rollups.prune(conn)
+            vins = conn.execute("SELECT DISTINCT vin FROM samples").fetchall() if cutoff else []
+            for (vin,) in vins:
+                keep_from = conn.execute(
+                    "SELECT MAX(ts) FROM samples WHERE vin = ? AND keyframe = 1 AND ts <= ?", (vin, cutoff)
+                ).fetchone()[0]
+                if keep_from is not None:
+                    removed += conn.execute("DELETE FROM samples WHERE vin = ? AND ts < ?", (vin, keep_from)).rowcount
+        if removed:
+            conn.execute("PRAGMA incremental_vacuum")
+            logger.info(f"Telemetry retention removed {removed} row(s)")
+
+    # -- Queries --
+
+    def history(self, vin, start=None, end=None, fields=None):
+        """
+        Reconstructed samples for a VIN between start and end (unix seconds,
+        inclusive) as a list of (timestamp, state). With `fields`, each state
+        only holds those fields.
+        """
+        return list(self.iter_history(vin, start, end, fields))
+
+    def iter_history(self, vin, start=None, end=None, fields=None):
+        """Like history(), but yields samples as they are read (for exports)."""
+        start = int(start or 0)
+        end = int(end) if end is not None else 2 ** 62
+        for ts, state in _replay(self._reader(), vin, start, end):
+            if fields:
+                yield ts, {f: state[f] for f in fields if f in state}
+            else:
+                yield ts, dict(state)
+
+    def series(self, vin, field, start=None, end=None):
+        """(timestamp, value) of one field at every sample where it is known."""
+        return [(ts, s[field]) for ts, s in self.history(vin, start, end, fields=(field,)) if field in s]
+
+    def rollup(self, vin, field, start, end=None, points=60, resolution=None):
+        """
+        Aggregated history of one of rollups.ROLLUP_FIELDS, as (resolution,
+        buckets). Unless a resolution is given, the coarsest one that still
+        gives about `points` buckets over the window is used, so a year of
+        data is a few hundred rows.
+        """
+        end = int(end if end is not None else time.time())
+        resolution = resolution or rollups.pick_resolution(start, end, points)
+        return resolution, rollups.query(self._reader(), vin, field, int(start), end, resolution)
+
+    def segments(self, vin, start, end=None, kind=None):
+        """Closed trips / charging sessions starting between start and end."""
+        end = int(end if end is not None else time.time())
+        return segment_store.query(self._reader(), vin, int(start), end, kind)
+
+    def segment_totals(self, vin, start, end=None, period="day"):
+        """Trip and charging totals per day or week (see segments.totals)."""
+        end = int(end if end is not None else time.time())
+        return segment_store.totals(self._reader(), vin, int(start), end, period)
+
+    def segment_checkpoint(self, vin):
+        return segment_store.load_checkpoint(self._reader(), vin)
+
+    def latest(self, vin):
+        """Most recent recorded (state, timestamp), or (None, None)."""
+        state, _, _, last_ts = self._load_last(self._reader(), vin)
+        return state, last_ts
+
+    def span(self, vin):
+        """(first, last) timestamps recorded for a VIN, or (None, None)."""
+        return tuple(self._reader().execute(
+            "SELECT MIN(ts), MAX(ts) FROM samples WHERE vin = ?", (vin,)
+        ).fetchone())
+
+    def vins(self):
+        return [row[0] for row in self._reader().execute("SELECT DISTINCT vin FROM samples")]
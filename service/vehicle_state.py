@@ -0,0 +1,83 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tire positions as reported under tireStatus
+TIRE_POSITIONS = ["frontLeft", "frontRight", "rearLeft", "rearRight"]
+
+# Fields the dashboard shadow doesn't report; they are tracked locally from
+# commands this app sent and carried forward across dashboard updates
+LOCAL_FIELDS = ["lock_state"]
+
+def _to_number(value):
+    """Parse a reported value into int/float, or None if it isn't numeric."""
+    if value is None or value == "":
+        return None
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(num) if num.is_integer() else num
+
+def vin_from_topic(topic):
+    """Extract the VIN from a $aws/things/thing_<VIN>/shadow/... topic."""
+    for part in topic.split("/"):
+        if part.startswith("thing_"):
+            return part[len("thing_"):]
+    return None
+
+def decode_dashboard(data):
+    """
+    Flatten a DASHBOARD_ASYNC shadow document into the handful of fields the
+    app actually uses. Missing values are left out so the result stays small
+    enough to persist and diff cheaply.
+    """
+    reported = data.get("state", {}).get("reported", {})
+    # Data is inside reported -> responseBody
+    rb = reported.get("responseBody", {})
+
+    ev_status = rb.get("evStatus", {})
+    odometer_data = rb.get("odometer", {})
+    tire_status = rb.get("tireStatus", {})
+    charge_mode = rb.get("getChargeMode", {})
+    charge_time = rb.get("hvBatteryChargeCompleteTime", {})
+
+    state = {
+        # Battery & Range
+        "soc": _to_number(ev_status.get("soc")),
+        "range": _to_number(ev_status.get("evRange")),
+        "charge_status": ev_status.get("chargeStatus"),
+        "plug_status": ev_status.get("plugStatus"),
+        # Charging type/voltage
+        "charge_mode": ev_status.get("chargeMode"),
+        "charger_power_level": rb.get("chargerPowerLevel", {}).get("value"),
+        "charge_mode_type": charge_mode.get("chargeModeType", {}).get("value"),
+        "target_level": _to_number(charge_mode.get("generalAwayTargetChargeLevel", {}).get("value")),
+        "ac_voltage": _to_number(charge_mode.get("chargeModeAcVoltage", {}).get("value")),
+        "ac_amperage": _to_number(charge_mode.get("chargeModeAcAmperage", {}).get("value")),
+        # ETA as reported by the car
+        "eta_day": charge_time.get("hvBatteryChargeCompleteDay", {}).get("value"),
+        "eta_hour": charge_time.get("hvBatteryChargeCompleteHour", {}).get("value"),
+        "eta_minute": charge_time.get("hvBatteryChargeCompleteMinute", {}).get("value"),
+        # Odometer
+        "odometer": _to_number(odometer_data.get("value")),
+        "odometer_unit": odometer_data.get("unit"),
+        # Climate (getChargeMode -> cabinPrecondRequest, e.g. "OFF")
+        "climate": charge_mode.get("cabinPrecondRequest", {}).get("value"),
+    }
+
+    # Tire pressures (kPa)
+    for pos in TIRE_POSITIONS:
+        state[f"tire_{pos}"] = _to_number(tire_status.get(pos, {}).get("pressureData", {}).get("value"))
+
+    return {k: v for k, v in state.items() if v is not None}
+
+def is_plugged_in(state):
+    plug_status = state.get("plug_status")
+    charge_status = state.get("charge_status")
+    return plug_status in ["plugged", "CONNECTED", "connected"] or \
+        bool(charge_status and charge_status.lower() in ["charging", "plugged", "connected"])
+
+def is_charging(state):
+    charge_status = state.get("charge_status")
+    return bool(charge_status and charge_status.lower() == "charging")
@@ -0,0 +1,145 @@
+import flet as ft
+import flet.canvas as cv
+import time
+from service.charge_history import SESSION_GAP
+from service.downsample import lttb
+
+# Days covered by the "7D" view
+WEEK = 7 * 86400
+
+class ChargeChart(ft.Column):
+    """
+    SoC (green, 0-100%) and charging power (amber, scaled to the session's
+    peak) over one charging session, stepping back through past sessions,
+    or over the last week. Both curves are reduced with LTTB to about one
+    point per pixel of chart width before being sent to the client.
+    """
+    def __init__(self, charge_history, height=70):
+        super().__init__(spacing=4)
+        self.charge_history = charge_history
+        self.chart_height = height
+        self.chart_width = 300 # Until the canvas reports its size
+        self.vin = None
+        self.week = False
+        self.offset = 0 # Sessions back from the latest
+
+        self.title = ft.Text("No charging history yet", size=12, color=ft.Colors.WHITE_70, expand=True)
+        self.prev_button = ft.IconButton(ft.icons.Icons.CHEVRON_LEFT, icon_size=18, on_click=self.show_older, tooltip="Earlier session")
+        self.next_button = ft.IconButton(ft.icons.Icons.CHEVRON_RIGHT, icon_size=18, on_click=self.show_newer, tooltip="Later session")
+        self.mode_button = ft.TextButton("7D", on_click=self.toggle_week)
+        self.canvas = cv.Canvas(shapes=[], height=height, expand=True, on_resize=self.on_resize, resize_interval=200)
+        self.start_label = ft.Text("", size=10, color="secondary")
+        self.end_label = ft.Text("", size=10, color="secondary")
+
+        self.controls = [
+            ft.Row([self.prev_button, self.title, self.next_button, self.mode_button], spacing=0),
+            ft.Container(self.canvas, height=height),
+            ft.Row([
+                self.start_label,
+                ft.Container(expand=True),
+                ft.Text("SoC", size=10, color=ft.Colors.GREEN_400),
+                ft.Text("kW", size=10, color=ft.Colors.AMBER_300),
+                ft.Container(expand=True),
+                self.end_label
+            ], spacing=6),
+        ]
+
+    def show(self, vin, update=False):
+        """Draw a VIN's history (latest session when the VIN changes)."""
+        if vin != self.vin:
+            self.vin = vin
+            self.offset = 0
+        self.redraw(update)
+
+    def on_resize(self, e):
+        width = getattr(e, "width", None)
+        if width and abs(width - self.chart_width) >= 1:
+            self.chart_width = width
+            self.redraw()
+
+    def show_older(self, e):
+        self.offset += 1
+        self.redraw()
+
+    def show_newer(self, e):
+        self.offset = max(0, self.offset - 1)
+        self.redraw()
+
+    def toggle_week(self, e):
+        self.week = not self.week
+        self.mode_button.text = "Session" if self.week else "7D"
+        self.redraw()
+
+    def _select(self):
+        if not self.vin:
+            return [], 0
+        if self.week:
+            return self.charge_history.samples(self.vin, start=time.time() - WEEK), 0
+        sessions = self.charge_history.sessions(self.vin)
+        self.offset = min(self.offset, max(0, len(sessions) - 1))
+        if not sessions:
+            return [], 0
+        return sessions[-1 - self.offset], len(sessions)
+
+    def redraw(self, update=True):
+        samples, session_count = self._select()
+        self.prev_button.disabled = self.week or self.offset >= session_count - 1
+        self.next_button.disabled = self.week or self.offset == 0
+
+        if len(samples) < 2:
+            self.canvas.shapes = []
+            self.title.value = "No charging history yet" if not samples else "Waiting for more data..."
+            self.start_label.value = self.end_label.value = ""
+        else:
+            self._draw(samples)
+            first, last = samples[0], samples[-1]
+            peak = max(s[2] for s in samples)
+            if self.week:
+                self.title.value = "Last 7 days"
+            else:
+                self.title.value = f"{time.strftime('%a %I:%M %p', time.localtime(first[0]))} · {first[1]:.0f}% → {last[1]:.0f}%"
+            if peak:
+                self.title.value += f" · {peak:.1f} kW peak"
+            fmt = "%a %I %p" if self.week else "%I:%M %p"
+            self.start_label.value = time.strftime(fmt, time.localtime(first[0]))
+            self.end_label.value = time.strftime(fmt, time.localtime(last[0]))
+        if update:
+            self.update()
+
+    def _draw(self, samples):
+        width, height = max(self.chart_width, 10), self.chart_height
+        t0, t1 = samples[0][0], samples[-1][0]
+        span = max(t1 - t0, 1)
+        threshold = max(3, int(width))
+        peak = max(s[2] for s in samples) or 1
+
+        def x(ts):
+            return (ts - t0) / span * width
+
+        soc = lttb([(s[0], s[1]) for s in samples], threshold)
+        power = lttb([(s[0], s[2]) for s in samples], threshold)
+
+        soc_line = self._path(soc, x, lambda v: height - v / 100 * height)
+        power_line = self._path(power, x, lambda v: height - v / peak * height * 0.9)
+        # Area under the SoC curve
+        soc_fill = [cv.Path.MoveTo(x(soc[0][0]), height)] + [cv.Path.LineTo(x(t), height - v / 100 * height) for t, v in soc]
+        soc_fill += [cv.Path.LineTo(x(soc[-1][0]), height), cv.Path.Close()]
+
+        self.canvas.shapes = [
+            cv.Line(0, height, width, height, paint=ft.Paint(color=ft.Colors.WHITE_10, stroke_width=1)),
+            cv.Path(soc_fill, paint=ft.Paint(color=ft.Colors.with_opacity(0.15, ft.Colors.GREEN_400), style=ft.PaintingStyle.FILL)),
+            cv.Path(power_line, paint=ft.Paint(color=ft.Colors.AMBER_300, stroke_width=1.5, style=ft.PaintingStyle.STROKE)),
+            cv.Path(soc_line, paint=ft.Paint(color=ft.Colors.GREEN_400, stroke_width=2, style=ft.PaintingStyle.STROKE)),
+        ]
+
+    def _path(self, points, x, y):
+        """Polyline through the points, lifting the pen over gaps in the data."""
+        elements = []
+        previous = None
+        for t, v in points:
+            if previous is None or t - previous > SESSION_GAP:
+                elements.append(cv.Path.MoveTo(x(t), y(v)))
+            else:
+                elements.append(cv.Path.LineTo(x(t), y(v)))
+            previous = t
+        return elements
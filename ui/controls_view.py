@@ -1,7 +1,10 @@
 import flet as ft
-from service.api import HondaApi
 import threading
 from service.auth import AuthService
+from service.commands import get_command
+from service.command_dispatcher import CommandDispatcher, CommandRejected
+from service.outbox import is_connectivity_error
+from ui.overlay_manager import OverlayManager
 
 class CounterControl(ft.Row):
     def __init__(self, value, min_value, max_value, step, unit, on_change=None):
@@ -44,13 +47,20 @@ class CounterControl(ft.Row):
         return self.current_value
 
 class ControlsView(ft.Column): # Changed from Card to Column for transparency
-    def __init__(self, page, auth_service: AuthService, mqtt_client, on_refresh=None):
+    def __init__(self, page, auth_service: AuthService, mqtt_client, on_refresh=None, overlays: OverlayManager = None, state_cache=None, outbox=None):
         super().__init__()
         self.main_page = page
+        self.state_cache = state_cache # Shared per-VIN state, for locally tracked fields
+        self.overlays = overlays or OverlayManager(page)
         self.auth_service = auth_service
         self.mqtt_client = mqtt_client
         self.on_refresh = on_refresh
+        self.outbox = outbox # Failed-for-connectivity commands are queued here
+        # Shared per account: duplicate taps join the in-flight command
+        self.dispatcher = CommandDispatcher.for_account(auth_service)
         self.current_climate_status = "OFF"
+        self._polling = False # Only one aggressive polling loop at a time
+        self._polling_target = None
         self.spacing = 15
         self.use_metric = False
         
@@ -150,8 +160,11 @@ class ControlsView(ft.Column): # Changed from Card to Column for transparency
             ink=True
         )
 
-    def _show_confirm_dialog(self, action_name, action_callback, require_pin=True):
-        
+    def _show_confirm_dialog(self, command_key, params_fn=None):
+        command = get_command(command_key)
+        action_name = command.label
+        require_pin = command.requires_pin
+
         content_controls = [ft.Text("Please confirm to execute this command.")]
         pin_input = None
 
@@ -161,9 +174,7 @@ class ControlsView(ft.Column): # Changed from Card to Column for transparency
         
         def close_dlg(e):
             print(f"DEBUG: Closing dialog for {action_name}")
-            dlg.open = False
-            self.main_page.update()
-            # self.main_page.overlay.remove(dlg) # Optional cleanup, likely safe to leave or remove later
+            self.overlays.close_dialog(dlg)
 
         def submit_action(e):
             pin = pin_input.value if pin_input else None
@@ -175,23 +186,18 @@ class ControlsView(ft.Column): # Changed from Card to Column for transparency
             close_dlg(e)
             # Run async action
             target = self._get_target_status(action_name)
-            self.main_page.run_task(self.perform_action, action_name, action_callback, pin, target)
-
-        dlg = ft.AlertDialog(
-            modal=True,
-            title=ft.Text(f"Confirm {action_name}"),
-            content=ft.Column(content_controls, height=100 if require_pin else 50),
-            actions=[
+            params = params_fn() if params_fn else None
+            self.main_page.run_task(self.perform_action, command_key, pin, params, target)
+
+        # Pooled dialog, evicted from the overlay once closed
+        dlg = self.overlays.show_dialog(
+            f"Confirm {action_name}",
+            ft.Column(content_controls, height=100 if require_pin else 50),
+            [
                 ft.TextButton("Cancel", on_click=close_dlg),
                 ft.TextButton("Execute", on_click=submit_action),
             ],
-            actions_alignment=ft.MainAxisAlignment.END,
         )
-
-        # Use overlay as fallback since page.open/page.dialog are missing
-        self.main_page.overlay.append(dlg)
-        dlg.open = True
-        self.main_page.update()
         
         # Pre-fill if available in auth service storage
         if require_pin:
@@ -204,60 +210,71 @@ class ControlsView(ft.Column): # Changed from Card to Column for transparency
         return None
 
     async def _prefill_pin(self, pin_input):
-        stored_pin = await self.auth_service.storage.get("honda_pin")
+        # Decrypted and cached at login, no storage round trip
+        stored_pin = self.auth_service.settings.get("pin")
         if stored_pin:
             pin_input.value = stored_pin
             self.main_page.update()
 
-    async def perform_action(self, name, callback, pin, target_status=None):
-        # Show loading
-        loading_snack = ft.SnackBar(ft.Text(f"Sending {name} command..."), duration=30000) # Long duration until replaced
-        self.main_page.overlay.append(loading_snack)
-        loading_snack.open = True
-        self.main_page.update()
-        
-        # Run blocking API call in executor to avoid freezing UI
-        # HondaApi uses requests which is blocking.
-        # Check if callback is async. It's currently sync.
-        
-        def thread_target():
-             try:
-                # Ensure we have VIN and Token
-                if not self.auth_service.access_token:
-                    raise Exception("Not authenticated")
-                callback(pin)
-                return True, None
-             except Exception as e:
-                print(f"DEBUG: perform_action error: {e}")
-                return False, str(e)
-                
-        # Run in thread
-        import asyncio
-        loop = asyncio.get_running_loop()
-        success, error = await loop.run_in_executor(None, thread_target)
-        
-        # Close loading snackbar
-        loading_snack.open = False
-        
+    async def perform_action(self, command_key, pin, params=None, target_status=None):
+        vin = self.auth_service.selected_vin
+        command = get_command(command_key)
+        name = command.label
+
+        # The dispatcher sends on its own worker threads (HondaApi is blocking).
+        # An identical command already in flight is joined instead of re-sent.
+        joined = False
+        try:
+            future, joined = self.dispatcher.submit(vin, command_key, pin, params)
+            # Show loading
+            message = f"{name} already in progress..." if joined else f"Sending {name} command..."
+            self.overlays.show_snackbar(message, duration=30000) # Long duration until replaced
+            import asyncio
+            await asyncio.wrap_future(future)
+            success, error = True, None
+        except CommandRejected as e:
+            success, error = False, str(e)
+        except Exception as e:
+            if self.outbox and is_connectivity_error(e):
+                # Offline: park it and let the outbox replay it later
+                await self.outbox.enqueue(vin, command_key, pin, params)
+                self.overlays.show_snackbar(f"No connection. {name} queued and will be sent when back online.", bgcolor=ft.Colors.AMBER_800)
+                return
+            print(f"DEBUG: perform_action error: {e}")
+            success, error = False, str(e)
+
+        # Result replaces the loading snackbar
         if success:
-             snack = ft.SnackBar(ft.Text(f"{name} command sent successfully!"), bgcolor="green")
-             # Start aggressive polling to update status
-             if self.on_refresh:
+             self.overlays.show_snackbar(f"{name} command sent successfully!", bgcolor="green")
+             # The dashboard shadow has no lock status, so remember what we sent
+             if self.state_cache and command.lock_state:
+                 self.state_cache.patch(vin, {"lock_state": command.lock_state})
+             # Start aggressive polling to update status; joined callers leave it to the first one
+             if self.on_refresh and not joined:
                  self.main_page.run_task(self.start_polling, target_status)
         else:
-             snack = ft.SnackBar(ft.Text(f"{name} failed: {error}"), bgcolor="red")
-            
-        # self.main_page.snack_bar = snack
-        # self.main_page.snack_bar.open = True
-        self.main_page.overlay.append(snack)
-        snack.open = True
-        self.main_page.update()
+             self.overlays.show_snackbar(f"{name} failed: {error}", bgcolor="red")
 
     async def start_polling(self, target_status=None):
+        if self._polling:
+            # Already polling for an earlier command; just retarget it
+            if target_status:
+                self._polling_target = target_status
+            return
+        self._polling = True
+        self._polling_target = target_status
+        try:
+            await self._poll_loop()
+        finally:
+            self._polling = False
+
+    async def _poll_loop(self):
         import asyncio
+        target_status = self._polling_target
         print(f"DEBUG: Starting aggressive polling. Target: {target_status}, Current: {self.current_climate_status}")
         # Poll every 5 seconds for 60 seconds
         for i in range(12):
+            target_status = self._polling_target
             # Check if we reached target before waiting
             if target_status and self.current_climate_status == target_status:
                 print(f"DEBUG: Target status '{target_status}' reached. Stopping polling.")
@@ -284,77 +301,31 @@ class ControlsView(ft.Column): # Changed from Card to Column for transparency
                 break
 
     def _handle_start_click(self, e):
-        self._show_confirm_dialog("Start Climate", self.start_climate)
+        self._show_confirm_dialog("climate_start", self._climate_params)
 
     def _handle_stop_click(self, e):
-        self._show_confirm_dialog("Stop Climate", self.stop_climate)
+        self._show_confirm_dialog("climate_stop")
 
     def _handle_lights_click(self, e):
-        self._show_confirm_dialog("Flash Lights", self.flash_lights)
+        self._show_confirm_dialog("lights")
 
     def _handle_horn_click(self, e):
-        self._show_confirm_dialog("Sound Horn", self.sound_horn)
+        self._show_confirm_dialog("horn")
 
     def _handle_lock_click(self, e):
-        self._show_confirm_dialog("Lock Doors", self.lock_doors)
+        self._show_confirm_dialog("lock")
 
     def _handle_unlock_click(self, e):
-        self._show_confirm_dialog("Unlock Doors", self.unlock_doors)
+        self._show_confirm_dialog("unlock")
 
-    def start_climate(self, pin):
+    def _climate_params(self):
         temp = self.temp_control.value
         # If metric is used, translate Celsius to Fahrenheit for the API since it expects it in this range
         if self.use_metric:
             temp = int(round((temp * 9.0 / 5.0) + 32))
         else:
             temp = int(temp)
-            
-        return HondaApi.request_start_climate(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            temp
-        )
-
-    def stop_climate(self, pin):
-        return HondaApi.request_stop_climate(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            72 # Dummy temp
-        )
-
-    def flash_lights(self, pin):
-        return HondaApi.request_light_horn(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            "lgt"
-        )
-
-    def sound_horn(self, pin):
-        return HondaApi.request_light_horn(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            "hrn"
-        )
-
-    def lock_doors(self, pin):
-        return HondaApi.request_door_lock(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            "alk"
-        )
-
-    def unlock_doors(self, pin):
-        return HondaApi.request_door_lock(
-            self.auth_service.access_token,
-            self.auth_service.selected_vin,
-            pin,
-            "dulk"
-        )
+        return {"temperature": temp}
 
     # Removed non-functional buttons logic
 
@@ -1,16 +1,33 @@
 import flet as ft
 from service.auth import AuthService
-from service.mqtt_client import AwsMqttClient
 from service.api import HondaApi
+from service.session_pool import MqttSessionPool
+from service.state_cache import VehicleStateCache
+from service.snapshot_store import SnapshotStore, describe_age
+from service.outbox import CommandOutbox
+from service.charge_history import ChargeHistory
+from service import charge_analytics
+from service.alerts import AlertEngine, rules_from_settings
+from service import export
+from service.commands import get_command
+from service.vehicle_state import is_plugged_in, is_charging
 from ui.controls_view import ControlsView
+from ui.overlay_manager import OverlayManager
+from ui.fleet_view import FleetView
+from ui.charge_chart import ChargeChart
+from service.config import Config
+from service.startup_trace import startup_trace
+from service.fleet_index import vehicle_display_name
 import threading
-import json
 import time
+import logging
 
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 class DashboardView(ft.Container):
-    def __init__(self, page, auth_service: AuthService, on_logout):
+    def __init__(self, page, auth_service: AuthService, on_logout, snapshots: SnapshotStore = None, session_pool: MqttSessionPool = None, outbox: CommandOutbox = None, charge_history: ChargeHistory = None, alerts: AlertEngine = None, telemetry=None):
         super().__init__(expand=True)
         self.main_page = page
         self.auth_service = auth_service
@@ -18,7 +35,44 @@ class DashboardView(ft.Container):
         self.mqtt_client = None
         self.is_connected = False
         self.use_metric = False # Initialized in did_mount
-        self.last_api_data = None
+        self.last_state = None # Decoded state currently on screen
+        self.last_state_cached_at = None # Set while showing a persisted snapshot
+        self.last_climate_data = None
+        self.snapshots = snapshots or SnapshotStore(auth_service.storage)
+        # Warm per-VIN MQTT sessions; the selected vehicle's client is just a
+        # pointer into this pool
+        self.session_pool = session_pool or MqttSessionPool(auth_service, VehicleStateCache())
+        self.state_cache = self.session_pool.state_cache
+        self._unsubscribe_state = None
+        # Commands waiting for connectivity (or a scheduled time)
+        self.outbox = outbox or CommandOutbox(auth_service.storage, auth_service, self.state_cache)
+        self._unsubscribe_outbox = None
+        # Recent SoC / charging power for the charging chart
+        self._unsubscribe_charge_history = None
+        if charge_history is None:
+            charge_history = ChargeHistory()
+            self._unsubscribe_charge_history = charge_history.attach(self.state_cache)
+        self.charge_history = charge_history
+        # Alert rules evaluated on every update (tire colours, snackbars)
+        self._detach_alerts = None
+        if alerts is None:
+            alerts = AlertEngine()
+            self._detach_alerts = alerts.attach(self.state_cache)
+        self.alerts = alerts
+        self._unsubscribe_alerts = None
+        # Local telemetry history (TelemetryStore), used for exports
+        self.telemetry = telemetry
+        self.fleet_view = None
+        # Shared pool of dialogs/snackbars for this view and its controls
+        self.overlays = OverlayManager(page)
+        self._build_started = time.perf_counter()
+
+        # Below-the-fold sections are built lazily after the hero is on screen
+        # (see _mount_sections). Until then these stay None.
+        self.charging_card = None
+        self.charge_chart = None
+        self.controls_view = None
+        self.tire_section_container = None
         
         # UI Elements
         self.vehicle_name = self.auth_service.get_vehicle_name()
@@ -29,6 +83,12 @@ class DashboardView(ft.Container):
         self.odometer_text = ft.Text("-- miles", size=18, weight="w600")
         self.status_text = ft.Text("Connecting...", italic=True, size=12, color="secondary")
         self.last_updated = ft.Text("Last Updated: Never", size=12, color="secondary")
+        self.outbox_text = ft.Text("", size=12, color=ft.Colors.AMBER_300)
+        self.outbox_indicator = ft.Container(
+            ft.Row([ft.Icon(ft.icons.Icons.SCHEDULE_SEND, size=14, color=ft.Colors.AMBER_300), self.outbox_text], spacing=4),
+            on_click=self.open_outbox,
+            visible=False
+        )
 
         # Tire Pressure UI (Modernized)
         self.tire_pressures = {
@@ -37,30 +97,36 @@ class DashboardView(ft.Container):
             "rearLeft": ft.Text("-- PSI", weight="bold"),
             "rearRight": ft.Text("-- PSI", weight="bold")
         }
+
+        # Assemble Main Layout: only the hero (header, battery, status) is
+        # built up front so the first frame after login is cheap.
+        self.hero_section = self._build_hero_section()
         
-        def tire_card(label, control):
-            return ft.Container(
-                content=ft.Column([
-                    ft.Text(label, size=12, color="secondary"),
-                    control
-                ], horizontal_alignment="center", spacing=2),
-                padding=10,
-                border=ft.Border.all(1, ft.Colors.WHITE_10),
-                border_radius=10,
-                expand=True
-            )
+        # Main Layout with ListView. Each section is its own list item so the
+        # ListView only lays out the ones scrolled into view.
+        self.list_view = ft.ListView(
+            expand=True,
+            padding=ft.padding.only(top=50, left=20, right=20, bottom=20),
+            spacing=10,
+            controls=[
+                self.hero_section
+            ]
+        )
 
-        self.tires_grid = ft.Column([
-            ft.Row([
-                tire_card("Front Left", self.tire_pressures["frontLeft"]),
-                tire_card("Front Right", self.tire_pressures["frontRight"]),
-            ], spacing=10),
-            ft.Row([
-                tire_card("Rear Left", self.tire_pressures["rearLeft"]),
-                tire_card("Rear Right", self.tire_pressures["rearRight"]),
-            ], spacing=10),
-        ], spacing=10)
+        self.gradient = ft.LinearGradient(
+            begin=ft.Alignment.TOP_CENTER,
+            end=ft.Alignment.BOTTOM_CENTER,
+            colors=["#1a1b1e", "#000000"]
+        )
+        self.content = self.list_view
 
+        # Draw the last known state straight into the first frame if main
+        # already has this VIN's snapshot in memory
+        state, cached_at = self.snapshots.peek(self.auth_service.selected_vin)
+        if state:
+            self.render_state(state, cached_at=cached_at, update=False)
+
+    def _build_hero_section(self):
         # Hero Section (Battery & Range)
         # Battery Shape Implementation
         self.battery_progress = ft.ProgressBar(
@@ -158,14 +224,17 @@ class DashboardView(ft.Container):
         )
 
         # Vehicle Selection Header
-        if len(self.auth_service.vehicles) > 1:
+        # Small accounts get a dropdown; fleets use the (virtualized) fleet
+        # overview instead of building hundreds of dropdown options
+        self.vehicle_dropdown = None
+        is_fleet = len(self.auth_service.vehicles) > Config.FLEET_DROPDOWN_LIMIT
+        if len(self.auth_service.vehicles) > 1 and not is_fleet:
             options = []
             for v in self.auth_service.vehicles:
-                display_name = f"{v.get('ModelYear')} {v.get('DivisionName')} {v.get('ModelCode')}"
+                display_name = vehicle_display_name(v)
                 options.append(ft.dropdown.Option(key=v.get('VIN'), text=display_name))
             
-            self.vehicle_header = ft.Row([
-                ft.Dropdown(
+            self.vehicle_dropdown = ft.Dropdown(
                     options=options,
                     value=self.auth_service.selected_vin,
                     expand=True,
@@ -175,10 +244,11 @@ class DashboardView(ft.Container):
                     on_select=self.on_vehicle_change,
                     content_padding=5
                 )
-            ], alignment=ft.MainAxisAlignment.CENTER)
+            self.vehicle_header = ft.Row([self.vehicle_dropdown], alignment=ft.MainAxisAlignment.CENTER)
         else:
+            self.vehicle_name_text = ft.Text(self.vehicle_name, size=20, weight="bold", color=ft.Colors.CYAN_200, font_family="Roboto Mono")
             self.vehicle_header = ft.Row([
-                ft.Text(self.vehicle_name, size=20, weight="bold", color=ft.Colors.CYAN_200, font_family="Roboto Mono")
+                ft.Container(self.vehicle_name_text, on_click=self.open_fleet_view if is_fleet else None)
             ], alignment=ft.MainAxisAlignment.CENTER)
 
         # Header Row
@@ -187,6 +257,13 @@ class DashboardView(ft.Container):
                 self.vehicle_header,
                 ft.Row([
                     ft.Container(expand=True),
+                    ft.IconButton(
+                        icon=ft.icons.Icons.VIEW_LIST,
+                        icon_color=ft.Colors.WHITE_54,
+                        tooltip="Fleet Overview",
+                        on_click=self.open_fleet_view,
+                        visible=len(self.auth_service.vehicles) > 1
+                    ),
                     ft.IconButton(
                         icon=ft.icons.Icons.REFRESH,
                         icon_color=ft.Colors.WHITE_54,
@@ -210,9 +287,24 @@ class DashboardView(ft.Container):
             spacing=0  # Reduced from 5 to 0
         )
 
+        return ft.Column([
+            header_row,
+            ft.Container(height=10),
+            battery_indicator,
+            ft.Container(height=10),
+            ft.Row([
+                self.status_text,
+                self.last_updated,
+                self.outbox_indicator
+            ], alignment=ft.MainAxisAlignment.CENTER, spacing=10),
+            ft.Container(height=5)
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=0)
+
+    def _build_charging_card(self):
         # Charging Status Card (Mockup Style)
         # Gradient border effect using Container with gradient background and padding
-        self.charging_card = ft.Container(
+        self.charge_chart = ChargeChart(self.charge_history)
+        return ft.Container(
             content=ft.Column([
                 ft.Row([
                     ft.Text("CHARGING STATUS", size=12, weight="bold", color=ft.Colors.WHITE_70),
@@ -221,11 +313,10 @@ class DashboardView(ft.Container):
                 ]),
                 ft.Container(height=5),
                 ft.Row([
-                    self.charge_status_text,
-                    ft.Container(expand=True),
-                    # Graphic for charging curve could go here, simplified for now
-                    ft.Icon(ft.icons.Icons.GRAPHIC_EQ, color=ft.Colors.GREEN_400, size=30, opacity=0.5) 
+                    self.charge_status_text
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                # SoC / power curve of the current or a past session
+                self.charge_chart,
                 ft.Divider(color=ft.Colors.WHITE_10, height=20),
                 ft.Row([
                     self.charge_details_text
@@ -247,14 +338,39 @@ class DashboardView(ft.Container):
             )
         )
 
+    def _build_controls_view(self):
         # Climate Control Section
-        # Climate Control Section
-        self.controls_view = ControlsView(page, self.auth_service, self.mqtt_client, on_refresh=self.refresh_data)
-        self.controls_view.update_units(self.use_metric)
+        controls_view = ControlsView(self.main_page, self.auth_service, self.mqtt_client, on_refresh=self.refresh_data, overlays=self.overlays, state_cache=self.state_cache, outbox=self.outbox)
+        controls_view.update_units(self.use_metric)
+        return controls_view
+
+    def _build_tire_section(self):
+        def tire_card(label, control):
+            return ft.Container(
+                content=ft.Column([
+                    ft.Text(label, size=12, color="secondary"),
+                    control
+                ], horizontal_alignment="center", spacing=2),
+                padding=10,
+                border=ft.Border.all(1, ft.Colors.WHITE_10),
+                border_radius=10,
+                expand=True
+            )
+
+        self.tires_grid = ft.Column([
+            ft.Row([
+                tire_card("Front Left", self.tire_pressures["frontLeft"]),
+                tire_card("Front Right", self.tire_pressures["frontRight"]),
+            ], spacing=10),
+            ft.Row([
+                tire_card("Rear Left", self.tire_pressures["rearLeft"]),
+                tire_card("Rear Right", self.tire_pressures["rearRight"]),
+            ], spacing=10),
+        ], spacing=10)
 
         # Vehicle Image / Tire Pressure Section
         # This mirrors the bottom of the mockup
-        self.tire_section_container = ft.Container(
+        return ft.Container(
             content=ft.Column([
                 ft.Text("TIRE PRESSURE", size=12, weight="bold", color=ft.Colors.WHITE_70),
                 ft.Container(height=10),
@@ -271,57 +387,88 @@ class DashboardView(ft.Container):
             border=ft.Border.all(1, ft.Colors.WHITE_10)
         )
 
-        # Assemble Main Layout
-        self.hero_section = ft.Container(
-            content=ft.Column([
-                header_row,
-                ft.Container(height=10),
-                battery_indicator,
-                ft.Container(height=10),
-                ft.Row([
-                    self.status_text,
-                    self.last_updated
-                ], alignment=ft.MainAxisAlignment.CENTER, spacing=10),
-                ft.Container(height=15),
-                self.charging_card,
-                ft.Container(height=10),
-                # Climate Control is injected via ControlsView
-                self.controls_view, 
-                ft.Container(height=10),
-                self.tire_section_container,
-                ft.Container(height=10)
-            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=0),
-            padding=ft.padding.only(top=50, left=20, right=20, bottom=20),
-            gradient=ft.LinearGradient(
-                begin=ft.Alignment.TOP_CENTER,
-                end=ft.Alignment.BOTTOM_CENTER,
-                colors=["#1a1b1e", "#000000"]
-            )
-        )
-        
-        # Main Layout with ListView
-        self.list_view = ft.ListView(
-            expand=True,
-            padding=0,
-            controls=[
-                self.hero_section
-            ]
-        )
+    async def _mount_sections(self):
+        """
+        Build the below-the-fold sections one at a time after the hero has
+        been painted, yielding to the event loop between each so input and
+        the first MQTT/status updates are not held up.
+        """
+        logger.info(f"Dashboard first paint after {(time.perf_counter() - self._build_started) * 1000:.0f} ms")
 
-        self.content = self.list_view
+        builders = [
+            ("charging_card", self._build_charging_card),
+            ("controls_view", self._build_controls_view),
+            ("tire_section_container", self._build_tire_section),
+        ]
+        for attr, build in builders:
+            await asyncio.sleep(0)
+            section = build()
+            setattr(self, attr, section)
+            self.list_view.controls.append(section)
+            self.list_view.update()
+
+        # Sections built after data arrived need the current state applied
+        self._rerender()
+        self.page.run_task(self.load_charge_history, self.auth_service.selected_vin)
+        if self.last_climate_data is not None:
+            self.controls_view.update_climate_status(self.last_climate_data)
+
+        logger.info(f"Dashboard fully built after {(time.perf_counter() - self._build_started) * 1000:.0f} ms")
 
     def did_mount(self):
+        # Hero is on screen; build the rest progressively
+        self.page.run_task(self._mount_sections)
+        if self.last_state is None:
+            self.page.run_task(self.load_cached_state, self.auth_service.selected_vin)
         # Start connection in background
         self.page.run_task(self.connect_and_subscribe)
         # Load user settings
         self.page.run_task(self.load_settings)
+        # Replay queued commands once the API is reachable
+        self.page.run_task(self.start_outbox)
+        self._unsubscribe_alerts = self.alerts.subscribe(self.on_alert)
         # Start auto-refresh
         self.running = True
         self.page.run_task(self.auto_refresh_loop)
 
+    async def load_cached_state(self, vin):
+        """Render the persisted snapshot for a VIN unless live data beat us to it."""
+        state, cached_at = await self.snapshots.load(vin)
+        if state and self.last_state is None and vin == self.auth_service.selected_vin:
+            self.render_state(state, cached_at=cached_at)
+            return True
+        return False
+
+    async def load_charge_history(self, vin):
+        """
+        Back-fill the charging chart from persisted telemetry (SQLite, so off
+        the loop), and load NumPy for the charging estimates alongside.
+        """
+        loop = asyncio.get_running_loop()
+        analytics_was_ready = charge_analytics.ready()
+        await asyncio.gather(
+            loop.run_in_executor(None, self.charge_history.load, vin),
+            loop.run_in_executor(None, charge_analytics.load_numpy),
+        )
+        if vin != self.auth_service.selected_vin:
+            return
+        if charge_analytics.ready() and not analytics_was_ready:
+            self._rerender() # Adds the local ETA / kWh estimate
+        elif self.charge_chart:
+            self.charge_chart.show(vin, update=True)
+
+    def _rerender(self):
+        """Re-apply the state on screen, e.g. after a units change."""
+        if self.last_state:
+            self.render_state(self.last_state, cached_at=self.last_state_cached_at, labels=False)
+
     async def load_settings(self):
-        self.use_metric = await self.auth_service.storage.get("use_metric") == "True"
-        self.controls_view.update_units(self.use_metric)
+        await self.auth_service.settings.load()
+        self.use_metric = bool(self.auth_service.settings.get("use_metric", False))
+        self.alerts.set_rules(rules_from_settings(self.auth_service.settings.get("alert_rules")))
+        if self.controls_view:
+            self.controls_view.update_units(self.use_metric)
+        self._rerender()
         self.main_page.update()
 
     def auto_refresh_loop(self):
@@ -346,85 +493,112 @@ class DashboardView(ft.Container):
     async def auto_refresh_loop(self):
         while self.running:
             await asyncio.sleep(60)
+            # Debounced alerts (e.g. climate left on) fire without a new update
+            self.alerts.tick()
             if self.running:
                 print("DEBUG: Auto-refresh triggered")
                 await self.refresh_data(None)
 
     def will_unmount(self):
         self.running = False
-        if self.mqtt_client:
-            self.mqtt_client.disconnect()
+        self.outbox.stop()
+        if self._unsubscribe_outbox:
+            self._unsubscribe_outbox()
+            self._unsubscribe_outbox = None
+        if self._unsubscribe_charge_history:
+            self._unsubscribe_charge_history()
+            self._unsubscribe_charge_history = None
+        for detach in (self._unsubscribe_alerts, self._detach_alerts):
+            if detach:
+                detach()
+        self._unsubscribe_alerts = self._detach_alerts = None
+        if self._unsubscribe_state:
+            self._unsubscribe_state()
+            self._unsubscribe_state = None
+        self.session_pool.remove_message_listener(self.on_mqtt_message)
+        self.session_pool.close_all()
+        self.mqtt_client = None
+        self.overlays.dispose()
 
     async def connect_and_subscribe(self):
+        vin = self.auth_service.selected_vin
         try:
             self.loop = asyncio.get_running_loop()
-            self.status_text.value = "Authenticating MQTT..."
-            self.update()
-            
-            # Get CIG Token (Blocking)
-            def get_creds_task():
-                return HondaApi.get_cig_token(
-                    self.auth_service.access_token,
-                    self.auth_service.hidas_ident,
-                    self.auth_service.selected_vin
-                )
-            
-            creds = await self.loop.run_in_executor(None, get_creds_task)
-            
-            # Connect MQTT
-            self.status_text.value = "Connecting to AWS IoT..."
-            self.update()
+            if not self._unsubscribe_state:
+                self._unsubscribe_state = self.state_cache.subscribe(self.on_state_update)
+                self.session_pool.add_message_listener(self.on_mqtt_message)
+
+            warm = self.session_pool.is_warm(vin)
+            if not warm:
+                self.status_text.value = "Connecting to AWS IoT..."
+                self.update()
             
-            # MQTT Init (Blocking-ish)
-            def mqtt_connect_task():
-                client = AwsMqttClient(
-                    self.auth_service.selected_vin,
-                    creds["cig_token"],
-                    creds["cig_signature"],
-                    self.on_mqtt_message
-                )
-                client.connect()
-                return client
+            # CIG token + MQTT connect + subscribe, unless the pool already
+            # holds a live session for this VIN (Blocking)
+            session = await self.loop.run_in_executor(None, self.session_pool.acquire, vin)
+            if vin != self.auth_service.selected_vin:
+                # User switched vehicles while we were connecting
+                return
 
-            self.mqtt_client = await self.loop.run_in_executor(None, mqtt_connect_task)
+            self.mqtt_client = session.client
             self.is_connected = True
+            startup_trace.mark("mqtt_ready")
             
             # Update controls view with the now-active mqtt client
-            self.controls_view.mqtt_client = self.mqtt_client
-            
-            # Subscribe to Dashboard
-            vin = self.auth_service.selected_vin
-            topic_dashboard = f"$aws/things/thing_{vin}/shadow/name/DASHBOARD_ASYNC/update"
-            self.mqtt_client.subscribe(topic_dashboard)
-            
-            # Subscribe to Engine Status (for immediate command feedback)
-            topic_engine = f"$aws/things/thing_{vin}/shadow/name/ENGINE_START_STOP_ASYNC/update"
-            self.mqtt_client.subscribe(topic_engine)
-            
-            self.status_text.value = "Connected. Waiting for data..."
-            self.update()
+            if self.controls_view:
+                self.controls_view.mqtt_client = self.mqtt_client
+
+            # Live state may already be here: a warm session, or the login
+            # pipeline's early request answered while we were being built
+            state, received_at = self.state_cache.get(vin)
+            if state:
+                self._persist_snapshot(vin, state)
+                self.render_state(state, received_at=received_at)
+                startup_trace.finish("first_data")
+            else:
+                self.status_text.value = "Connected. Waiting for data..."
+                self.update()
             
-            # Request initial data
-            await self.refresh_data(None)
+            # Request initial data, unless the login pipeline just did
+            requested_at = session.dashboard_requested_at
+            if not requested_at or time.time() - requested_at > 30:
+                await self.refresh_data(None)
+            else:
+                await self._do_refresh(request_dashboard=False) # Climate only
             
         except Exception as e:
             self.status_text.value = f"Connection Error: {e}"
             self.update()
 
-    def on_mqtt_message(self, topic, payload):
-        try:
-            data = json.loads(payload)
-            # Check if it's the dashboard update
-            if "DASHBOARD_ASYNC" in topic:
-                self.update_dashboard_ui(data)
-            elif "ENGINE_START_STOP_ASYNC" in topic:
-                print(f"DEBUG: Engine Status Update: {payload}")
-                # Potentially update status/SNACKBAR here
-                
-        except Exception as e:
-            print(f"Error parsing MQTT message: {e}")
+    def on_state_update(self, vin, state, changed, timestamp):
+        """Called (on the MQTT thread) for every decoded dashboard update."""
+        # Keep snapshots fresh for background vehicles too
+        self._persist_snapshot(vin, state)
+        if vin == self.auth_service.selected_vin:
+            self.render_state(state, received_at=timestamp)
+            startup_trace.finish("first_data")
+
+    def on_alert(self, vin, alert, active):
+        """Called when an alert fires or clears, usually on the MQTT thread."""
+        if not active or not getattr(self, 'loop', None):
+            return
+        message = alert["message"]
+        if vin != self.auth_service.selected_vin:
+            vehicle = next((v for v in self.auth_service.vehicles if v.get("VIN") == vin), None)
+            message = f"{vehicle_display_name(vehicle) if vehicle else vin}: {message}"
+        self.loop.call_soon_threadsafe(self.overlays.show_snackbar, message, ft.Colors.ORANGE_800, 6000)
+
+    def on_mqtt_message(self, vin, topic, data):
+        if "ENGINE_START_STOP_ASYNC" in topic and vin == self.auth_service.selected_vin:
+            print(f"DEBUG: Engine Status Update: {data}")
+            # Potentially update status/SNACKBAR here
 
-    async def _do_refresh(self):
+    def _persist_snapshot(self, vin, state):
+        # MQTT callbacks run on the paho thread; storage lives on the UI loop
+        if getattr(self, 'loop', None):
+            asyncio.run_coroutine_threadsafe(self.snapshots.save(vin, state), self.loop)
+
+    async def _do_refresh(self, request_dashboard=True):
         try:
             if not self.is_connected:
                 pass
@@ -434,10 +608,11 @@ class DashboardView(ft.Container):
             
             def request_task():
                 # Dashboard async request
-                HondaApi.request_dashboard(
-                    self.auth_service.access_token,
-                    self.auth_service.selected_vin
-                )
+                if request_dashboard:
+                    HondaApi.request_dashboard(
+                        self.auth_service.access_token,
+                        self.auth_service.selected_vin
+                    )
                 
                 # Fetch Climate Status (Sync/Direct)
                 try:
@@ -450,7 +625,9 @@ class DashboardView(ft.Container):
                     if climate_data:
                          # Schedule UI update for climate
                          def update_climate_ui():
-                             self.controls_view.update_climate_status(climate_data)
+                             self.last_climate_data = climate_data
+                             if self.controls_view:
+                                 self.controls_view.update_climate_status(climate_data)
                          
                          if getattr(self, 'loop', None):
                              self.loop.call_soon_threadsafe(update_climate_ui)
@@ -469,27 +646,67 @@ class DashboardView(ft.Container):
         await self._do_refresh()
 
     async def on_vehicle_change(self, e):
-        new_vin = e.control.value
+        await self.select_vehicle(e.control.value)
+
+    def open_fleet_view(self, e):
+        self.fleet_view = FleetView(
+            self.auth_service,
+            self.state_cache,
+            self.snapshots,
+            on_select=lambda vin: self.page.run_task(self.select_vehicle, vin),
+            on_close=self.close_fleet_view,
+            use_metric=self.use_metric,
+            overlays=self.overlays
+        )
+        self.content = self.fleet_view
+        self.update()
+
+    def close_fleet_view(self):
+        if self.fleet_view is None:
+            return
+        self.fleet_view = None
+        self.content = self.list_view
+        self.update()
+
+    async def select_vehicle(self, new_vin):
+        self.close_fleet_view()
         if new_vin == self.auth_service.selected_vin:
             return
 
-        # 1. Disconnect current client if connected
-        self.running = False
-        if self.mqtt_client:
-            self.mqtt_client.disconnect()
-            self.mqtt_client = None
-            self.is_connected = False
+        # 1. Detach from the current session; the pool keeps it warm
+        self.mqtt_client = None
+        self.is_connected = False
 
-        # 2. Update Auth Service
+        # 2. Update Auth Service and header
         self.auth_service.selected_vin = new_vin
-        
-        # 3. Save new default vehicle
-        # We need the current username and password... we don't have them in Memory, 
-        # but they are in SharedPreferences. We can just load and re-save.
-        username, password, _, pin = await self.auth_service.load_credentials()
-        await self.auth_service.save_credentials(username, password, new_vin, pin)
+        if self.vehicle_dropdown:
+            self.vehicle_dropdown.value = new_vin
+        else:
+            self.vehicle_name_text.value = self.auth_service.get_vehicle_name()
 
-        # 4. Clear Dashboard UI Data
+        # 3. Show the new vehicle's data immediately: warm pooled state first,
+        # then the persisted snapshot, otherwise clear
+        self.last_state = None
+        state, received_at = self.state_cache.get(new_vin)
+        if state:
+            self.render_state(state, received_at=received_at)
+        elif not await self.load_cached_state(new_vin):
+            self._clear_dashboard()
+        if not self.session_pool.is_warm(new_vin):
+            self.status_text.value = "Switching vehicles..."
+        self.main_page.update()
+        if self.charge_chart:
+            self.page.run_task(self.load_charge_history, new_vin)
+
+        # 4. Save new default vehicle (cached settings; written behind)
+        await self.auth_service.settings.load()
+        self.auth_service.settings.update(vin=new_vin)
+
+        # 5. Reconnect and Subscribe (a pointer swap if the session is warm).
+        # The auto-refresh loop keeps running and follows selected_vin.
+        self.page.run_task(self.connect_and_subscribe)
+
+    def _clear_dashboard(self):
         self.battery_text.value = "-- %"
         self.range_text.value = "-- miles"
         self.charge_status_text.value = "--"
@@ -500,17 +717,75 @@ class DashboardView(ft.Container):
         for pos, text_control in self.tire_pressures.items():
             text_control.value = "-- PSI"
             text_control.color = None
-        self.status_text.value = "Switching vehicles..."
-        self.main_page.update()
+        self.last_updated.value = "Last Updated: Never"
+        self.last_updated.color = "secondary"
 
-        # 5. Reconnect and Subscribe
-        self.running = True
-        self.page.run_task(self.connect_and_subscribe)
-        self.page.run_task(self.auto_refresh_loop)
+    async def start_outbox(self):
+        await self.outbox.load()
+        self._unsubscribe_outbox = self.outbox.subscribe(self.on_outbox_change)
+        self.on_outbox_change(self.outbox.pending(), [])
+        await self.outbox.run()
+
+    def on_outbox_change(self, entries, results):
+        count = len(entries)
+        self.outbox_indicator.visible = count > 0
+        self.outbox_text.value = f"{count} queued"
+        self.outbox_indicator.update()
+
+        sent = [entry for entry, error in results if error is None]
+        dropped = [entry for entry, error in results if error is not None and entry not in entries]
+        if sent:
+            labels = ", ".join(sorted({get_command(e["command"]).label for e in sent}))
+            self.overlays.show_snackbar(f"Queued command sent: {labels}", bgcolor="green")
+        elif dropped:
+            labels = ", ".join(sorted({get_command(e["command"]).label for e in dropped}))
+            self.overlays.show_snackbar(f"Queued command failed: {labels}", bgcolor="red")
+
+    def open_outbox(self, e):
+        def close_dlg(e):
+            self.overlays.close_dialog(dlg)
+
+        def cancel(entry_id):
+            self.page.run_task(self.outbox.cancel, entry_id)
+            close_dlg(None)
+
+        def send_now(e):
+            close_dlg(e)
+            self.page.run_task(self.outbox.drain)
+
+        rows = []
+        for entry in self.outbox.pending():
+            command = get_command(entry["command"])
+            vehicle = next((v for v in self.auth_service.vehicles if v.get("VIN") == entry["vin"]), {})
+            detail = f"{vehicle_display_name(vehicle) or entry['vin']} • expires {time.strftime('%H:%M', time.localtime(entry['expires']))}"
+            if entry["not_before"] > time.time():
+                detail += f" • at {time.strftime('%H:%M', time.localtime(entry['not_before']))}"
+            if entry["error"]:
+                detail += f" • {entry['attempts']} attempt(s)"
+            rows.append(ft.Row([
+                ft.Column([
+                    ft.Text(command.label, weight="bold"),
+                    ft.Text(detail, size=11, color="secondary"),
+                ], spacing=2, expand=True),
+                ft.IconButton(icon=ft.icons.Icons.CLOSE, icon_size=18, tooltip="Cancel", on_click=lambda e, entry_id=entry["id"]: cancel(entry_id)),
+            ]))
+
+        dlg = self.overlays.show_dialog(
+            "Queued Commands",
+            ft.Column(rows or [ft.Text("Nothing queued.")], tight=True, spacing=8, scroll=ft.ScrollMode.AUTO),
+            [
+                ft.TextButton("Send Now", on_click=send_now),
+                ft.TextButton("Close", on_click=close_dlg),
+            ],
+        )
 
     async def handle_logout(self, e):
-        if self.mqtt_client:
-            self.mqtt_client.disconnect()
+        self.outbox.stop()
+        self.session_pool.close_all()
+        self.state_cache.clear()
+        # Cached vehicle data belongs to this account
+        for v in self.auth_service.vehicles:
+            await self.snapshots.remove(v.get("VIN"))
         if self.on_logout:
             await self.on_logout()
 
@@ -518,9 +793,9 @@ class DashboardView(ft.Container):
         def on_unit_change(e):
             self.use_metric = e.control.value
             self.main_page.run_task(self._save_unit_setting, self.use_metric)
-            self.controls_view.update_units(self.use_metric)
-            if self.last_api_data:
-                self.update_dashboard_ui(self.last_api_data)
+            if self.controls_view:
+                self.controls_view.update_units(self.use_metric)
+            self._rerender()
             self.main_page.update()
 
         unit_toggle = ft.Switch(
@@ -530,16 +805,45 @@ class DashboardView(ft.Container):
             active_color=ft.Colors.CYAN_400
         )
 
+        def on_alert_toggle(e):
+            self.main_page.run_task(self._save_alert_setting, e.control.data, e.control.value)
+
+        alert_toggles = [
+            ft.Switch(
+                label=rule["label"],
+                value=rule.get("enabled", True),
+                data=rule["id"],
+                on_change=on_alert_toggle,
+                active_color=ft.Colors.CYAN_400
+            )
+            for rule in rules_from_settings(self.auth_service.settings.get("alert_rules"))
+        ]
+
+        def on_export(e):
+            self.main_page.run_task(self.export_history, e.control.data)
+
+        export_section = []
+        if self.telemetry is not None:
+            formats = ["csv", "parquet"] if export.parquet_available() else ["csv"]
+            export_section = [
+                ft.Text("Export History", weight="bold", size=16),
+                ft.Row([
+                    ft.OutlinedButton(fmt.upper(), icon=ft.icons.Icons.DOWNLOAD, data=fmt, on_click=on_export)
+                    for fmt in formats
+                ], spacing=10),
+            ]
+
         def close_dlg(e):
-            dlg.open = False
-            self.main_page.update()
+            self.overlays.close_dialog(dlg)
 
-        dlg = ft.AlertDialog(
-            modal=True,
-            title=ft.Row([ft.Icon(ft.icons.Icons.INFO), ft.Text("Information & Settings")]),
-            content=ft.Column([
+        dlg = self.overlays.show_dialog(
+            ft.Row([ft.Icon(ft.icons.Icons.INFO), ft.Text("Information & Settings")]),
+            ft.Column([
                 ft.Text("App Settings", weight="bold", size=16),
                 unit_toggle,
+                ft.Text("Alerts", weight="bold", size=16),
+                *alert_toggles,
+                *export_section,
                 ft.Divider(color=ft.Colors.WHITE_10),
                 ft.Text("Important Information", weight="bold", size=16),
                 ft.Text(
@@ -553,18 +857,39 @@ class DashboardView(ft.Container):
                     on_click=lambda _: self.main_page.launch_url("https://github.com/mcspencehouse/logue-app")
                 )
             ], tight=True, spacing=10),
-            actions=[
+            [
                 ft.TextButton("Close", on_click=close_dlg),
             ],
-            actions_alignment=ft.MainAxisAlignment.END,
         )
 
-        self.main_page.overlay.append(dlg)
-        dlg.open = True
+    async def _save_unit_setting(self, use_metric):
+        await self.auth_service.settings.load()
+        self.auth_service.settings.update(use_metric=use_metric)
+
+    async def _save_alert_setting(self, rule_id, enabled):
+        await self.auth_service.settings.load()
+        overrides = dict(self.auth_service.settings.get("alert_rules") or {})
+        overrides[rule_id] = {**overrides.get(rule_id, {}), "enabled": enabled}
+        self.auth_service.settings.update(alert_rules=overrides)
+        self.alerts.set_rules(rules_from_settings(overrides))
+        self._rerender()
         self.main_page.update()
 
-    async def _save_unit_setting(self, use_metric):
-        await self.auth_service.storage.set("use_metric", str(use_metric))
+    async def export_history(self, fmt):
+        """Write the selected vehicle's full history to EXPORT_DIR (off the UI loop)."""
+        vin = self.auth_service.selected_vin
+        if not vin or self.telemetry is None:
+            return
+        path = export.default_export_path(Config.EXPORT_DIR, [vin], fmt)
+        self.overlays.show_snackbar(f"Exporting history to {fmt.upper()}...")
+        try:
+            count = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: export.export_history(self.telemetry, [vin], path, fmt)
+            )
+            self.overlays.show_snackbar(f"Exported {count} samples to {path}", bgcolor="green", duration=8000)
+        except Exception as ex:
+            logger.error(f"Export failed: {ex}")
+            self.overlays.show_snackbar(f"Export failed: {ex}", bgcolor="red")
 
     def open_charge_settings(self, e):
         # Default value
@@ -578,8 +903,7 @@ class DashboardView(ft.Container):
         label = ft.Text(f"{current_target}%", size=20, weight="bold")
         
         def close_dlg(e):
-            dlg.open = False
-            self.main_page.update()
+            self.overlays.close_dialog(dlg)
             
         def save_target(e):
             target = int(slider.value)
@@ -587,10 +911,7 @@ class DashboardView(ft.Container):
             
             # Helper to run async API call
             async def run_update():
-                snack = ft.SnackBar(ft.Text(f"Setting charge limit to {target}%..."))
-                self.main_page.overlay.append(snack)
-                snack.open = True
-                self.main_page.update()
+                self.overlays.show_snackbar(f"Setting charge limit to {target}%...")
                 
                 try:
                     def api_call():
@@ -605,65 +926,48 @@ class DashboardView(ft.Container):
                     loop = asyncio.get_running_loop()
                     await loop.run_in_executor(None, api_call)
                     
-                    snack.open = False
-                    success_snack = ft.SnackBar(ft.Text("Charge limit updated!"), bgcolor="green")
-                    self.main_page.overlay.append(success_snack)
-                    success_snack.open = True
-                    self.main_page.update()
+                    self.overlays.show_snackbar("Charge limit updated!", bgcolor="green")
                     
                     # Refresh data
                     await self._do_refresh()
                     
                 except Exception as ex:
-                    snack.open = False
-                    err_snack = ft.SnackBar(ft.Text(f"Failed to update: {ex}"), bgcolor="red")
-                    self.main_page.overlay.append(err_snack)
-                    err_snack.open = True
-                    self.main_page.update()
+                    self.overlays.show_snackbar(f"Failed to update: {ex}", bgcolor="red")
 
             # Execute async task
             # self.page.run_task(run_update) # page.run_task not available, use create_task
             loop = asyncio.get_running_loop()
             loop.create_task(run_update())
 
-        dlg = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Set Charge Limit"),
-            content=ft.Column([
+        dlg = self.overlays.show_dialog(
+            "Set Charge Limit",
+            ft.Column([
                 ft.Text("Select target charge percentage:"),
                 ft.Row([slider, label], alignment=ft.MainAxisAlignment.CENTER),
             ], height=100, tight=True),
-            actions=[
+            [
                 ft.TextButton("Cancel", on_click=close_dlg),
                 ft.TextButton("Update", on_click=save_target),
             ],
-            actions_alignment=ft.MainAxisAlignment.END,
         )
-        
-        self.main_page.overlay.append(dlg)
-        dlg.open = True
-        self.main_page.update()
 
-    def update_dashboard_ui(self, data):
-        self.last_api_data = data
-        reported = data.get("state", {}).get("reported", {})
-        
-        # Data is inside reported -> responseBody
-        rb = reported.get("responseBody", {})
-        
-        ev_status = rb.get("evStatus", {})
-        odometer_data = rb.get("odometer", {})
-        tire_status = rb.get("tireStatus", {})
-        charge_mode = rb.get("getChargeMode", {})
-        charge_time = rb.get("hvBatteryChargeCompleteTime", {})
+    def render_state(self, state, cached_at=None, update=True, labels=True, received_at=None):
+        """
+        Render a decoded dashboard state (see service.vehicle_state).
+        cached_at is the snapshot timestamp when rendering persisted data
+        instead of a live update; received_at is when live data arrived
+        (defaults to now); labels=False leaves the status line alone.
+        """
+        self.last_state = state
+        self.last_state_cached_at = cached_at
         
         # Battery & Range
-        battery = ev_status.get("soc")
-        range_val = ev_status.get("evRange")
-        charge_status = ev_status.get("chargeStatus")
-        plug_status = ev_status.get("plugStatus")
+        battery = state.get("soc")
+        range_val = state.get("range")
+        charge_status = state.get("charge_status")
+        plug_status = state.get("plug_status")
         
-        target_level = charge_mode.get("generalAwayTargetChargeLevel", {}).get("value")
+        target_level = state.get("target_level")
         if target_level is not None:
             try:
                 target_float = float(target_level) / 100.0
@@ -690,12 +994,6 @@ class DashboardView(ft.Container):
                     self.range_text.value = f"{int(rv)} miles"
             except:
                 self.range_text.value = f"{range_val} miles"
-            
-            
-        # Update Target Charge Level if available (optional display)
-        # target_level = charge_mode.get("generalAwayTargetChargeLevel", {}).get("value")
-
-        # Charging status & type
 
         # Charging status & type
         status_parts = []
@@ -716,9 +1014,9 @@ class DashboardView(ft.Container):
                  status_parts.append("(Plugged In)")
         
         # Determine charging type/voltage
-        charge_mode_val = ev_status.get("chargeMode")
-        power_level = rb.get("chargerPowerLevel", {}).get("value")
-        charge_type_raw = charge_mode.get("chargeModeType", {}).get("value")
+        charge_mode_val = state.get("charge_mode")
+        power_level = state.get("charger_power_level")
+        charge_type_raw = state.get("charge_mode_type")
         
         display_type = None
         if power_level and power_level.isdigit() and int(power_level) > 0:
@@ -733,49 +1031,49 @@ class DashboardView(ft.Container):
              
         self.charge_status_text.value = " ".join(status_parts) if status_parts else "Unplugged"
 
-        # Update Charging Card Styling
+        # Update Charging Card Styling (once the lazy section exists)
         # Default to inactive (Grey)
         card_border_color = ft.Colors.GREY_800
         card_shadow_color = ft.Colors.TRANSPARENT
         text_color = ft.Colors.GREY_400
         icon_color = ft.Colors.GREY_700
         
-        is_plugged_in = plug_status in ["plugged", "CONNECTED", "connected"] or \
-                        (charge_status and charge_status.lower() in ["charging", "plugged", "connected"])
+        plugged_in = is_plugged_in(state)
         
-        if is_plugged_in:
+        if plugged_in:
             card_border_color = ft.Colors.GREEN_400
             card_shadow_color = ft.Colors.GREEN_900
             text_color = ft.Colors.GREEN_400
             icon_color = ft.Colors.GREEN_400
         
         # Update styling elements
-        self.charging_card.border = ft.Border.all(1, card_border_color)
-        self.charging_card.shadow.color = card_shadow_color
         self.charge_status_text.color = text_color
-        # Update icon in charging card (first icon in column -> row -> icon)
-        try:
-             # structure: Container -> Column -> Row -> [Text, Container, Icon]
-             self.charging_card.content.controls[0].controls[2].color = icon_color
-             # structure: Container -> Column -> Row (2nd) -> [Text, Container, Icon]
-             self.charging_card.content.controls[2].controls[2].color = icon_color
-        except Exception as e:
-            print(f"Error updating charging card icons: {e}")
+        if self.charging_card:
+            self.charging_card.border = ft.Border.all(1, card_border_color)
+            self.charging_card.shadow.color = card_shadow_color
+            # Update icon in charging card (first icon in column -> row -> icon)
+            try:
+                 # structure: Container -> Column -> Row -> [Text, Container, Icon]
+                 self.charging_card.content.controls[0].controls[2].color = icon_color
+            except Exception as e:
+                print(f"Error updating charging card icons: {e}")
+            # The latest sample is already in the chart's buffer (state cache listener)
+            self.charge_chart.show(self.auth_service.selected_vin)
 
-        self.charging_card.update()
+            if update:
+                self.charging_card.update()
 
         # Target and ETA
-        target_level = charge_mode.get("generalAwayTargetChargeLevel", {}).get("value")
-        eta_day = charge_time.get("hvBatteryChargeCompleteDay", {}).get("value")
-        eta_hour = charge_time.get("hvBatteryChargeCompleteHour", {}).get("value")
-        eta_min = charge_time.get("hvBatteryChargeCompleteMinute", {}).get("value")
+        eta_day = state.get("eta_day")
+        eta_hour = state.get("eta_hour")
+        eta_min = state.get("eta_minute")
 
         details = []
         
         # Add charging speed (e.g. 235v at 12A) when actively charging
-        if charge_status and charge_status.lower() == "charging":
-            volts = rb.get("getChargeMode", {}).get("chargeModeAcVoltage", {}).get("value")
-            amps = rb.get("getChargeMode", {}).get("chargeModeAcAmperage", {}).get("value")
+        if is_charging(state):
+            volts = state.get("ac_voltage")
+            amps = state.get("ac_amperage")
             if volts and amps:
                 details.append(f"{volts}V at {amps}A")
 
@@ -789,7 +1087,24 @@ class DashboardView(ft.Container):
         except Exception:
             pass
 
-        if is_plugged_in and not is_at_target:
+        # Local estimate from this session's history (once NumPy is loaded)
+        estimate = None
+        if plugged_in and charge_analytics.ready():
+            try:
+                estimate = charge_analytics.estimate(
+                    self.charge_history.samples(self.auth_service.selected_vin),
+                    target=float(target_level) if target_level is not None else None
+                )
+            except Exception as e:
+                logger.error(f"Charging estimate failed: {e}")
+        if estimate and estimate["kwh_added"] >= 0.1:
+            rate = f" at {estimate['rate']:.0f}%/h" if estimate["rate"] else ""
+            details.append(f"+{estimate['kwh_added']:.1f} kWh{rate}")
+
+        if plugged_in and not is_at_target:
+            if estimate and estimate["eta"] and not eta_day:
+                # The car didn't report a completion time; predict it locally
+                details.append(f"ETA ~{time.strftime('%a %I:%M %p', time.localtime(estimate['eta']))}")
             if eta_day and eta_hour is not None and eta_min is not None:
                 try:
                     h = int(eta_hour)
@@ -804,8 +1119,8 @@ class DashboardView(ft.Container):
         self.charge_details_text.value = " • ".join(details) if details else ""
 
         # Odometer
-        odometer = odometer_data.get("value")
-        odometer_unit = odometer_data.get("unit", "Miles").lower()
+        odometer = state.get("odometer")
+        odometer_unit = (state.get("odometer_unit") or "Miles").lower()
         if odometer is not None:
             try:
                 ov = float(odometer)
@@ -830,31 +1145,35 @@ class DashboardView(ft.Container):
                 return "--", ""
 
         for pos, text_control in self.tire_pressures.items():
-            pressure_kpa = tire_status.get(pos, {}).get("pressureData", {}).get("value")
+            pressure_kpa = state.get(f"tire_{pos}")
             if pressure_kpa:
                 val, unit = format_pressure(pressure_kpa)
                 text_control.value = f"{val} {unit}"
-                # Color based on pressure (simple heuristic)
-                try:
-                    kpa_val = float(pressure_kpa)
-                    psi = kpa_val * 0.145038
-                    text_control.color = "red" if psi < 30 or psi > 45 else None
-                except:
-                    pass
+                # Red while the tire pressure alert is firing for this tire
+                alerting = self.alerts.is_alerting(self.auth_service.selected_vin, f"tire_pressure:{pos}", state)
+                text_control.color = "red" if alerting else None
         
         # Climate Status
         # Path: evStatus -> cabinPreconditioningTempCustomSetting (maybe?) 
         # OR getChargeMode -> cabinPrecondRequest (Found in dump: "OFF")
-        climate_status = "Unknown"
-        if "getChargeMode" in rb:
-             val = rb["getChargeMode"].get("cabinPrecondRequest", {}).get("value")
-             if val:
-                 climate_status = val
+        climate_status = state.get("climate") or "Unknown"
         
-        self.controls_view.update_climate_status(climate_status)
+        if self.controls_view:
+            self.controls_view.update_climate_status(climate_status)
+
+        if not labels:
+            pass
+        elif cached_at:
+            # Stale-while-revalidate: make it obvious this is not live data
+            self.last_updated.value = f"Cached: {describe_age(cached_at)}"
+            self.last_updated.color = ft.Colors.AMBER_300
+        else:
+            self.status_text.value = "Data Received"
+            self.last_updated.value = f"Last Updated: {time.strftime('%I:%M:%S %p', time.localtime(received_at or time.time()))}"
+            self.last_updated.color = "secondary"
 
-        self.status_text.value = "Data Received"
-        self.last_updated.value = f"Last Updated: {time.strftime('%I:%M:%S %p')}"
+        if not update:
+            return
         
         # Update UI safely
         if hasattr(self, 'loop'):
@@ -867,4 +1186,3 @@ class DashboardView(ft.Container):
             asyncio.run_coroutine_threadsafe(ui_update_task(), self.loop)
         else:
             self.update()
-
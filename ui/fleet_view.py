@@ -0,0 +1,367 @@
+import flet as ft
+import asyncio
+import logging
+from service.fleet_index import FleetIndex, vehicle_display_name, vehicle_nickname
+from service.fleet_refresh import FleetRefresher
+from service.bulk_commands import BulkCommandDispatcher
+from service.commands import COMMANDS
+from service.session_pool import MqttSessionPool
+from service.config import Config
+from service.vehicle_state import is_plugged_in, is_charging
+
+logger = logging.getLogger(__name__)
+
+class FleetView(ft.Container):
+    """
+    Fleet overview: one compact row per vehicle (SoC, range, plug and lock
+    state) with search over VIN, model and nickname.
+
+    Only a window of rows around the scroll position is built; spacers stand
+    in for the rest so the scroll extent stays right, and rows that scroll
+    far out of view are dropped again. Their data comes from the shared
+    VehicleStateCache (falling back to in-memory snapshots) - never from
+    per-row API calls.
+    """
+    ROW_HEIGHT = 64
+    # Rows kept built beyond each edge of the visible ones
+    WINDOW_BUFFER = 20
+    # Visible rows assumed until the first scroll event reports the viewport
+    VISIBLE_ROWS = 15
+    # How long a bulk refresh waits for each vehicle's dashboard to arrive
+    REFRESH_WAIT = 45
+
+    def __init__(self, auth_service, state_cache, snapshots, on_select, on_close, use_metric=False, overlays=None):
+        super().__init__(expand=True)
+        self.overlays = overlays
+        self.auth_service = auth_service
+        self.state_cache = state_cache
+        self.snapshots = snapshots
+        self.on_select = on_select
+        self.on_close = on_close
+        self.use_metric = use_metric
+        self.index = FleetIndex(auth_service.vehicles)
+        self.results = self.index.vins
+        self._rows = {} # VIN -> row widgets, only for rows in the window
+        self._row_controls = {} # VIN -> built row, in list order
+        self._window = (0, 0) # Slice of self.results currently built
+        self._unsubscribe_state = None
+        self.refreshing = False
+        self.selected = set() # VINs ticked for bulk commands
+        self.bulk_dispatcher = BulkCommandDispatcher(auth_service, state_cache=state_cache)
+        self.last_bulk_job = None
+
+        self.search_input = ft.TextField(
+            hint_text="Search VIN, model or nickname",
+            prefix_icon=ft.icons.Icons.SEARCH,
+            on_change=self.on_search,
+            dense=True,
+            expand=True
+        )
+        self.count_text = ft.Text(size=12, color="secondary")
+        self.top_spacer = ft.Container(height=0)
+        self.bottom_spacer = ft.Container(height=0)
+        self.list_view = ft.ListView(
+            expand=True,
+            spacing=0,
+            on_scroll=self.on_scroll
+        )
+
+        self.content = ft.Column([
+            ft.Row([
+                ft.IconButton(icon=ft.icons.Icons.ARROW_BACK, icon_color=ft.Colors.WHITE_54, tooltip="Back", on_click=self.handle_close),
+                ft.Text("FLEET OVERVIEW", size=12, weight="bold", color=ft.Colors.WHITE_70),
+                ft.Container(expand=True),
+                self.count_text,
+                ft.IconButton(icon=ft.icons.Icons.REFRESH, icon_color=ft.Colors.WHITE_54, tooltip="Refresh All", on_click=self.handle_refresh_all),
+            ]),
+            ft.Row([
+                self.search_input,
+                ft.IconButton(icon=ft.icons.Icons.SELECT_ALL, icon_color=ft.Colors.WHITE_54, tooltip="Select All Listed", on_click=self.handle_select_all),
+                ft.IconButton(icon=ft.icons.Icons.SEND, icon_color=ft.Colors.AMBER_300, tooltip="Send Command to Selected", on_click=self.open_bulk_command),
+            ]),
+            self.list_view
+        ], spacing=10, expand=True)
+        self.padding = ft.padding.only(top=50, left=20, right=20, bottom=20)
+
+        self._show_results()
+
+    def did_mount(self):
+        self._unsubscribe_state = self.state_cache.subscribe(self.on_state_update)
+
+    def will_unmount(self):
+        if self._unsubscribe_state:
+            self._unsubscribe_state()
+            self._unsubscribe_state = None
+
+    def handle_close(self, e):
+        if self.on_close:
+            self.on_close()
+
+    def handle_refresh_all(self, e):
+        if not self.refreshing:
+            self.page.run_task(self.refresh_all)
+
+    async def refresh_all(self):
+        """Refresh every vehicle currently listed, streaming progress into the header."""
+        vins = list(self.results)
+        if not vins:
+            return
+        self.refreshing = True
+        # Temporary pool feeding the same state cache the rows read from. Each
+        # vehicle's session is closed once it has answered, so only as many
+        # are open as are being refreshed at a time
+        concurrency = Config.FLEET_REFRESH_CONCURRENCY
+        pool = MqttSessionPool(self.auth_service, self.state_cache, max_size=concurrency)
+        refresher = FleetRefresher(self.auth_service, session_pool=pool, max_concurrency=concurrency, release_sessions=True)
+        done = failed = 0
+        self.count_text.value = f"Refreshing 0/{len(vins)}..."
+        self.update()
+        try:
+            async for result in refresher.refresh_async(vins, wait_timeout=self.REFRESH_WAIT):
+                done += 1
+                if not result.ok:
+                    failed += 1
+                self.count_text.value = f"Refreshing {done}/{len(vins)}..."
+                self.count_text.update()
+        finally:
+            self.refreshing = False
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, pool.close_all)
+
+        self.count_text.value = f"Refreshed {done - failed}/{len(vins)}" + (f" ({failed} failed)" if failed else "")
+        self.update()
+
+    def on_check(self, vin, checked):
+        if checked:
+            self.selected.add(vin)
+        else:
+            self.selected.discard(vin)
+        self._update_count()
+        self.count_text.update()
+
+    def handle_select_all(self, e):
+        # Toggle: select everything listed, or clear if it already is
+        listed = set(self.results)
+        if listed and listed <= self.selected:
+            self.selected -= listed
+        else:
+            self.selected |= listed
+        for vin, widgets in self._rows.items():
+            widgets["check"].value = vin in self.selected
+        self._update_count()
+        self.update()
+
+    def open_bulk_command(self, e):
+        if not self.selected or not self.overlays:
+            return
+
+        command_input = ft.Dropdown(
+            label="Command",
+            value="lock",
+            options=[ft.dropdown.Option(key=c.key, text=c.label) for c in COMMANDS.values() if c.key != "charge_limit"],
+        )
+        temp_input = ft.TextField(label="Temperature (°F, climate only)", value="72", keyboard_type=ft.KeyboardType.NUMBER)
+        pin_input = ft.TextField(label="Enter PIN", password=True, max_length=4, keyboard_type=ft.KeyboardType.NUMBER)
+
+        def close_dlg(e):
+            self.overlays.close_dialog(dlg)
+
+        def submit(e):
+            if not pin_input.value:
+                return
+            close_dlg(e)
+            params = {}
+            if command_input.value == "climate_start":
+                try:
+                    params["temperature"] = int(temp_input.value)
+                except (TypeError, ValueError):
+                    params["temperature"] = 72
+            job = self.bulk_dispatcher.create_job(command_input.value, sorted(self.selected), params=params, default_pin=pin_input.value)
+            self.page.run_task(self.run_bulk_job, job)
+
+        dlg = self.overlays.show_dialog(
+            f"Command {len(self.selected)} Vehicles",
+            ft.Column([command_input, temp_input, pin_input], tight=True, spacing=10),
+            [
+                ft.TextButton("Cancel", on_click=close_dlg),
+                ft.TextButton("Execute", on_click=submit),
+            ],
+        )
+
+        # Pre-fill the stored PIN
+        async def prefill():
+            stored_pin = self.auth_service.settings.get("pin")
+            if stored_pin:
+                pin_input.value = stored_pin
+                pin_input.update()
+        self.page.run_task(prefill)
+
+    async def run_bulk_job(self, job):
+        """Dispatch (or retry) a bulk job, streaming progress, then show the report."""
+        self.last_bulk_job = job
+        total = len(job.vins)
+        progress = {"done": 0}
+
+        def on_progress(vin, status, error):
+            progress["done"] += 1
+            self.count_text.value = f"{job.command.label}: {progress['done']}/{total}..."
+            self.count_text.update()
+
+        self.overlays.show_snackbar(f"Sending {job.command.label} to {total} vehicles...", duration=30000)
+        report = await self.bulk_dispatcher.run_async(job, on_progress)
+        self.overlays.hide_snackbar()
+        self._update_count()
+        self.show_bulk_report(job, report)
+
+    def show_bulk_report(self, job, report):
+        failed = report["failed"]
+        lines = [
+            ft.Text(f"Succeeded: {len(report['succeeded'])}", color=ft.Colors.GREEN_400),
+            ft.Text(f"Pending: {len(report['pending'])}", color=ft.Colors.AMBER_300),
+            ft.Text(f"Failed: {len(failed)}", color=ft.Colors.RED_400 if failed else None),
+        ]
+        for vin, error in list(failed.items())[:20]:
+            lines.append(ft.Text(f"{vin}: {error}", size=11, color="secondary"))
+        if len(failed) > 20:
+            lines.append(ft.Text(f"...and {len(failed) - 20} more", size=11, color="secondary"))
+
+        def close_dlg(e):
+            self.overlays.close_dialog(dlg)
+
+        def retry(e):
+            close_dlg(e)
+            # Only the failed VINs are re-sent
+            self.page.run_task(self.run_bulk_job, job)
+
+        actions = [ft.TextButton("Close", on_click=close_dlg)]
+        if failed:
+            actions.insert(0, ft.TextButton("Retry Failed", on_click=retry))
+
+        dlg = self.overlays.show_dialog(
+            f"{job.command.label} Results",
+            ft.Column(lines, tight=True, spacing=5, scroll=ft.ScrollMode.AUTO),
+            actions,
+        )
+
+    def on_search(self, e):
+        self.results = self.index.search(e.control.value)
+        self._show_results()
+        self.update()
+
+    def on_scroll(self, e):
+        try:
+            first = int(e.pixels // self.ROW_HEIGHT)
+            visible = int(e.viewport_dimension // self.ROW_HEIGHT) + 1
+        except (AttributeError, TypeError):
+            return
+        # Re-window only once the visible rows get within half a buffer of an edge
+        margin = self.WINDOW_BUFFER // 2
+        start, end = self._window
+        if start <= max(0, first - margin) and min(len(self.results), first + visible + margin) <= end:
+            return
+        self._set_window(first - self.WINDOW_BUFFER, first + visible + self.WINDOW_BUFFER)
+        self.list_view.update()
+
+    def _show_results(self):
+        self._rows = {}
+        self._row_controls = {}
+        self._set_window(0, self.VISIBLE_ROWS + self.WINDOW_BUFFER)
+        self._update_count()
+
+    def _update_count(self):
+        self.count_text.value = f"{len(self.results)} of {len(self.index)} vehicles"
+        if self.selected:
+            self.count_text.value += f" • {len(self.selected)} selected"
+
+    def _set_window(self, start, end):
+        """Build rows for results[start:end], reusing ones already built, and drop the rest."""
+        start, end = max(0, start), min(len(self.results), end)
+        rows = {}
+        for vin in self.results[start:end]:
+            rows[vin] = self._row_controls.get(vin) or self._build_row(vin)
+        self._row_controls = rows
+        self._rows = {vin: self._rows[vin] for vin in rows}
+        self._window = (start, end)
+        self.top_spacer.height = start * self.ROW_HEIGHT
+        self.bottom_spacer.height = (len(self.results) - end) * self.ROW_HEIGHT
+        self.list_view.controls = [self.top_spacer, *rows.values(), self.bottom_spacer]
+
+    def _state_for(self, vin):
+        state, _ = self.state_cache.get(vin)
+        if state is None and self.snapshots:
+            state, _ = self.snapshots.peek(vin)
+        return state or {}
+
+    def _build_row(self, vin):
+        v = self.index.get(vin) or {}
+        widgets = {
+            "soc": ft.Text(size=16, weight="bold", width=56),
+            "range": ft.Text(size=12, color="secondary"),
+            "plug": ft.Icon(ft.icons.Icons.POWER, size=18),
+            "lock": ft.Icon(ft.icons.Icons.LOCK, size=18),
+            "check": ft.Checkbox(value=vin in self.selected, on_change=lambda e, vin=vin: self.on_check(vin, e.control.value)),
+        }
+        self._rows[vin] = widgets
+        self._apply_state(widgets, self._state_for(vin))
+
+        title = vehicle_nickname(v) or vehicle_display_name(v)
+        selected = vin == self.auth_service.selected_vin
+        return ft.Container(
+            content=ft.Row([
+                widgets["check"],
+                widgets["soc"],
+                ft.Column([
+                    ft.Text(title, size=14, weight="bold", color=ft.Colors.CYAN_200 if selected else None, no_wrap=True),
+                    ft.Row([ft.Text(vin, size=11, color="secondary", font_family="Roboto Mono"), widgets["range"]], spacing=8),
+                ], spacing=2, expand=True),
+                widgets["plug"],
+                widgets["lock"],
+            ], vertical_alignment=ft.CrossAxisAlignment.CENTER, spacing=10),
+            height=self.ROW_HEIGHT,
+            padding=ft.padding.symmetric(horizontal=10),
+            border=ft.Border(bottom=ft.BorderSide(1, ft.Colors.WHITE_10)),
+            on_click=lambda e, vin=vin: self.on_select(vin),
+            ink=True
+        )
+
+    def _apply_state(self, widgets, state):
+        soc = state.get("soc")
+        widgets["soc"].value = f"{soc}%" if soc is not None else "--"
+
+        range_val = state.get("range")
+        if range_val is None:
+            widgets["range"].value = ""
+        elif self.use_metric:
+            widgets["range"].value = f"{int(float(range_val) * 1.60934)} km"
+        else:
+            widgets["range"].value = f"{int(float(range_val))} miles"
+
+        if is_charging(state):
+            widgets["plug"].icon = ft.icons.Icons.BOLT
+            widgets["plug"].color = ft.Colors.GREEN_400
+        elif is_plugged_in(state):
+            widgets["plug"].icon = ft.icons.Icons.POWER
+            widgets["plug"].color = ft.Colors.GREEN_400
+        else:
+            widgets["plug"].icon = ft.icons.Icons.POWER_OFF
+            widgets["plug"].color = ft.Colors.GREY_700
+
+        lock_state = state.get("lock_state")
+        if lock_state == "unlocked":
+            widgets["lock"].icon = ft.icons.Icons.LOCK_OPEN
+            widgets["lock"].color = ft.Colors.AMBER_300
+        else:
+            widgets["lock"].icon = ft.icons.Icons.LOCK
+            widgets["lock"].color = ft.Colors.WHITE_54 if lock_state == "locked" else ft.Colors.GREY_800
+
+    def on_state_update(self, vin, state, changed, timestamp):
+        # Only rows that have been built need repainting
+        widgets = self._rows.get(vin)
+        if widgets is None:
+            return
+        self._apply_state(widgets, state)
+        try:
+            for widget in widgets.values():
+                widget.update()
+        except Exception as e:
+            logger.debug(f"Fleet row update skipped for {vin}: {e}")
@@ -0,0 +1,111 @@
+import flet as ft
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OverlayManager:
+    """
+    Owns the dialogs and snackbars shown on a page.
+
+    A small pool of AlertDialog / SnackBar instances is created once and
+    re-bound with new content on every show. Instances are only attached to
+    page.overlay while they are visible and are evicted again once closed, so
+    the overlay (and the diff done on every page.update()) stays bounded for
+    the whole session.
+    """
+    def __init__(self, page, dialog_pool_size=2, snackbar_pool_size=2):
+        self.page = page
+        self._dialogs = [self._new_dialog() for _ in range(dialog_pool_size)]
+        self._snackbars = [self._new_snackbar() for _ in range(snackbar_pool_size)]
+        self._next_snackbar = 0
+        self._active_snackbar = None
+
+    def _new_dialog(self):
+        dlg = ft.AlertDialog(modal=True)
+        dlg.on_dismiss = lambda e, d=dlg: self._evict(d)
+        return dlg
+
+    def _new_snackbar(self):
+        snack = ft.SnackBar(ft.Text(""))
+        snack.on_dismiss = lambda e, s=snack: self._evict(s)
+        return snack
+
+    def _attach(self, control):
+        if control not in self.page.overlay:
+            self.page.overlay.append(control)
+
+    def _evict(self, control, update=True):
+        """Remove a closed overlay control so it stops being diffed."""
+        if control.open:
+            return
+        if control in self.page.overlay:
+            self.page.overlay.remove(control)
+            if update:
+                self.page.update()
+
+    # Dialogs
+
+    def show_dialog(self, title, content, actions, modal=True, actions_alignment=ft.MainAxisAlignment.END):
+        """Bind content to a pooled AlertDialog and open it."""
+        dlg = next((d for d in self._dialogs if not d.open), None)
+        if dlg is None:
+            # Every pooled dialog is open; recycle the oldest one
+            dlg = self._dialogs.pop(0)
+            self._dialogs.append(dlg)
+            logger.debug("Dialog pool exhausted, recycling oldest dialog")
+
+        dlg.modal = modal
+        dlg.title = ft.Text(title) if isinstance(title, str) else title
+        dlg.content = content
+        dlg.actions = actions
+        dlg.actions_alignment = actions_alignment
+
+        self._attach(dlg)
+        dlg.open = True
+        self.page.update()
+        return dlg
+
+    def close_dialog(self, dlg):
+        dlg.open = False
+        self.page.update()
+        # Modal dialogs closed programmatically don't always fire on_dismiss
+        self._evict(dlg)
+
+    # Snackbars
+
+    def show_snackbar(self, message, bgcolor=None, duration=4000):
+        """
+        Show a message in a pooled SnackBar, replacing any visible one.
+        Returns the SnackBar so callers can close it early.
+        """
+        if self._active_snackbar is not None:
+            self._active_snackbar.open = False
+
+        snack = self._snackbars[self._next_snackbar]
+        self._next_snackbar = (self._next_snackbar + 1) % len(self._snackbars)
+
+        snack.content = ft.Text(message) if isinstance(message, str) else message
+        snack.bgcolor = bgcolor
+        snack.duration = duration
+
+        self._attach(snack)
+        snack.open = True
+        self._active_snackbar = snack
+        self.page.update()
+        return snack
+
+    def hide_snackbar(self, snack=None):
+        snack = snack or self._active_snackbar
+        if snack is None:
+            return
+        snack.open = False
+        if snack is self._active_snackbar:
+            self._active_snackbar = None
+        self.page.update()
+
+    def dispose(self):
+        """Close and evict everything this manager attached to the page."""
+        for control in self._dialogs + self._snackbars:
+            control.open = False
+            self._evict(control, update=False)
+        self._active_snackbar = None